@@ -0,0 +1,102 @@
+"""Benchmark IVF approximate search against exact search.
+
+Reports recall@k (share of the exact top-k that the IVF search returns)
+and per-query latency for a range of nprobe settings. Vectors are drawn
+around random cluster centers, which resembles the topical structure of
+sentence embeddings better than uniform noise.
+
+Usage:
+    python benchmarks/bench_ann.py [--size 200000] [--nprobe 1 4 16 64]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.ann_index import IVFIndex
+from polyhedra.services.vector_index import VectorIndex
+
+CHUNK = 100_000
+
+
+def clustered(n: int, centers: np.ndarray, spread: float, rng: np.random.Generator) -> np.ndarray:
+    """Points scattered around randomly chosen centers."""
+    labels = rng.integers(0, len(centers), n)
+    noise = rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    return (centers[labels] + spread * noise).astype(np.float32)
+
+
+def build_index(
+    directory: Path, size: int, centers: np.ndarray, spread: float, rng: np.random.Generator
+) -> VectorIndex:
+    """Write the benchmark corpus in chunks so memory stays bounded."""
+    index = VectorIndex(directory)
+    for start in range(0, size, CHUNK):
+        rows = min(CHUNK, size - start)
+        vectors = clustered(rows, centers, spread, rng)
+        metadata = [{"id": f"p{start + i}"} for i in range(rows)]
+        keys = [(f"p{start + i}", "", "") for i in range(rows)]
+        if start == 0:
+            index.write(vectors, metadata, "benchmark", keys=keys)
+            index.open()
+        else:
+            index.append(vectors, metadata, keys, deleted=[])
+    return index
+
+
+def per_query_ms(fn, queries: np.ndarray) -> tuple[float, np.ndarray]:
+    """Run fn on each query separately; return mean latency and the rows."""
+    rows = []
+    start = time.perf_counter()
+    for query in queries:
+        rows.append(fn(query[None, :])[0][0])
+    elapsed = time.perf_counter() - start
+    return elapsed / len(queries) * 1000, np.array(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.5)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = build_index(Path(tmpdir), args.size, centers, args.spread, rng)
+        queries = clustered(args.queries, centers, args.spread, rng)
+
+        ivf = IVFIndex(Path(tmpdir))
+        start = time.perf_counter()
+        stats = ivf.build(index, nlist=args.nlist)
+        print(f"{args.size:,} vectors, dim {args.dim}, nlist {stats['nlist']}, "
+              f"built in {time.perf_counter() - start:.1f}s")
+
+        exact_ms, exact_rows = per_query_ms(lambda q: index.search_many(q, args.k), queries)
+        print(f"{'search':>12} {'recall@' + str(args.k):>10} {'ms/query':>10} {'speedup':>8}")
+        print(f"{'exact':>12} {1.0:>10.3f} {exact_ms:>10.2f} {1.0:>7.1f}x")
+
+        for nprobe in args.nprobe:
+            ms, rows = per_query_ms(
+                lambda q: ivf.search_many(index, q, args.k, nprobe=nprobe), queries
+            )
+            recall = np.mean(
+                [len(set(a) & set(e)) / args.k for a, e in zip(rows, exact_rows)]
+            )
+            print(f"{'nprobe=' + str(nprobe):>12} {recall:>10.3f} {ms:>10.2f} "
+                  f"{exact_ms / ms:>7.1f}x")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark LSH near-duplicate detection against comparing all pairs.
+
+Synthetic embeddings are drawn around topic centroids, so unrelated
+papers are moderately similar as in real corpora, and 1% of them get a
+near copy (a preprint/published pair). Reports the time of
+cluster_duplicates and of a blocked all-pairs scan, and the share of
+all-pairs duplicates that LSH finds. All-pairs is skipped above
+--max-exact rows.
+
+Usage:
+    python benchmarks/bench_dedup.py [--rows 10000 50000 200000] [--threshold 0.95]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from polyhedra.services.dedup import DEFAULT_BITS, DEFAULT_TABLES, cluster_duplicates
+from polyhedra.services.vector_index import normalize
+
+
+def synthetic(rows: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Topic-clustered unit vectors whose last 1% copy earlier rows with noise."""
+    rng = np.random.default_rng(seed)
+    copies = rows // 100
+    topics = normalize(rng.standard_normal((max(rows // 500, 1), dim)).astype(np.float32))
+    base = topics[rng.integers(len(topics), size=rows - copies)]
+    base = normalize(base + 0.9 * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(dim))
+    noise = 0.2 * rng.standard_normal((copies, dim)).astype(np.float32) / np.sqrt(dim)
+    return np.concatenate([base, normalize(base[:copies] + noise)])
+
+
+def all_pairs(vectors: np.ndarray, threshold: float, block: int = 4096) -> set[tuple[int, int]]:
+    """Every pair above threshold, by blocked matrix products."""
+    pairs = set()
+    for start in range(0, len(vectors), block):
+        similarities = vectors[start : start + block] @ vectors.T
+        for i, j in zip(*np.nonzero(similarities >= threshold)):
+            if start + i < j:
+                pairs.add((int(start + i), int(j)))
+    return pairs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--threshold", type=float, default=0.95)
+    parser.add_argument("--bits", type=int, default=DEFAULT_BITS)
+    parser.add_argument("--tables", type=int, default=DEFAULT_TABLES)
+    parser.add_argument("--max-exact", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"dim {args.dim}, threshold {args.threshold}, {args.tables} bands x {args.bits} bits")
+    print(f"{'rows':>9} {'LSH s':>8} {'clusters':>9} {'all-pairs s':>12} {'recall':>7}")
+    for rows in args.rows:
+        vectors = synthetic(rows, args.dim)
+        titles = [""] * rows
+
+        start = time.perf_counter()
+        clusters = cluster_duplicates(
+            titles, np.arange(rows), lambda r: vectors[r], args.threshold, args.bits, args.tables
+        )
+        lsh_time = time.perf_counter() - start
+
+        exact_time, recall = "-", "-"
+        if rows <= args.max_exact:
+            start = time.perf_counter()
+            expected = all_pairs(vectors, args.threshold)
+            exact_time = f"{time.perf_counter() - start:.2f}"
+            cluster_of = {i: n for n, cluster in enumerate(clusters) for i in cluster}
+            found = sum(
+                1 for i, j in expected if i in cluster_of and cluster_of.get(j) == cluster_of[i]
+            )
+            recall = f"{found / max(len(expected), 1):.3f}"
+
+        print(f"{rows:>9,} {lsh_time:>8.2f} {len(clusters):>9,} {exact_time:>12} {recall:>7}")
+
+
+if __name__ == "__main__":
+    main()
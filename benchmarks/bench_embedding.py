@@ -0,0 +1,72 @@
+"""Benchmark index-build embedding throughput.
+
+Compares one model.encode call over every text (how index_papers used to
+encode) with ChunkedEncoder: length-sorted chunks, in this process and
+across worker processes. Abstract lengths are drawn from a log-normal
+distribution, so batches of unsorted texts carry a lot of padding.
+
+Needs the embedding model (downloaded on first use).
+
+Usage:
+    python benchmarks/bench_embedding.py [--papers 20000] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.parallel_embedding import ChunkedEncoder, load_sentence_transformer
+
+WORDS = (
+    "model learning neural network attention transformer graph data training "
+    "language vision representation retrieval benchmark method results task"
+).split()
+
+
+def synthetic_abstracts(n: int, rng: np.random.Generator) -> list[str]:
+    """Titles plus abstracts of realistic, widely varying length."""
+    lengths = np.clip(rng.lognormal(mean=5.0, sigma=0.6, size=n), 5, 400).astype(int)
+    return [" ".join(rng.choice(WORDS, size=length)) for length in lengths]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=20_000)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    texts = synthetic_abstracts(args.papers, np.random.default_rng(0))
+    model = load_sentence_transformer(args.model)
+    model.encode(texts[:64], show_progress_bar=False)
+
+    start = time.perf_counter()
+    model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+    baseline = args.papers / (time.perf_counter() - start)
+    print(f"{args.papers:,} texts, {os.cpu_count()} CPUs")
+    print(f"{'encoder':>20} {'papers/s':>10} {'speedup':>8}")
+    print(f"{'single encode call':>20} {baseline:>10.1f} {1.0:>7.2f}x")
+
+    for workers in dict.fromkeys(args.workers):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            encoder = ChunkedEncoder(
+                args.model,
+                workers=workers,
+                chunk_size=args.chunk_size,
+                checkpoint_dir=Path(tmpdir) / "chunks",
+                model=model if workers == 1 else None,
+            )
+            start = time.perf_counter()
+            encoder.encode(texts)
+            rate = args.papers / (time.perf_counter() - start)
+        label = f"chunked, {workers} proc"
+        print(f"{label:>20} {rate:>10.1f} {rate / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
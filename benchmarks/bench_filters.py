@@ -0,0 +1,65 @@
+"""Benchmark filtered search against a full scan.
+
+A metadata filter is turned into a row mask. Selective masks gather and
+score only the matching rows (VectorIndex.search_rows); broad ones are
+applied during a full scan (search_many with allowed=). Both are
+compared with an unfiltered scan at several selectivities; RAGService
+switches between them at GATHER_FRACTION.
+
+Usage:
+    python benchmarks/bench_filters.py [--rows 200000] [--selectivity 0.01 0.1 0.5]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-repeat milliseconds."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=16)
+    parser.add_argument("--selectivity", type=float, nargs="+", default=[0.01, 0.1, 0.5])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.rows, args.dim), dtype=np.float32)
+    queries = normalize(rng.standard_normal((args.queries, args.dim), dtype=np.float32))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        VectorIndex(Path(tmpdir)).write(vectors, [{}] * args.rows, "benchmark")
+        index = VectorIndex(Path(tmpdir)).open()
+        full = timed(lambda: index.search_many(queries, args.k), args.repeat)
+
+        print(f"{args.rows:,} rows x {args.dim} dims, {args.queries} queries")
+        print(f"{'selectivity':>12} {'gather ms':>10} {'masked scan ms':>15} {'full scan ms':>13}")
+        for selectivity in args.selectivity:
+            mask = rng.random(args.rows) < selectivity
+            rows = np.flatnonzero(mask)
+            gather = timed(lambda: index.search_rows(queries, rows, args.k), args.repeat)
+            scan = timed(lambda: index.search_many(queries, args.k, allowed=mask), args.repeat)
+            print(f"{selectivity:>12.0%} {gather:>10.1f} {scan:>15.1f} {full:>13.1f}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark k-NN graph lookups against scanning the index per lookup.
+
+Builds the graph for a clustered corpus, then appends 1% new rows and
+tombstones 0.1% to time an incremental update against a rebuild. Lookup
+latency is compared with an exact search using the paper's stored vector,
+which is what finding related papers costs without the graph.
+
+Usage:
+    python benchmarks/bench_knn_graph.py [--size 50000] [--degree 32]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.knn_graph import KNNGraph
+from polyhedra.services.vector_index import VectorIndex
+
+
+def clustered(n: int, centers: np.ndarray, spread: float, rng: np.random.Generator) -> np.ndarray:
+    """Points scattered around randomly chosen centers."""
+    labels = rng.integers(0, len(centers), n)
+    noise = rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    return (centers[labels] + spread * noise).astype(np.float32)
+
+
+def rows_and_keys(start: int, count: int) -> tuple[list[dict], list[tuple[str, str, str]]]:
+    """Metadata and keys of rows start..start + count."""
+    ids = [f"p{i}" for i in range(start, start + count)]
+    return [{"id": key} for key in ids], [(key, "", "") for key in ids]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--spread", type=float, default=1.5)
+    parser.add_argument("--degree", type=int, default=32)
+    parser.add_argument("--lookups", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = VectorIndex(Path(tmpdir))
+        metadata, keys = rows_and_keys(0, args.size)
+        index.write(clustered(args.size, centers, args.spread, rng), metadata, "benchmark", keys)
+        index.open()
+
+        graph = KNNGraph(Path(tmpdir))
+        start = time.perf_counter()
+        graph.build(index, degree=args.degree)
+        build_time = time.perf_counter() - start
+        size = sum(path.stat().st_size for path in graph.path.iterdir())
+        print(f"{args.size:,} vectors, dim {args.dim}, degree {args.degree}: built in "
+              f"{build_time:.1f}s, {size / 2**20:.1f} MiB")
+
+        added = args.size // 100
+        metadata, keys = rows_and_keys(args.size, added)
+        deleted = rng.choice(args.size, args.size // 1000, replace=False).tolist()
+        index.append(clustered(added, centers, args.spread, rng), metadata, keys, deleted)
+        start = time.perf_counter()
+        stats = graph.update(index)
+        print(f"update (+{added:,}, -{len(deleted):,}): {time.perf_counter() - start:.1f}s, "
+              f"{stats['scanned']:,} rows scanned")
+
+        lookups = rng.choice(index.live_rows(), args.lookups, replace=False)
+        start = time.perf_counter()
+        for row in lookups:
+            graph.neighbors_of(int(row), args.k)
+        graph_ms = (time.perf_counter() - start) / args.lookups * 1000
+
+        start = time.perf_counter()
+        for row in lookups:
+            index.search_many(index.get_vectors([row]), args.k + 1)
+        scan_ms = (time.perf_counter() - start) / args.lookups * 1000
+        print(f"lookup k={args.k}: graph {graph_ms:.3f} ms, scan {scan_ms:.2f} ms "
+              f"({scan_ms / graph_ms:.0f}x)")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
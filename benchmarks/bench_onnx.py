@@ -0,0 +1,113 @@
+"""Benchmark the embedding backends: PyTorch, ONNX and int8 ONNX.
+
+Each backend runs in a fresh interpreter, so import time and peak RSS
+are those of a server process that only uses that backend. Reports
+import time, peak RSS after encoding, sentences per second, and the
+largest difference from the first backend's vectors (PyTorch by default).
+
+Needs the embedding model and the onnx extra (pip install polyhedra[onnx]).
+The ONNX export is created once before timing.
+
+Usage:
+    python benchmarks/bench_onnx.py [--sentences 2000] [--model all-MiniLM-L6-v2]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.onnx_embedding import (
+    CONFIG,
+    QUANTIZED_MODEL_FILE,
+    export_onnx,
+    model_dir_for,
+)
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+WORDS = (
+    "model learning neural network attention transformer graph data training "
+    "language vision representation retrieval benchmark method results task"
+).split()
+
+
+def synthetic_sentences(n: int) -> list[str]:
+    """Abstract-like texts of varied length."""
+    rng = np.random.default_rng(0)
+    lengths = np.clip(rng.lognormal(mean=4.0, sigma=0.6, size=n), 5, 300).astype(int)
+    return [" ".join(rng.choice(WORDS, size=length)) for length in lengths]
+
+
+def child(backend: str, model_name: str, sentences: int, output: Path) -> None:
+    """Measure one backend in this (fresh) process."""
+    start = time.perf_counter()
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        imported = time.perf_counter() - start
+        model = SentenceTransformer(model_name, device="cpu")
+    else:
+        from polyhedra.services.onnx_embedding import load_onnx_encoder
+
+        imported = time.perf_counter() - start
+        model = load_onnx_encoder(model_name, quantized=backend == "onnx-int8")
+
+    texts = synthetic_sentences(sentences)
+    model.encode(texts[:32])
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=32)
+    rate = len(texts) / (time.perf_counter() - start)
+
+    np.save(output, np.asarray(embeddings, dtype=np.float32))
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"import_s": imported, "rss_mb": rss_mb, "rate": rate}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.model, args.sentences, args.output)
+        return
+
+    model_dir = model_dir_for(args.model)
+    if not (model_dir / CONFIG).exists() or not (model_dir / QUANTIZED_MODEL_FILE).exists():
+        export_onnx(args.model, model_dir, quantize=True)
+
+    print(f"{args.sentences:,} sentences, {args.model}")
+    print(f"{'backend':>10} {'import s':>9} {'peak RSS MB':>12} {'sent/s':>8} "
+          f"{'max |diff|':>11} {'min cos':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        reference = None
+        for backend in args.backends:
+            output = Path(tmpdir) / f"{backend}.npy"
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", backend, "--model", args.model,
+                 "--sentences", str(args.sentences), "--output", str(output)],
+                check=True, capture_output=True, text=True,
+            )
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            embeddings = np.load(output)
+            if reference is None:
+                reference = embeddings
+            diff = float(np.abs(embeddings - reference).max())
+            cosine = float(np.sum(embeddings * reference, axis=1).min())
+            print(f"{backend:>10} {stats['import_s']:>9.2f} {stats['rss_mb']:>12.0f} "
+                  f"{stats['rate']:>8.1f} {diff:>11.2e} {cosine:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
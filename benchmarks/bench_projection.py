@@ -0,0 +1,90 @@
+"""Benchmark PCA-reduced vector indexes against full-dimensional ones.
+
+For each dimension, writes the corpus, reduces it with VectorIndex.reduce
+and reports the reduction time, the size of the stored vectors, per-query
+latency and recall@k against exact search over the full vectors. Queries
+go through the index's projection as in RAGService.
+
+Synthetic vectors are drawn around topic centers with a variance spectrum
+that decays with the dimension, as in sentence embeddings, and are
+randomly rotated so no axis is special. Recall on real embeddings depends
+on their spectrum; check with --dims on a copy of a real index.
+
+Usage:
+    python benchmarks/bench_projection.py [--size 100000] [--dims 384 192 96]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.vector_index import VectorIndex, normalize, top_k
+
+
+def synthetic(
+    n: int, centers: np.ndarray, spectrum: np.ndarray, rotation: np.ndarray, rng
+) -> np.ndarray:
+    """Points around random centers, scaled by spectrum, then rotated."""
+    labels = rng.integers(0, len(centers), n)
+    noise = rng.standard_normal((n, len(spectrum)), dtype=np.float32)
+    return ((centers[labels] + noise) * spectrum) @ rotation
+
+
+def per_query_ms(index: VectorIndex, queries: np.ndarray, k: int) -> tuple[float, np.ndarray]:
+    """Project and search each query separately; return mean latency and the rows."""
+    rows = []
+    start = time.perf_counter()
+    for query in queries:
+        rows.append(index.search_many(index.project(query[None, :]), k)[0][0])
+    return (time.perf_counter() - start) / len(queries) * 1000, np.array(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--dims", type=int, nargs="+", default=[384, 192, 96])
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--decay", type=float, default=0.8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    spectrum = (np.arange(1, args.dim + 1) ** -args.decay).astype(np.float32)
+    rotation, _ = np.linalg.qr(rng.standard_normal((args.dim, args.dim)))
+    rotation = rotation.astype(np.float32)
+    centers = 2 * rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+    vectors = synthetic(args.size, centers, spectrum, rotation, rng)
+    queries = synthetic(args.queries, centers, spectrum, rotation, rng)
+    metadata = [{"id": f"p{i}"} for i in range(args.size)]
+    keys = [(f"p{i}", "", "") for i in range(args.size)]
+
+    exact_rows = top_k(normalize(queries) @ normalize(vectors).T, args.k)
+
+    print(f"{args.size:,} vectors, dim {args.dim}, spectrum i^-{args.decay}, k {args.k}")
+    print(f"{'dims':>6} {'reduce s':>9} {'vectors MiB':>12} {'ms/query':>9} "
+          f"{'recall@' + str(args.k):>10}")
+    for dims in args.dims:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = VectorIndex(Path(tmpdir))
+            index.write(vectors, metadata, "benchmark", keys)
+            index.open()
+            reduce_time = "-"
+            if dims < args.dim:
+                start = time.perf_counter()
+                index.reduce(dims)
+                reduce_time = f"{time.perf_counter() - start:.1f}"
+
+            size = sum(path.stat().st_size for path in Path(tmpdir).glob("seg-*/vectors.npy"))
+            ms, rows = per_query_ms(index, queries, args.k)
+            recall = np.mean([len(set(a) & set(e)) / args.k for a, e in zip(rows, exact_rows)])
+            print(f"{dims:>6} {reduce_time:>9} {size / 2**20:>12.1f} {ms:>9.2f} {recall:>10.3f}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
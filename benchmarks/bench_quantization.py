@@ -0,0 +1,99 @@
+"""Benchmark quantized vector scans against exact float search.
+
+For each quantization mode, reports recall@k against the exact float
+search, per-query latency, and bytes per vector of the scanned codes.
+The shortlist picked from the codes is always rescored with the float
+vectors, so the scores themselves stay exact.
+
+Usage:
+    python benchmarks/bench_quantization.py [--size 100000] [--modes none int8 binary]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.vector_index import VectorIndex
+
+CHUNK = 100_000
+
+
+def clustered(n: int, centers: np.ndarray, spread: float, rng: np.random.Generator) -> np.ndarray:
+    """Points scattered around randomly chosen centers."""
+    labels = rng.integers(0, len(centers), n)
+    noise = rng.standard_normal((n, centers.shape[1]), dtype=np.float32)
+    return (centers[labels] + spread * noise).astype(np.float32)
+
+
+def build_index(
+    directory: Path, size: int, centers: np.ndarray, spread: float, rng: np.random.Generator
+) -> VectorIndex:
+    """Write the benchmark corpus in chunks so memory stays bounded."""
+    index = VectorIndex(directory)
+    for start in range(0, size, CHUNK):
+        rows = min(CHUNK, size - start)
+        vectors = clustered(rows, centers, spread, rng)
+        metadata = [{"id": f"p{start + i}"} for i in range(rows)]
+        keys = [(f"p{start + i}", "", "") for i in range(rows)]
+        if start == 0:
+            index.write(vectors, metadata, "benchmark", keys=keys)
+            index.open()
+        else:
+            index.append(vectors, metadata, keys, deleted=[])
+    return index
+
+
+def per_query_ms(fn, queries: np.ndarray) -> tuple[float, np.ndarray]:
+    """Run fn on each query separately; return mean latency and the rows."""
+    fn(queries[:1])
+    rows = []
+    start = time.perf_counter()
+    for query in queries:
+        rows.append(fn(query[None, :])[0][0])
+    elapsed = time.perf_counter() - start
+    return elapsed / len(queries) * 1000, np.array(rows)
+
+
+def bytes_per_vector(index: VectorIndex) -> float:
+    """Size of the arrays a scan reads, per row."""
+    segment = index.segments[0]
+    codes = segment.codes if segment.codes is not None else segment.vectors
+    return codes.nbytes / max(len(codes), 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=1.5)
+    parser.add_argument("--modes", nargs="+", default=["none", "int8", "binary"])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = build_index(Path(tmpdir), args.size, centers, args.spread, rng)
+        queries = clustered(args.queries, centers, args.spread, rng)
+        _, exact_rows = per_query_ms(lambda q: index.search_many(q, args.k), queries)
+
+        print(f"{args.size:,} vectors, dim {args.dim}")
+        print(f"{'mode':>8} {'recall@' + str(args.k):>10} {'ms/query':>10} {'bytes/vec':>10}")
+        for mode in args.modes:
+            index.quantize(mode)
+            ms, rows = per_query_ms(lambda q: index.search_many(q, args.k), queries)
+            recall = np.mean(
+                [len(set(a) & set(e)) / args.k for a, e in zip(rows, exact_rows)]
+            )
+            print(f"{mode:>8} {recall:>10.3f} {ms:>10.2f} {bytes_per_vector(index):>10.0f}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
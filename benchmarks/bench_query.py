@@ -0,0 +1,84 @@
+"""Benchmark RAG query latency against index size.
+
+Compares the scoring used before vectors were stored normalized (row norms
+plus a full argsort on every query) with VectorIndex.search (one
+matrix-vector product plus argpartition top-k).
+
+Usage:
+    python benchmarks/bench_query.py [--sizes 10000 100000 1000000] [--dim 384]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.vector_index import VectorIndex
+
+CHUNK = 100_000
+
+
+def build_index(directory: Path, size: int, dim: int, rng: np.random.Generator) -> VectorIndex:
+    """Write a random index in chunks so memory stays bounded."""
+    index = VectorIndex(directory)
+    for start in range(0, size, CHUNK):
+        rows = min(CHUNK, size - start)
+        vectors = rng.standard_normal((rows, dim), dtype=np.float32)
+        metadata = [{"id": f"p{start + i}"} for i in range(rows)]
+        keys = [(f"p{start + i}", "", "") for i in range(rows)]
+        if start == 0:
+            index.write(vectors, metadata, "benchmark", keys=keys)
+            index.open()
+        else:
+            index.append(vectors, metadata, keys, deleted=[])
+    return index
+
+
+def legacy_search(index: VectorIndex, query: np.ndarray, k: int) -> np.ndarray:
+    """Per-query norms and a full sort, as RAGService.query used to do."""
+    scores = np.concatenate(
+        [
+            np.dot(segment.vectors, query)
+            / (np.linalg.norm(segment.vectors, axis=1) * np.linalg.norm(query))
+            for segment in index.segments
+        ]
+    )
+    return np.argsort(scores)[-k:][::-1]
+
+
+def timed(fn, repeats: int) -> float:
+    """Median wall time of fn in milliseconds."""
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'vectors':>10} {'legacy ms':>10} {'search ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = build_index(Path(tmpdir), size, args.dim, rng)
+            query = rng.standard_normal(args.dim, dtype=np.float32)
+
+            legacy = timed(lambda: legacy_search(index, query, args.k), args.repeats)
+            current = timed(lambda: index.search(query, args.k), args.repeats)
+            print(f"{size:>10,} {legacy:>10.2f} {current:>10.2f} {legacy / current:>7.1f}x")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark query latency of a sharded index against a single index.
+
+Random vectors are written once as one VectorIndex and once as hash
+shards; each configuration runs the same batch of queries. Shards are
+scanned in parallel threads, so the speedup is bounded by the number of
+cores.
+
+Usage:
+    python benchmarks/bench_sharded.py [--rows 200000] [--shards 1 2 4 8]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.sharded_index import ShardedIndex, shard_name
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+def write_sharded(directory: Path, vectors: np.ndarray, count: int) -> ShardedIndex:
+    """Split rows across hash shards of their key."""
+    groups: dict[str, list[int]] = {}
+    for row in range(len(vectors)):
+        groups.setdefault(shard_name(f"p{row}", None, "hash", count), []).append(row)
+
+    index = ShardedIndex(directory)
+    for name, rows in sorted(groups.items()):
+        index.write_shard(name, vectors[rows], [{}] * len(rows), "benchmark",
+                          [(f"p{row}", "", "") for row in rows])
+    index.save({"by": "hash", "count": count, "model": "benchmark", "shards": sorted(groups)})
+    return index.open()
+
+
+def timed(index, queries: np.ndarray, k: int, repeat: int) -> float:
+    """Best-of-repeat milliseconds per query."""
+    index.search_many(queries, k)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        index.search_many(queries, k)
+        best = min(best, time.perf_counter() - start)
+    return best / len(queries) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.rows, args.dim), dtype=np.float32)
+    queries = normalize(rng.standard_normal((args.queries, args.dim), dtype=np.float32))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        VectorIndex(root / "single").write(vectors, [{}] * args.rows, "benchmark")
+        single = VectorIndex(root / "single").open()
+        baseline = timed(single, queries, args.k, args.repeat)
+        _, expected = single.search_many(queries, args.k)
+
+        print(f"{args.rows:,} rows x {args.dim} dims, {os.cpu_count()} CPUs")
+        print(f"{'layout':>12} {'ms/query':>9} {'speedup':>8} {'same top-k':>11}")
+        print(f"{'single':>12} {baseline:>9.3f} {1.0:>7.2f}x {'yes':>11}")
+        for count in args.shards:
+            index = write_sharded(root / f"hash-{count}", vectors, count)
+            latency = timed(index, queries, args.k, args.repeat)
+            _, scores = index.search_many(queries, args.k)
+            same = "yes" if np.allclose(scores, expected, atol=1e-5) else "no"
+            print(f"{f'{count} shards':>12} {latency:>9.3f} {baseline / latency:>7.2f}x {same:>11}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
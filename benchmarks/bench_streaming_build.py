@@ -0,0 +1,99 @@
+"""Benchmark peak memory of building an index from a papers file.
+
+Compares loading the whole file and writing one matrix (json.loads plus
+VectorIndex.write, as index_papers did) with the streaming path
+(iter_papers in batches plus VectorIndex.write_batches). Embeddings are
+random vectors so the numbers isolate parsing and writing; the model's
+own memory per batch is the same for both.
+
+Peak memory is measured with tracemalloc (Python and NumPy allocations).
+
+Usage:
+    python benchmarks/bench_streaming_build.py [--sizes 10000 50000 200000]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from polyhedra.services.paper_stream import batched, iter_papers
+from polyhedra.services.vector_index import VectorIndex
+
+ABSTRACT = "We study representation learning for scientific documents. " * 20
+
+
+def write_corpus(path: Path, size: int) -> None:
+    """Write a papers.json-style array of synthetic papers."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(size):
+            paper = {"id": f"p{i}", "title": f"Paper {i}", "abstract": ABSTRACT,
+                     "authors": [{"name": "Author"}], "year": 2020}
+            f.write(("," if i else "") + json.dumps(paper))
+        f.write("]")
+
+
+def embed(count: int, dim: int) -> np.ndarray:
+    """Stand-in for the model: random vectors."""
+    return np.random.default_rng(count).standard_normal((count, dim), dtype=np.float32)
+
+
+def load_all(path: Path, directory: Path, dim: int) -> None:
+    """Parse everything, then write one matrix."""
+    papers = json.loads(path.read_text(encoding="utf-8"))
+    vectors = embed(len(papers), dim)
+    keys = [(paper["id"], "", "") for paper in papers]
+    VectorIndex(directory).write(vectors, papers, "benchmark", keys=keys)
+
+
+def streaming(path: Path, directory: Path, dim: int, batch_size: int) -> None:
+    """Parse, embed and write one batch at a time."""
+    batches = (
+        (embed(len(batch), dim), batch, [(paper["id"], "", "") for paper in batch])
+        for batch in batched(iter_papers(path), batch_size)
+    )
+    VectorIndex(directory).write_batches(batches, "benchmark")
+
+
+def measure(fn) -> tuple[float, float]:
+    """Peak traced memory in MB and wall time in seconds."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    print(f"{'papers':>8} {'file MB':>8} {'load-all MB':>12} {'stream MB':>10} "
+          f"{'load-all s':>11} {'stream s':>9}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            corpus = root / "papers.json"
+            write_corpus(corpus, size)
+
+            whole_mb, whole_s = measure(lambda: load_all(corpus, root / "whole", args.dim))
+            stream_mb, stream_s = measure(
+                lambda: streaming(corpus, root / "stream", args.dim, args.batch_size)
+            )
+            file_mb = corpus.stat().st_size / 2**20
+            print(f"{size:>8,} {file_mb:>8.0f} {whole_mb:>12.0f} {stream_mb:>10.0f} "
+                  f"{whole_s:>11.1f} {stream_s:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
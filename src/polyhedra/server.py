@@ -2,6 +2,7 @@
 
 import asyncio
 import json
+import logging
 from pathlib import Path
 from typing import Any
 
@@ -9,14 +10,22 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import TextContent, Tool
 
+from polyhedra.services.citation_graph import CitationGraphService
 from polyhedra.services.citation_manager import CitationManager
 from polyhedra.services.context_manager import ContextManager
+from polyhedra.services.dedup import canonical, collapse_duplicates
 from polyhedra.services.literature_review_service import LiteratureReviewService
 from polyhedra.services.llm_service import LLMService
+from polyhedra.services.paper_stream import iter_papers
+from polyhedra.services.pdf_references import PDFReferenceExtractor
 from polyhedra.services.project_initializer import ProjectInitializer
+from polyhedra.services.query_suggester import QuerySuggester
 from polyhedra.services.rag_service import RAGService
+from polyhedra.services.saved_searches import SavedSearchService
 from polyhedra.services.semantic_scholar import SemanticScholarService
 
+logger = logging.getLogger(__name__)
+
 # Initialize MCP server
 app = Server("polyhedra")
 
@@ -87,6 +96,16 @@ def get_services() -> dict[str, Any]:
         _services["context_manager"] = ContextManager(project_root)
         _services["rag_service"] = RAGService(project_root)
         _services["project_initializer"] = ProjectInitializer(project_root)
+        _services["citation_graph"] = CitationGraphService(
+            project_root, _services["semantic_scholar"]
+        )
+        _services["query_suggester"] = QuerySuggester(
+            project_root, _services["semantic_scholar"]
+        )
+        _services["saved_searches"] = SavedSearchService(
+            project_root, _services["semantic_scholar"]
+        )
+        _services["pdf_references"] = PDFReferenceExtractor(project_root)
         
         # Initialize LLM services (optional - gracefully handles missing config)
         _services["llm_service"] = LLMService()
@@ -131,6 +150,72 @@ async def list_tools() -> list[Tool]:
                 "required": ["query"],
             },
         ),
+        Tool(
+            name="suggest_queries",
+            description=(
+                "Suggest search query completions for a prefix from past queries, "
+                "known paper titles and Semantic Scholar autocomplete"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "prefix": {"type": "string", "description": "Partial query typed so far"},
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of suggestions",
+                        "default": 10,
+                        "minimum": 1,
+                        "maximum": 10,
+                    },
+                },
+                "required": ["prefix"],
+            },
+        ),
+        Tool(
+            name="save_search",
+            description="Save a search query so poll_saved_searches can fetch its new papers",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "Unique name of the search"},
+                    "query": {"type": "string", "description": "Search query string"},
+                    "fields_of_study": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Fields of study to filter by (optional)",
+                    },
+                    "since": {
+                        "type": "string",
+                        "description": (
+                            "Only track papers published on or after this date (YYYY-MM-DD); "
+                            "omit to backfill on the first poll"
+                        ),
+                    },
+                },
+                "required": ["name", "query"],
+            },
+        ),
+        Tool(
+            name="poll_saved_searches",
+            description=(
+                "Fetch only papers published since the last poll of each saved search "
+                "and append new ones to papers.json"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "names": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Saved searches to poll (default: all)",
+                    },
+                    "papers_path": {
+                        "type": "string",
+                        "description": f"Corpus file to append to [default: {DEFAULT_PAPERS_PATH}]",
+                    },
+                },
+            },
+        ),
         Tool(
             name="get_paper",
             description="Get detailed information about a specific paper by ID",
@@ -176,10 +261,173 @@ async def list_tools() -> list[Tool]:
                         "default": 5,
                         "minimum": 1,
                     },
+                    "nprobe": {
+                        "type": "integer",
+                        "description": (
+                            "Lists scanned when an ANN index is built "
+                            "(higher = better recall, slower)"
+                        ),
+                        "minimum": 1,
+                    },
+                    "exact": {
+                        "type": "boolean",
+                        "description": "Scan all vectors even if an ANN index is built",
+                        "default": False,
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["dense", "lexical", "hybrid"],
+                        "description": (
+                            "dense: embedding similarity; lexical: BM25 over titles and "
+                            "abstracts (exact terms, acronyms); hybrid: both, rank-fused"
+                        ),
+                        "default": "dense",
+                    },
+                    "prefilter": {
+                        "type": "boolean",
+                        "description": "Only return papers containing at least one query term",
+                        "default": False,
+                    },
+                    "filters": {
+                        "type": "object",
+                        "description": (
+                            "Metadata filters applied before scoring; venues and authors "
+                            "match any of the given values"
+                        ),
+                        "properties": {
+                            "year_min": {"type": "integer"},
+                            "year_max": {"type": "integer"},
+                            "venues": {"type": "array", "items": {"type": "string"}},
+                            "min_citations": {"type": "integer", "minimum": 0},
+                            "authors": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Semantic Scholar author IDs or names",
+                            },
+                        },
+                        "additionalProperties": False,
+                    },
                 },
                 "required": ["query"],
             },
         ),
+        Tool(
+            name="query_similar_papers_batch",
+            description=(
+                "Find similar papers for several queries at once "
+                "(e.g. every section heading of a draft)"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "queries": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Query texts to search for similar papers",
+                        "minItems": 1,
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of similar papers to return per query",
+                        "default": 5,
+                        "minimum": 1,
+                    },
+                    "nprobe": {
+                        "type": "integer",
+                        "description": (
+                            "Lists scanned when an ANN index is built "
+                            "(higher = better recall, slower)"
+                        ),
+                        "minimum": 1,
+                    },
+                    "exact": {
+                        "type": "boolean",
+                        "description": "Scan all vectors even if an ANN index is built",
+                        "default": False,
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["dense", "lexical", "hybrid"],
+                        "description": (
+                            "dense: embedding similarity; lexical: BM25 over titles and "
+                            "abstracts (exact terms, acronyms); hybrid: both, rank-fused"
+                        ),
+                        "default": "dense",
+                    },
+                    "prefilter": {
+                        "type": "boolean",
+                        "description": "Only return papers containing at least one query term",
+                        "default": False,
+                    },
+                    "filters": {
+                        "type": "object",
+                        "description": (
+                            "Metadata filters applied before scoring; venues and authors "
+                            "match any of the given values"
+                        ),
+                        "properties": {
+                            "year_min": {"type": "integer"},
+                            "year_max": {"type": "integer"},
+                            "venues": {"type": "array", "items": {"type": "string"}},
+                            "min_citations": {"type": "integer", "minimum": 0},
+                            "authors": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Semantic Scholar author IDs or names",
+                            },
+                        },
+                        "additionalProperties": False,
+                    },
+                },
+                "required": ["queries"],
+            },
+        ),
+        Tool(
+            name="find_related",
+            description=(
+                "Find the papers most similar to an indexed paper, from a precomputed "
+                "nearest-neighbor graph"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "paper_id": {
+                        "type": "string",
+                        "description": "ID of an indexed paper (as in papers.json)",
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of related papers to return",
+                        "default": 10,
+                        "minimum": 1,
+                    },
+                },
+                "required": ["paper_id"],
+            },
+        ),
+        Tool(
+            name="build_ann_index",
+            description=(
+                "Build an approximate nearest-neighbor (IVF) index over the indexed "
+                "papers for fast search in large corpora"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "nlist": {
+                        "type": "integer",
+                        "description": "Number of clusters (default: sqrt of paper count)",
+                        "minimum": 1,
+                    },
+                    "nprobe": {
+                        "type": "integer",
+                        "description": "Default clusters scanned per query",
+                        "default": 16,
+                        "minimum": 1,
+                    },
+                },
+            },
+        ),
         Tool(
             name="index_papers",
             description="Build semantic search index from papers.json",
@@ -189,10 +437,246 @@ async def list_tools() -> list[Tool]:
                     "papers_path": {
                         "type": "string",
                         "description": (
-                            "Path to papers.json file "
+                            "Path to a papers JSON or JSONL file "
                             "(optional, defaults to literature/papers.json)"
                         ),
                     },
+                    "stream": {
+                        "type": "boolean",
+                        "description": (
+                            "Rebuild the index reading and encoding the file in batches, "
+                            "with constant memory (for multi-GB corpora). Always a full "
+                            "rebuild; cannot be combined with sharding."
+                        ),
+                        "default": False,
+                    },
+                    "force_rebuild": {
+                        "type": "boolean",
+                        "description": (
+                            "Re-encode every paper instead of only new or changed ones"
+                        ),
+                        "default": False,
+                    },
+                    "workers": {
+                        "type": "integer",
+                        "description": (
+                            "Processes used to encode large paper collections "
+                            "(interrupted builds resume where they stopped)"
+                        ),
+                        "default": 1,
+                        "minimum": 1,
+                    },
+                    "shard_by": {
+                        "type": "string",
+                        "enum": ["none", "hash", "year"],
+                        "description": (
+                            "Split the index into shards scanned in parallel, by a hash "
+                            "of the paper ID or by year (default: keep the current layout)"
+                        ),
+                    },
+                    "shards": {
+                        "type": "integer",
+                        "description": "Number of shards when sharding by hash",
+                        "minimum": 1,
+                    },
+                    "dimensions": {
+                        "type": "integer",
+                        "description": (
+                            "Store vectors reduced to this many dimensions by PCA (smaller "
+                            "and faster, slightly lower recall); 0 for the model's own. "
+                            "Kept until changed; changing it rebuilds the index."
+                        ),
+                        "minimum": 0,
+                    },
+                    "quantization": {
+                        "type": "string",
+                        "enum": ["none", "int8", "binary"],
+                        "description": (
+                            "Scan compressed vectors and rescore the shortlist exactly: "
+                            "int8 (4x smaller) or binary (32x smaller). Kept until changed."
+                        ),
+                    },
+                },
+            },
+        ),
+        Tool(
+            name="index_full_texts",
+            description=(
+                "Index overlapping passages of local full texts (PDFs, markdown) for "
+                "query_passages; only new or changed files are embedded"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "source_dir": {
+                        "type": "string",
+                        "description": "Directory searched for full texts [default: literature]",
+                    },
+                    "papers_path": {
+                        "type": "string",
+                        "description": (
+                            f"Papers used to attribute files [default: {DEFAULT_PAPERS_PATH}]"
+                        ),
+                    },
+                    "window": {
+                        "type": "integer",
+                        "description": "Words per passage",
+                        "default": 160,
+                        "minimum": 1,
+                    },
+                    "overlap": {
+                        "type": "integer",
+                        "description": "Words shared by consecutive passages",
+                        "default": 32,
+                        "minimum": 0,
+                    },
+                },
+            },
+        ),
+        Tool(
+            name="query_passages",
+            description=(
+                "Search passages of local full texts; results are grouped per paper "
+                "with page numbers"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search query"},
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of papers to return",
+                        "default": 5,
+                        "minimum": 1,
+                    },
+                    "passages_per_paper": {
+                        "type": "integer",
+                        "description": "Best passages returned per paper",
+                        "default": 3,
+                        "minimum": 1,
+                    },
+                },
+                "required": ["query"],
+            },
+        ),
+        Tool(
+            name="analyze_citations",
+            description=(
+                "Find co-cited and bibliographically coupled papers in papers.json "
+                "and highly cited papers missing from the corpus"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "papers_path": {
+                        "type": "string",
+                        "description": f"Path to papers JSON file [default: {DEFAULT_PAPERS_PATH}]",
+                    },
+                    "top_k": {
+                        "type": "integer",
+                        "description": "Number of pairs and candidates to return",
+                        "default": 20,
+                        "minimum": 1,
+                    },
+                    "refresh": {
+                        "type": "boolean",
+                        "description": "Re-fetch reference lists instead of using the cache",
+                        "default": False,
+                    },
+                    "offline": {
+                        "type": "boolean",
+                        "description": (
+                            "Use only cached references and edges from extract_pdf_references"
+                        ),
+                        "default": False,
+                    },
+                },
+            },
+        ),
+        Tool(
+            name="rank_papers",
+            description=(
+                "Rank papers.json by citation-graph centrality (PageRank or HITS) "
+                "and store the score in each paper record"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "papers_path": {
+                        "type": "string",
+                        "description": f"Path to papers JSON file [default: {DEFAULT_PAPERS_PATH}]",
+                    },
+                    "method": {
+                        "type": "string",
+                        "enum": ["pagerank", "hits"],
+                        "description": "Centrality measure",
+                        "default": "pagerank",
+                    },
+                    "damping": {
+                        "type": "number",
+                        "description": "PageRank damping factor",
+                        "default": 0.85,
+                        "minimum": 0,
+                        "maximum": 1,
+                    },
+                    "offline": {
+                        "type": "boolean",
+                        "description": (
+                            "Use only cached references and edges from extract_pdf_references"
+                        ),
+                        "default": False,
+                    },
+                },
+            },
+        ),
+        Tool(
+            name="extract_pdf_references",
+            description=(
+                "Extract bibliographies from local PDFs and match them to papers.json "
+                "to build the citation graph offline"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pdf_dir": {
+                        "type": "string",
+                        "description": "Directory with PDFs [default: literature/pdfs]",
+                    },
+                    "papers_path": {
+                        "type": "string",
+                        "description": f"Path to papers JSON file [default: {DEFAULT_PAPERS_PATH}]",
+                    },
+                },
+            },
+        ),
+        Tool(
+            name="find_duplicates",
+            description=(
+                "Find near-duplicate papers in papers.json (preprint and published "
+                "versions, title variants) and optionally merge them"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "papers_path": {
+                        "type": "string",
+                        "description": f"Path to papers JSON file [default: {DEFAULT_PAPERS_PATH}]",
+                    },
+                    "threshold": {
+                        "type": "number",
+                        "description": "Embedding cosine similarity at which papers are duplicates",
+                        "default": 0.95,
+                        "minimum": 0,
+                        "maximum": 1,
+                    },
+                    "collapse": {
+                        "type": "boolean",
+                        "description": (
+                            "Keep one paper per cluster in papers.json and the index "
+                            "(the published, most cited version)"
+                        ),
+                        "default": False,
+                    },
                 },
             },
         ),
@@ -299,6 +783,14 @@ async def list_tools() -> list[Tool]:
                         "type": "string",
                         "description": "LLM model to use (optional, uses default)",
                     },
+                    "max_papers": {
+                        "type": "integer",
+                        "description": (
+                            "Review only the most influential papers, ranked by centrality "
+                            "(see rank_papers) or citation count"
+                        ),
+                        "minimum": 1,
+                    },
                 },
                 "required": [],
             },
@@ -321,8 +813,40 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                 year_end=arguments.get("year_end"),
                 fields_of_study=arguments.get("fields_of_study"),
             )
+            # Suggestions are a convenience; never fail a search over them
+            try:
+                services["query_suggester"].record_query(arguments["query"])
+            except Exception as e:
+                logger.warning(f"Search query not recorded: {e}")
             return [TextContent(type="text", text=json.dumps(results, indent=2))]
 
+        elif name == "suggest_queries":
+            service = services["query_suggester"]
+            result = await service.suggest(
+                arguments["prefix"],
+                limit=arguments.get("limit", 10),
+            )
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "save_search":
+            service = services["saved_searches"]
+            search = service.save_search(
+                arguments["name"],
+                arguments["query"],
+                fields_of_study=arguments.get("fields_of_study"),
+                since=arguments.get("since"),
+            )
+            return [TextContent(type="text", text=json.dumps(search, indent=2))]
+
+        elif name == "poll_saved_searches":
+            service = services["saved_searches"]
+            papers_path = arguments.get("papers_path", DEFAULT_PAPERS_PATH)
+            result = await service.poll(
+                get_project_root() / papers_path,
+                names=arguments.get("names"),
+            )
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
         elif name == "get_paper":
             service = services["semantic_scholar"]
             paper = await service.get_paper(arguments["paper_id"])
@@ -347,12 +871,86 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                         ),
                     )
                 ]
-            results = service.query(
+            results = await service.run(
+                service.query,
                 arguments["query"],
                 k=arguments.get("k", 5),
+                nprobe=arguments.get("nprobe"),
+                exact=arguments.get("exact", False),
+                mode=arguments.get("mode", "dense"),
+                prefilter=arguments.get("prefilter", False),
+                filters=arguments.get("filters"),
             )
             return [TextContent(type="text", text=json.dumps(results, indent=2))]
 
+        elif name == "query_similar_papers_batch":
+            service = services["rag_service"]
+            if not service.is_indexed():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {
+                                "error": "Papers not indexed. Run index_papers first.",
+                            }
+                        ),
+                    )
+                ]
+            queries = arguments["queries"]
+            results = await service.run(
+                service.query_many,
+                queries,
+                k=arguments.get("k", 5),
+                nprobe=arguments.get("nprobe"),
+                exact=arguments.get("exact", False),
+                mode=arguments.get("mode", "dense"),
+                prefilter=arguments.get("prefilter", False),
+                filters=arguments.get("filters"),
+            )
+            result = [
+                {"query": query, "results": query_results}
+                for query, query_results in zip(queries, results)
+            ]
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "find_related":
+            service = services["rag_service"]
+            if not service.is_indexed():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {
+                                "error": "Papers not indexed. Run index_papers first.",
+                            }
+                        ),
+                    )
+                ]
+            results = await service.run(
+                service.find_related, arguments["paper_id"], k=arguments.get("k", 10)
+            )
+            return [TextContent(type="text", text=json.dumps(results, indent=2))]
+
+        elif name == "build_ann_index":
+            service = services["rag_service"]
+            if not service.is_indexed():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {
+                                "error": "Papers not indexed. Run index_papers first.",
+                            }
+                        ),
+                    )
+                ]
+            result = await service.run(
+                service.build_ann_index,
+                nlist=arguments.get("nlist"),
+                nprobe=arguments.get("nprobe"),
+            )
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
         elif name == "index_papers":
             service = services["rag_service"]
             papers_path = arguments.get("papers_path", "literature/papers.json")
@@ -368,22 +966,247 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     )
                 ]
 
-            # Read papers using Path.read_text (sync I/O acceptable for config files)
-            papers = json.loads(papers_file.read_text(encoding="utf-8"))
+            stream = arguments.get("stream", False)
+            if stream and ("shard_by" in arguments or "shards" in arguments):
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {"error": "Streaming builds cannot be sharded; omit stream to shard"}
+                        ),
+                    )
+                ]
 
-            service.index_papers(papers)
+            # Encoding takes seconds; keep the event loop serving other tools
+            if stream:
+                stats = await service.run(
+                    service.build_index_streaming,
+                    papers_file,
+                    workers=arguments.get("workers", 1),
+                    dimensions=arguments.get("dimensions"),
+                )
+            else:
+                papers = list(iter_papers(papers_file))
+                stats = await service.run(
+                    service.update_index,
+                    papers,
+                    rebuild=arguments.get("force_rebuild", False),
+                    workers=arguments.get("workers", 1),
+                    shard_by=arguments.get("shard_by"),
+                    shards=arguments.get("shards"),
+                    dimensions=arguments.get("dimensions"),
+                )
+            if "quantization" in arguments:
+                await service.run(service.set_quantization, arguments["quantization"])
+                stats["quantization"] = arguments["quantization"]
             return [
                 TextContent(
                     type="text",
                     text=json.dumps(
                         {
                             "success": True,
-                            "indexed_count": len(papers),
+                            "indexed_count": stats.pop("indexed"),
+                            **stats,
                         }
                     ),
                 )
             ]
 
+        elif name == "index_full_texts":
+            service = services["rag_service"]
+            source_dir = get_project_root() / arguments.get("source_dir", "literature")
+            papers_file = get_project_root() / arguments.get("papers_path", DEFAULT_PAPERS_PATH)
+
+            if not source_dir.is_dir():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps({"error": f"Full-text directory not found: {source_dir}"}),
+                    )
+                ]
+
+            papers = list(iter_papers(papers_file)) if papers_file.exists() else []
+            stats = await service.run(
+                service.index_passages,
+                source_dir,
+                papers,
+                window=arguments.get("window", 160),
+                overlap=arguments.get("overlap", 32),
+            )
+            return [TextContent(type="text", text=json.dumps({"success": True, **stats}))]
+
+        elif name == "query_passages":
+            service = services["rag_service"]
+            results = await service.run(
+                service.query_passages,
+                arguments["query"],
+                k=arguments.get("k", 5),
+                passages_per_paper=arguments.get("passages_per_paper", 3),
+            )
+            if not results:
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {"error": "No passages indexed. Run index_full_texts first."}
+                        ),
+                    )
+                ]
+            return [TextContent(type="text", text=json.dumps(results, indent=2))]
+
+        elif name == "analyze_citations":
+            service = services["citation_graph"]
+            papers_path = arguments.get("papers_path", DEFAULT_PAPERS_PATH)
+            papers_file = get_project_root() / papers_path
+
+            if not papers_file.exists():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {"error": f"Papers file not found: {papers_path}"}
+                        ),
+                    )
+                ]
+
+            papers = json.loads(papers_file.read_text(encoding="utf-8"))
+            references = await service.collect_references(
+                papers,
+                refresh=arguments.get("refresh", False),
+                offline=arguments.get("offline", False),
+            )
+            graph = service.build_graph(papers, references)
+            result = service.analyze(graph, top_k=arguments.get("top_k", 20))
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "rank_papers":
+            service = services["citation_graph"]
+            papers_path = arguments.get("papers_path", DEFAULT_PAPERS_PATH)
+            papers_file = get_project_root() / papers_path
+
+            if not papers_file.exists():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {"error": f"Papers file not found: {papers_path}"}
+                        ),
+                    )
+                ]
+
+            papers = json.loads(papers_file.read_text(encoding="utf-8"))
+            references = await service.collect_references(
+                papers, offline=arguments.get("offline", False)
+            )
+            graph = service.build_graph(papers, references)
+            service.rank_papers(
+                papers,
+                graph,
+                method=arguments.get("method", "pagerank"),
+                damping=arguments.get("damping", 0.85),
+            )
+            papers_file.write_text(json.dumps(papers, indent=2), encoding="utf-8")
+
+            top = services["literature_review"].select_papers(papers, 10)
+            return [
+                TextContent(
+                    type="text",
+                    text=json.dumps(
+                        {
+                            "success": True,
+                            "ranked_count": graph.corpus_size,
+                            "top_papers": [
+                                {"title": p.get("title", ""), "centrality": p.get("centrality")}
+                                for p in top
+                            ],
+                        },
+                        indent=2,
+                    ),
+                )
+            ]
+
+        elif name == "extract_pdf_references":
+            papers_path = arguments.get("papers_path", DEFAULT_PAPERS_PATH)
+            papers_file = get_project_root() / papers_path
+            pdf_dir = get_project_root() / arguments.get("pdf_dir", "literature/pdfs")
+
+            if not papers_file.exists():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {"error": f"Papers file not found: {papers_path}"}
+                        ),
+                    )
+                ]
+
+            if not pdf_dir.is_dir():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps({"error": f"PDF directory not found: {pdf_dir}"}),
+                    )
+                ]
+
+            papers = json.loads(papers_file.read_text(encoding="utf-8"))
+            # Parsing PDFs takes minutes; run it off the event loop, and off the
+            # embedding worker so searches are not queued behind it
+            result = await asyncio.to_thread(
+                services["pdf_references"].extract, papers, pdf_dir
+            )
+            services["citation_graph"].save_local_edges(result["edges"])
+
+            result["edges"] = len(result["edges"])
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
+        elif name == "find_duplicates":
+            service = services["rag_service"]
+            papers_path = arguments.get("papers_path", DEFAULT_PAPERS_PATH)
+            papers_file = get_project_root() / papers_path
+
+            if not papers_file.exists():
+                return [
+                    TextContent(
+                        type="text",
+                        text=json.dumps(
+                            {"error": f"Papers file not found: {papers_path}"}
+                        ),
+                    )
+                ]
+
+            papers = json.loads(papers_file.read_text(encoding="utf-8"))
+            indexed = service.is_indexed()
+            clusters = await service.run(
+                service.find_duplicates, papers, threshold=arguments.get("threshold", 0.95)
+            )
+            result: dict[str, Any] = {
+                "clusters": [
+                    [
+                        {
+                            "id": papers[i].get("id") or papers[i].get("paperId"),
+                            "title": papers[i].get("title"),
+                            "year": papers[i].get("year"),
+                            "venue": papers[i].get("venue"),
+                            "keep": i == cluster[canonical([papers[j] for j in cluster])],
+                        }
+                        for i in cluster
+                    ]
+                    for cluster in clusters
+                ],
+                "duplicates": sum(len(cluster) - 1 for cluster in clusters),
+                "embeddings_used": indexed,
+                "collapsed": False,
+            }
+
+            if arguments.get("collapse", False) and clusters:
+                papers = collapse_duplicates(papers, clusters)
+                papers_file.write_text(json.dumps(papers, indent=2), encoding="utf-8")
+                result.update(collapsed=True, papers=len(papers))
+                if indexed:
+                    stats = await service.run(service.update_index, papers)
+                    result["indexed_count"] = stats["indexed"]
+            return [TextContent(type="text", text=json.dumps(result, indent=2))]
+
         elif name == "save_file":
             service = services["context_manager"]
             bytes_written = service.write_file(
@@ -472,6 +1295,9 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
                     )
                 ]
             
+            if arguments.get("max_papers"):
+                papers = service.select_papers(papers, arguments["max_papers"])
+            
             # Generate review
             result = await service.generate_review(
                 papers=papers,
@@ -539,6 +1365,13 @@ async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
 
 async def serve() -> None:
     """Run the MCP server."""
+    # Load the embedding model while the client connects, so the first
+    # semantic query does not pay for it. Projects without an index skip
+    # this to avoid downloading a model that may never be used.
+    rag_service = get_services()["rag_service"]
+    if rag_service.is_indexed():
+        rag_service.warm_up()
+
     async with stdio_server() as (read_stream, write_stream):
         await app.run(read_stream, write_stream, app.create_initialization_options())
 
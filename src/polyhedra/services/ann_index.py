@@ -0,0 +1,335 @@
+"""Approximate nearest-neighbor backends for the vector index.
+
+Backends are stored next to the vectors in the index directory and cover
+the segments that existed when they were built. Rows appended later are
+scanned exactly and merged in, so incremental updates never make results
+disappear; only compaction, which renumbers rows, requires rebuilding.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from polyhedra.services.vector_index import VectorIndex, normalize, top_k
+
+ANN_MANIFEST = "ann.json"
+
+
+class ANNBackend(ABC):
+    """Abstract base class for approximate search structures."""
+
+    name: str
+
+    def __init__(self, directory: Path):
+        """Initialize backend.
+
+        Args:
+            directory: Index directory the backend is stored in
+        """
+        self.directory = directory
+        self.segments: list[str] = []
+
+    @abstractmethod
+    def build(self, index: VectorIndex, **params: Any) -> dict[str, Any]:
+        """
+        Build the structure over all live rows and save it.
+
+        Args:
+            index: Open vector index
+            **params: Backend-specific build settings
+
+        Returns:
+            Build statistics
+        """
+        pass
+
+    @abstractmethod
+    def search_covered(
+        self, index: VectorIndex, queries: np.ndarray, k: int, **params: Any
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Search the rows covered by the structure.
+
+        Args:
+            index: Open vector index
+            queries: Normalized query embeddings of shape (q, dim)
+            k: Number of rows to return per query
+            **params: Backend-specific search settings
+
+        Returns:
+            Global rows and scores of shape (q, k), best first; -inf pads
+        """
+        pass
+
+    @abstractmethod
+    def load(self, manifest: dict[str, Any]) -> None:
+        """Open the saved structure described by manifest."""
+        pass
+
+    def covers(self, index: VectorIndex) -> bool:
+        """Whether the structure still matches the index's leading segments."""
+        names = [segment.name for segment in index.segments]
+        return bool(self.segments) and names[: len(self.segments)] == self.segments
+
+    def search_many(
+        self, index: VectorIndex, queries: np.ndarray, k: int, **params: Any
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Search covered rows approximately and newer rows exactly.
+
+        Args:
+            index: Open vector index the structure covers
+            queries: Query embeddings of shape (q, dim)
+            k: Number of rows to return per query
+            **params: Backend-specific search settings
+
+        Returns:
+            Global rows and cosine similarities of shape (q, k'), best first
+        """
+        queries = normalize(np.asarray(queries, dtype=np.float32))
+        rows, scores = self.search_covered(index, queries, k, **params)
+        if len(self.segments) < len(index.segments):
+            new_rows, new_scores = index.search_many(queries, k, first_segment=len(self.segments))
+            rows = np.concatenate([rows, new_rows], axis=1)
+            scores = np.concatenate([scores, new_scores], axis=1)
+
+        best = top_k(scores, min(k, len(index)))
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def _save_manifest(self, manifest: dict[str, Any]) -> None:
+        """Publish the backend manifest after its data files are written."""
+        path = self.directory / ANN_MANIFEST
+        tmp = path.with_name(f".{ANN_MANIFEST}.tmp")
+        tmp.write_text(json.dumps({"backend": self.name, **manifest}, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    iterations: int = 10,
+    seed: int = 0,
+) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity.
+
+    Args:
+        vectors: Unit-length rows to cluster
+        n_clusters: Number of centroids
+        iterations: Lloyd iterations
+        seed: Random seed for initialization and empty-cluster reseeding
+
+    Returns:
+        Unit-length centroids of shape (n_clusters, dim)
+    """
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = assign_clusters(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=n_clusters)
+
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize(sums)
+
+    return centroids
+
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray, block: int = 16384) -> np.ndarray:
+    """Index of the most similar centroid for each row."""
+    assign = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        assign[start : start + block] = np.argmax(
+            np.asarray(vectors[start : start + block]) @ centroids.T, axis=1
+        )
+    return assign
+
+
+class IVFIndex(ANNBackend):
+    """Inverted-file index: rows bucketed by their nearest k-means centroid.
+
+    A query scores the centroids, then scans only the nprobe closest lists.
+    Each list's vectors are stored contiguously, so scanning a list is one
+    matrix-vector product over a slice. More lists or fewer probes trade
+    recall for speed.
+    """
+
+    name = "ivf"
+
+    CENTROIDS = "ivf_centroids.npy"
+    VECTORS = "ivf_vectors.npy"
+    ROWS = "ivf_rows.npy"
+    OFFSETS = "ivf_offsets.npy"
+
+    DEFAULT_NPROBE = 16
+    TRAIN_POINTS_PER_LIST = 64
+
+    def __init__(self, directory: Path):
+        super().__init__(directory)
+        self.nprobe = self.DEFAULT_NPROBE
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    def build(
+        self,
+        index: VectorIndex,
+        nlist: int | None = None,
+        nprobe: int | None = None,
+        iterations: int = 10,
+        retrain: bool = True,
+        seed: int = 0,
+    ) -> dict[str, Any]:
+        """Cluster the live rows and write the inverted lists.
+
+        Args:
+            index: Open vector index
+            nlist: Number of lists (default: sqrt of the row count)
+            nprobe: Default number of lists scanned per query
+            iterations: k-means iterations
+            retrain: Recompute centroids; otherwise reuse the loaded ones
+            seed: Random seed for sampling and initialization
+
+        Returns:
+            Dict with lists, rows and default nprobe
+        """
+        live = np.concatenate(
+            [np.zeros(0, dtype=np.int64)]
+            + [
+                segment.start + np.flatnonzero(mask)
+                if (mask := index.live_mask(segment)) is not None
+                else segment.start + np.arange(len(segment))
+                for segment in index.segments
+            ]
+        )
+        if not len(live):
+            raise ValueError("Cannot build an ANN index over an empty index")
+
+        if retrain or not len(self.centroids):
+            nlist = nlist or max(1, int(np.sqrt(len(live))))
+            rng = np.random.default_rng(seed)
+            sample_size = min(len(live), nlist * self.TRAIN_POINTS_PER_LIST)
+            sample = np.sort(rng.choice(live, sample_size, replace=False))
+            self.centroids = spherical_kmeans(
+                index.get_vectors(sample), nlist, iterations=iterations, seed=seed
+            )
+        if nprobe is not None:
+            self.nprobe = nprobe
+
+        assign = assign_clusters(index.get_vectors(live), self.centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=len(self.centroids))
+
+        self.rows = live[order]
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        # Lists are written in order, in blocks, so memory stays bounded.
+        # Files are replaced, never rewritten: readers may still map them.
+        tmp = self.directory / f".{self.VECTORS}.tmp"
+        out = open_memmap(
+            tmp, mode="w+", dtype=np.float32, shape=(len(self.rows), self.centroids.shape[1])
+        )
+        for start in range(0, len(self.rows), VectorIndex.SCAN_BLOCK):
+            block = self.rows[start : start + VectorIndex.SCAN_BLOCK]
+            out[start : start + len(block)] = index.get_vectors(block)
+        out.flush()
+        del out
+        os.replace(tmp, self.directory / self.VECTORS)
+
+        for name, array in (
+            (self.CENTROIDS, self.centroids), (self.ROWS, self.rows), (self.OFFSETS, self.offsets)
+        ):
+            with open(self.directory / f".{name}.tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(self.directory / f".{name}.tmp", self.directory / name)
+
+        self.segments = [segment.name for segment in index.segments]
+        self._save_manifest(
+            {"nlist": len(self.centroids), "nprobe": self.nprobe, "segments": self.segments}
+        )
+        self.vectors = np.load(self.directory / self.VECTORS, mmap_mode="r")
+
+        return {"backend": self.name, "nlist": len(self.centroids), "nprobe": self.nprobe,
+                "rows": len(self.rows)}
+
+    def load(self, manifest: dict[str, Any]) -> None:
+        """Map the saved lists."""
+        self.nprobe = manifest.get("nprobe", self.DEFAULT_NPROBE)
+        self.segments = manifest["segments"]
+        self.centroids = np.load(self.directory / self.CENTROIDS)
+        self.offsets = np.load(self.directory / self.OFFSETS)
+        self.rows = np.load(self.directory / self.ROWS, mmap_mode="r")
+        self.vectors = np.load(self.directory / self.VECTORS, mmap_mode="r")
+
+    def search_covered(
+        self,
+        index: VectorIndex,
+        queries: np.ndarray,
+        k: int,
+        nprobe: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Scan the nprobe closest lists of each query.
+
+        Args:
+            index: Open vector index
+            queries: Normalized query embeddings of shape (q, dim)
+            k: Number of rows to return per query
+            nprobe: Lists scanned per query (default: the build setting)
+
+        Returns:
+            Global rows and scores of shape (q, k), best first; -inf pads
+        """
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        probes = top_k(queries @ self.centroids.T, nprobe)
+
+        rows = np.zeros((len(queries), k), dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i, query in enumerate(queries):
+            lists = [
+                slice(self.offsets[probe], self.offsets[probe + 1]) for probe in probes[i]
+            ]
+            candidates = np.concatenate([self.rows[part] for part in lists])
+            if not len(candidates):
+                continue
+            candidate_scores = np.concatenate([self.vectors[part] @ query for part in lists])
+            if len(index.tombstones):
+                candidate_scores[np.isin(candidates, index.tombstones)] = -np.inf
+
+            best = top_k(candidate_scores, k)
+            rows[i, : len(best)] = candidates[best]
+            scores[i, : len(best)] = candidate_scores[best]
+
+        return rows, scores
+
+
+BACKENDS: dict[str, type[ANNBackend]] = {IVFIndex.name: IVFIndex}
+
+
+def load_ann(directory: Path) -> ANNBackend | None:
+    """Open the ANN backend saved in an index directory, if any.
+
+    Args:
+        directory: Index directory
+
+    Returns:
+        Loaded backend, or None if none is saved or its backend is unknown
+    """
+    path = directory / ANN_MANIFEST
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    backend_class = BACKENDS.get(manifest.get("backend", ""))
+    if backend_class is None:
+        return None
+    backend = backend_class(directory)
+    backend.load(manifest)
+    return backend
@@ -0,0 +1,480 @@
+"""Citation graph analysis over the project's paper corpus."""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+from polyhedra.services.semantic_scholar import SemanticScholarService
+
+
+def paper_key(paper: dict[str, Any]) -> str:
+    """Return the identifier of a paper record (search results use paperId)."""
+    return str(paper.get("paperId") or paper.get("id") or "")
+
+
+@dataclass
+class CitationGraph:
+    """Citation graph in edge-list form.
+
+    Attributes:
+        node_ids: Paper ID of every node; corpus papers come first
+        titles: Title of every node
+        corpus_size: Number of leading nodes that belong to the corpus
+        src: Citing node index per edge
+        dst: Cited node index per edge
+    """
+
+    node_ids: list[str]
+    titles: list[str]
+    corpus_size: int
+    src: np.ndarray
+    dst: np.ndarray
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of nodes in the graph."""
+        return len(self.node_ids)
+
+    def node(self, idx: int) -> dict[str, Any]:
+        """Describe a node for tool output."""
+        return {"paperId": self.node_ids[idx], "title": self.titles[idx]}
+
+
+def cooccurrence(
+    keys: np.ndarray, members: np.ndarray, num_nodes: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count how often two members share a key.
+
+    This is the off-diagonal upper triangle of the sparse product M·Mᵀ where
+    M is the member-by-key incidence matrix given as (keys, members) pairs.
+    Grouping by cited paper yields bibliographic coupling (A·Aᵀ) and grouping
+    by citing paper yields co-citation (Aᵀ·A).
+
+    Args:
+        keys: Key per incidence (e.g. the cited node of each edge)
+        members: Member per incidence (e.g. the citing node of each edge)
+        num_nodes: Upper bound on member indices
+
+    Returns:
+        Tuple of (left, right, counts) with left < right
+    """
+    empty = np.array([], dtype=np.int64)
+    if len(keys) < 2:
+        return empty, empty, empty
+
+    order = np.lexsort((members, keys))
+    keys, members = keys[order], members[order]
+
+    # Duplicate incidences would be counted as extra shared keys
+    distinct = np.r_[True, (keys[1:] != keys[:-1]) | (members[1:] != members[:-1])]
+    keys, members = keys[distinct], members[distinct]
+
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+    sizes = np.diff(boundaries)
+    group_end = np.repeat(boundaries[1:], sizes)
+
+    # Pair every position with each later position in its group
+    positions = np.arange(len(members))
+    partners = group_end - positions - 1
+    total = int(partners.sum())
+    if total == 0:
+        return empty, empty, empty
+
+    left = np.repeat(positions, partners)
+    offsets = np.arange(total) - np.repeat(np.cumsum(partners) - partners, partners)
+    right = left + 1 + offsets
+
+    a, b = members[left].astype(np.int64), members[right].astype(np.int64)
+    pairs = np.minimum(a, b) * num_nodes + np.maximum(a, b)
+    unique_pairs, counts = np.unique(pairs, return_counts=True)
+
+    return unique_pairs // num_nodes, unique_pairs % num_nodes, counts
+
+
+def pagerank(
+    graph: CitationGraph,
+    damping: float = 0.85,
+    tol: float = 1e-10,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """Compute PageRank by sparse power iteration.
+
+    Each iteration is one scatter-add over the edge list, so the cost is
+    O(edges) with no dense matrix. Rank held by nodes without references
+    is spread uniformly.
+
+    Args:
+        graph: Citation graph
+        damping: Probability of following a citation
+        tol: L1 change at which iteration stops
+        max_iter: Maximum number of iterations
+
+    Returns:
+        PageRank per node (sums to 1)
+    """
+    n = graph.num_nodes
+    if n == 0:
+        return np.array([])
+
+    out_degree = np.bincount(graph.src, minlength=n).astype(np.float64)
+    dangling = out_degree == 0
+    edge_weight = 1.0 / out_degree[graph.src]
+    rank = np.full(n, 1.0 / n)
+
+    for _ in range(max_iter):
+        spread = np.bincount(graph.dst, weights=rank[graph.src] * edge_weight, minlength=n)
+        new_rank = (1.0 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        converged = np.abs(new_rank - rank).sum() < tol
+        rank = new_rank
+        if converged:
+            break
+
+    return rank
+
+
+def hits(
+    graph: CitationGraph, tol: float = 1e-10, max_iter: int = 100
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute HITS hub and authority scores by sparse power iteration.
+
+    Args:
+        graph: Citation graph
+        tol: L1 change at which iteration stops
+        max_iter: Maximum number of iterations
+
+    Returns:
+        Tuple of (hubs, authorities), each L2-normalized
+    """
+    n = graph.num_nodes
+    hubs = np.ones(n)
+    authorities = np.zeros(n)
+    if len(graph.src) == 0:
+        return hubs / max(np.sqrt(n), 1.0), authorities
+
+    for _ in range(max_iter):
+        new_authorities = np.bincount(graph.dst, weights=hubs[graph.src], minlength=n)
+        new_authorities /= np.linalg.norm(new_authorities)
+        new_hubs = np.bincount(graph.src, weights=new_authorities[graph.dst], minlength=n)
+        new_hubs /= np.linalg.norm(new_hubs)
+
+        delta = np.abs(new_hubs - hubs).sum() + np.abs(new_authorities - authorities).sum()
+        hubs, authorities = new_hubs, new_authorities
+        if delta < tol:
+            break
+
+    return hubs, authorities
+
+
+class CitationGraphService:
+    """Builds and analyzes the citation graph around papers.json."""
+
+    def __init__(
+        self,
+        project_root: Path,
+        semantic_scholar: SemanticScholarService | None = None,
+    ):
+        """Initialize citation graph service.
+
+        Args:
+            project_root: Root directory of the project
+            semantic_scholar: Service used to fetch reference lists
+        """
+        self.project_root = project_root
+        self.semantic_scholar = semantic_scholar
+        self.references_path = project_root / ".poly" / "citations" / "references.json"
+        self.local_edges_path = project_root / ".poly" / "citations" / "pdf_edges.npz"
+
+    def load_references(self) -> dict[str, list[dict[str, Any]]]:
+        """Load cached reference lists.
+
+        Returns:
+            Map of paper ID to its references
+        """
+        if not self.references_path.exists():
+            return {}
+        return json.loads(self.references_path.read_text(encoding="utf-8"))
+
+    def save_references(self, references: dict[str, list[dict[str, Any]]]) -> None:
+        """Persist reference lists to the cache file."""
+        self.references_path.parent.mkdir(parents=True, exist_ok=True)
+        self.references_path.write_text(json.dumps(references), encoding="utf-8")
+
+    def save_local_edges(self, edges: list[tuple[str, str]]) -> None:
+        """Store citation edges found offline as a compact adjacency file.
+
+        Nodes are numbered once and edges kept in CSR form (int32 indptr and
+        indices over citing nodes), so the file stays small for large graphs.
+
+        Args:
+            edges: (citing paper ID, cited paper ID) pairs
+        """
+        node_ids = sorted({key for edge in edges for key in edge})
+        position = {key: i for i, key in enumerate(node_ids)}
+        src = np.array([position[a] for a, _ in edges], dtype=np.int32)
+        dst = np.array([position[b] for _, b in edges], dtype=np.int32)
+
+        order = np.lexsort((dst, src))
+        src, dst = src[order], dst[order]
+        indptr = np.zeros(len(node_ids) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=len(node_ids)), out=indptr[1:])
+
+        self.local_edges_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            self.local_edges_path,
+            node_ids=np.array(node_ids, dtype=str),
+            indptr=indptr,
+            indices=dst,
+        )
+
+    def load_local_references(self) -> dict[str, list[dict[str, Any]]]:
+        """Load offline edges in the same shape as fetched reference lists."""
+        if not self.local_edges_path.exists():
+            return {}
+
+        with np.load(self.local_edges_path, allow_pickle=False) as data:
+            node_ids = data["node_ids"].tolist()
+            indptr, indices = data["indptr"], data["indices"]
+
+        return {
+            node_ids[i]: [
+                {"paperId": node_ids[j], "title": ""}
+                for j in indices[indptr[i] : indptr[i + 1]]
+            ]
+            for i in range(len(node_ids))
+            if indptr[i + 1] > indptr[i]
+        }
+
+    async def collect_references(
+        self,
+        papers: list[dict[str, Any]],
+        refresh: bool = False,
+        offline: bool = False,
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Gather reference lists from the API cache and local PDF edges.
+
+        Args:
+            papers: Corpus paper records
+            refresh: Re-fetch papers that are already cached
+            offline: Use only cached and PDF-derived references
+
+        Returns:
+            Map of paper ID to its references
+        """
+        if offline:
+            references = self.load_references()
+        else:
+            references = await self.fetch_references(papers, refresh=refresh)
+
+        merged = {key: list(refs) for key, refs in references.items()}
+        for key, refs in self.load_local_references().items():
+            known = {ref["paperId"] for ref in merged.get(key, [])}
+            merged.setdefault(key, []).extend(
+                ref for ref in refs if ref["paperId"] not in known
+            )
+        return merged
+
+    async def fetch_references(
+        self, papers: list[dict[str, Any]], refresh: bool = False
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Fetch reference lists for corpus papers, reusing the local cache.
+
+        Args:
+            papers: Corpus paper records
+            refresh: Re-fetch papers that are already cached
+
+        Returns:
+            Map of paper ID to its references
+
+        Raises:
+            RuntimeError: If papers need fetching but no API service is set
+        """
+        references = {} if refresh else self.load_references()
+        missing = [
+            key for key in dict.fromkeys(paper_key(p) for p in papers)
+            if key and key not in references
+        ]
+
+        if missing:
+            if self.semantic_scholar is None:
+                raise RuntimeError("Semantic Scholar service is required to fetch references")
+            fetched = await self.semantic_scholar.get_references_batch(missing)
+            # Remember papers without references so they are not re-requested
+            for key in missing:
+                references[key] = fetched.get(key, [])
+            self.save_references(references)
+
+        return references
+
+    def build_graph(
+        self,
+        papers: list[dict[str, Any]],
+        references: dict[str, list[dict[str, Any]]],
+    ) -> CitationGraph:
+        """Build the citation graph of the corpus and everything it cites.
+
+        Args:
+            papers: Corpus paper records
+            references: Map of paper ID to its references
+
+        Returns:
+            CitationGraph with corpus papers as the first nodes
+        """
+        index: dict[str, int] = {}
+        node_ids: list[str] = []
+        titles: list[str] = []
+
+        def add_node(key: str, title: str) -> int:
+            if key not in index:
+                index[key] = len(node_ids)
+                node_ids.append(key)
+                titles.append(title)
+            return index[key]
+
+        for paper in papers:
+            key = paper_key(paper)
+            if key:
+                add_node(key, paper.get("title", ""))
+        corpus_size = len(node_ids)
+
+        src: list[int] = []
+        dst: list[int] = []
+        for key in node_ids[:corpus_size]:
+            citing = index[key]
+            for ref in references.get(key, []):
+                cited = add_node(ref["paperId"], ref.get("title", ""))
+                if cited != citing:
+                    src.append(citing)
+                    dst.append(cited)
+
+        # Drop repeated references so degrees count distinct papers
+        num_nodes = max(len(node_ids), 1)
+        edges = np.unique(
+            np.array(src, dtype=np.int64) * num_nodes + np.array(dst, dtype=np.int64)
+        )
+
+        return CitationGraph(
+            node_ids=node_ids,
+            titles=titles,
+            corpus_size=corpus_size,
+            src=edges // num_nodes,
+            dst=edges % num_nodes,
+        )
+
+    def analyze(self, graph: CitationGraph, top_k: int = 20) -> dict[str, Any]:
+        """Compute co-citation, bibliographic coupling and missing candidates.
+
+        Args:
+            graph: Citation graph from build_graph
+            top_k: Number of pairs and candidates to return per list
+
+        Returns:
+            Dict with graph size, top co-cited pairs, top coupled pairs and
+            highly cited papers that are not in the corpus
+        """
+        n = graph.num_nodes
+        out_degree = np.bincount(graph.src, minlength=n)
+        in_degree = np.bincount(graph.dst, minlength=n)
+
+        coupling = cooccurrence(graph.dst, graph.src, n)
+        co_citation = cooccurrence(graph.src, graph.dst, n)
+
+        # Co-citation strength between each outside paper and the corpus
+        left, right, counts = co_citation
+        corpus_link = np.zeros(n, dtype=np.int64)
+        outside_left = (left >= graph.corpus_size) & (right < graph.corpus_size)
+        outside_right = (right >= graph.corpus_size) & (left < graph.corpus_size)
+        np.add.at(corpus_link, left[outside_left], counts[outside_left])
+        np.add.at(corpus_link, right[outside_right], counts[outside_right])
+
+        candidates = np.arange(graph.corpus_size, n)
+        order = np.lexsort((-corpus_link[candidates], -in_degree[candidates]))
+        missing = [
+            {
+                **graph.node(int(idx)),
+                "cited_by": int(in_degree[idx]),
+                "co_citation_strength": int(corpus_link[idx]),
+            }
+            for idx in candidates[order[:top_k]]
+        ]
+
+        return {
+            "corpus_papers": graph.corpus_size,
+            "nodes": n,
+            "edges": len(graph.src),
+            "co_citation": self._top_pairs(graph, co_citation, in_degree, top_k),
+            "bibliographic_coupling": self._top_pairs(graph, coupling, out_degree, top_k),
+            "missing_candidates": missing,
+        }
+
+    def _top_pairs(
+        self,
+        graph: CitationGraph,
+        pairs: tuple[np.ndarray, np.ndarray, np.ndarray],
+        degree: np.ndarray,
+        top_k: int,
+    ) -> list[dict[str, Any]]:
+        """Format the strongest pairs with raw and Salton-normalized strength."""
+        left, right, counts = pairs
+        if len(counts) == 0:
+            return []
+
+        top = np.argsort(-counts, kind="stable")[:top_k]
+        normalized = counts[top] / np.sqrt(degree[left[top]] * degree[right[top]])
+
+        return [
+            {
+                "a": graph.node(int(left[i])),
+                "b": graph.node(int(right[i])),
+                "strength": int(counts[i]),
+                "normalized": round(float(norm), 4),
+            }
+            for i, norm in zip(top, normalized)
+        ]
+
+    def rank_papers(
+        self,
+        papers: list[dict[str, Any]],
+        graph: CitationGraph,
+        method: Literal["pagerank", "hits"] = "pagerank",
+        damping: float = 0.85,
+    ) -> list[dict[str, Any]]:
+        """Write a centrality score into each corpus paper record.
+
+        Scores are computed on the whole graph (corpus plus references) and
+        scaled so the most central corpus paper scores 1.0.
+
+        Args:
+            papers: Corpus paper records, updated in place
+            graph: Citation graph built from the same papers
+            method: "pagerank" or "hits" (authority score)
+            damping: PageRank damping factor
+
+        Returns:
+            The updated paper records
+
+        Raises:
+            ValueError: If method is unknown
+        """
+        if method == "pagerank":
+            scores = pagerank(graph, damping=damping)
+        elif method == "hits":
+            _, scores = hits(graph)
+        else:
+            raise ValueError("Method must be 'pagerank' or 'hits'")
+
+        corpus_scores = scores[: graph.corpus_size]
+        top = corpus_scores.max() if len(corpus_scores) else 0.0
+        if top > 0:
+            corpus_scores = corpus_scores / top
+
+        position = {key: i for i, key in enumerate(graph.node_ids[: graph.corpus_size])}
+        for paper in papers:
+            idx = position.get(paper_key(paper))
+            if idx is not None:
+                paper["centrality"] = round(float(corpus_scores[idx]), 6)
+                paper["centrality_method"] = method
+
+        return papers
@@ -3,6 +3,10 @@
 from pathlib import Path
 from typing import Any
 
+from polyhedra.services.index_generations import IndexGenerations
+from polyhedra.services.sharded_index import ShardedIndex
+from polyhedra.services.vector_index import VectorIndex
+
 
 class ContextManager:
     """Manages file operations and project context."""
@@ -103,8 +107,8 @@ class ContextManager:
                 pass
 
         # Check for RAG index
-        rag_file = self.root / ".poly" / "embeddings" / "papers.pkl"
-        status["rag_indexed"] = rag_file.exists()
+        index_dir = IndexGenerations(self.root / ".poly" / "embeddings").current_dir()
+        status["rag_indexed"] = ShardedIndex(index_dir).exists() or VectorIndex(index_dir).exists()
 
         # Check standard files
         standard_files = [
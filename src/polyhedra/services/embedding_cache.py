@@ -0,0 +1,246 @@
+"""User-level cache of text embeddings shared across projects.
+
+Popular papers show up in many projects; their embeddings are computed
+once and looked up afterwards. Entries are keyed by sha256 of the model
+name and the embedded text, so a different model never returns a stale
+vector.
+
+The cache is a SQLite database in write-ahead-log mode. SQLite's file
+locking makes it safe for several server processes to read and write at
+the same time. The total size is capped; when an insert exceeds the cap,
+the least recently used entries are evicted.
+
+Query embeddings are additionally kept in a small in-memory LRU, since
+assistants repeat the same searches within a session.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+def default_cache_dir() -> Path:
+    """Cache directory: $POLYHEDRA_CACHE_DIR, else ~/.cache/polyhedra/embeddings."""
+    override = os.getenv("POLYHEDRA_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "polyhedra" / "embeddings"
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """sha256 of the model name and text (NUL-separated so pairs cannot collide)."""
+    return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Size-capped LRU store of float32 embeddings on disk."""
+
+    FILENAME = "cache.sqlite3"
+    DEFAULT_MAX_BYTES = 1 << 30
+
+    # Evict down to this share of the cap so eviction is not run on every insert
+    EVICT_TO = 0.9
+
+    # SQLite limits the number of bound parameters per statement
+    BATCH = 500
+
+    def __init__(self, directory: Path | None = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize cache handle; the database is opened on first use.
+
+        Args:
+            directory: Cache directory (default: default_cache_dir())
+            max_bytes: Total size of stored vectors before eviction
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database and create the table on first use."""
+        if self._connection is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.directory / self.FILENAME,
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key BLOB PRIMARY KEY, vector BLOB NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed)"
+            )
+            self._connection = connection
+        return self._connection
+
+    def get_many(self, model_name: str, texts: list[str]) -> dict[int, np.ndarray]:
+        """Look up cached embeddings and mark them as recently used.
+
+        Args:
+            model_name: Model the embeddings were computed with
+            texts: Embedded texts
+
+        Returns:
+            Mapping of position in texts to its embedding, for hits only
+        """
+        keys = [cache_key(model_name, text) for text in texts]
+        found: dict[bytes, np.ndarray] = {}
+        with self._lock:
+            connection = self._connect()
+            for start in range(0, len(keys), self.BATCH):
+                batch = keys[start : start + self.BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32)) for key, blob in rows)
+
+            if found:
+                now = time.time()
+                connection.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+
+        hits = {i: found[key] for i, key in enumerate(keys) if key in found}
+        self.hits += len(hits)
+        self.misses += len(keys) - len(hits)
+        return hits
+
+    def put_many(self, model_name: str, texts: list[str], vectors: np.ndarray) -> None:
+        """Store embeddings, then evict least recently used entries over the cap.
+
+        Args:
+            model_name: Model the embeddings were computed with
+            texts: Embedded texts
+            vectors: Embeddings of shape (len(texts), dim)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+        rows = [
+            (cache_key(model_name, text), vector.tobytes(), now)
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, accessed) VALUES (?, ?, ?)",
+                    rows,
+                )
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """Delete the oldest entries until the total size is under the cap."""
+        total = connection.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * self.EVICT_TO)
+        connection.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, LENGTH(vector) AS size,"
+            "   SUM(LENGTH(vector)) OVER (ORDER BY accessed, rowid) AS running"
+            "  FROM embeddings)"
+            " WHERE running - size < ?)",
+            (excess,),
+        )
+
+    def stats(self) -> dict[str, int]:
+        """Entry count, stored bytes, and this handle's hit and miss counts."""
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class QueryEmbeddingLRU:
+    """Bounded in-memory LRU of query embeddings.
+
+    Queries are keyed by their whitespace-normalized text, so repeats that
+    differ only in spacing are hits too.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """Initialize cache.
+
+        Args:
+            capacity: Maximum number of queries kept
+        """
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Collapse runs of whitespace and strip the ends."""
+        return " ".join(text.split())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str) -> np.ndarray | None:
+        """Cached embedding of a query, marking it as recently used."""
+        key = self.normalize(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """Store a query embedding, evicting the least recently used one if full."""
+        if self.capacity <= 0:
+            return
+        key = self.normalize(text)
+        with self._lock:
+            self._entries[key] = np.asarray(vector, dtype=np.float32)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        """Size, capacity, hit and miss counts, and hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
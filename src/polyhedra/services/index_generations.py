@@ -0,0 +1,149 @@
+"""Numbered index generations published through a CURRENT pointer.
+
+Rebuilding or updating an index in place lets a query in another client
+or server process read files that are half written or just deleted.
+Instead, every change is made in a new directory gen-NNNNNN that no
+reader looks at, and then published by atomically replacing the CURRENT
+file with its name. Readers keep serving the generation they opened and
+switch when they see CURRENT change, so rebuilds never cause downtime.
+
+Updates start from a copy of the current generation made of hard links
+(a real copy where links are not supported). That is cheap because the
+index files are never modified once written: segments, tombstones and
+derived indexes are always replaced through new files.
+
+Published generations older than the last KEEP are deleted when a new
+one is published. A project that still has the older flat layout (index
+files directly in the root) is read as is until its first update.
+"""
+
+import os
+import re
+import shutil
+from collections.abc import Iterable
+from pathlib import Path
+
+CURRENT = "CURRENT"
+PREFIX = "gen-"
+
+_GENERATION = re.compile(r"gen-(\d{6})")
+
+
+class IndexGenerations:
+    """Generations of the index in one directory."""
+
+    # Older generations stay readable for processes that have not switched
+    KEEP = 2
+
+    def __init__(self, root: Path, exclude: Iterable[str] = ()):
+        """Initialize.
+
+        Args:
+            root: Directory holding CURRENT and the generations
+            exclude: Names in root that are not part of the index (caches,
+                other indexes); never copied or deleted
+        """
+        self.root = root
+        self.exclude = {CURRENT, *exclude}
+
+    def current(self) -> str | None:
+        """Name of the published generation, or None for the flat layout."""
+        try:
+            name = (self.root / CURRENT).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return name if _GENERATION.fullmatch(name) else None
+
+    def current_dir(self) -> Path:
+        """Directory of the published generation (root for the flat layout)."""
+        name = self.current()
+        return self.root / name if name else self.root
+
+    def numbers(self) -> list[int]:
+        """Numbers of the generation directories on disk, ascending."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            int(match.group(1))
+            for path in self.root.iterdir()
+            if (match := _GENERATION.fullmatch(path.name)) and path.is_dir()
+        )
+
+    def stage(self, inherit: bool = True) -> Path:
+        """Create the next generation directory.
+
+        Args:
+            inherit: Start from the files of the current generation
+
+        Returns:
+            The new directory; it is not read until published
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        number = max(self.numbers(), default=0) + 1
+        while True:
+            staged = self.root / f"{PREFIX}{number:06d}"
+            try:
+                staged.mkdir()
+                break
+            except FileExistsError:
+                number += 1
+
+        if inherit:
+            source = self.current_dir()
+            for path in source.iterdir():
+                if path.name in self.exclude or path.name.startswith("."):
+                    continue
+                if source == self.root and _GENERATION.fullmatch(path.name):
+                    continue
+                _link(path, staged / path.name)
+        return staged
+
+    def publish(self, staged: Path) -> None:
+        """Point CURRENT at a staged generation and prune old ones."""
+        tmp = self.root / f".{CURRENT}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{staged.name}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.root / CURRENT)
+        self.prune()
+
+    def discard(self, staged: Path) -> None:
+        """Delete a generation that was not published."""
+        shutil.rmtree(staged, ignore_errors=True)
+
+    def prune(self) -> None:
+        """Delete generations before the last KEEP, and the flat layout.
+
+        Unpublished directories numbered above the current generation may
+        belong to a build in progress and are kept.
+        """
+        name = self.current()
+        if name is None:
+            return
+        current = int(name[len(PREFIX) :])
+        older = [number for number in self.numbers() if number <= current]
+        for number in older[: -self.KEEP]:
+            shutil.rmtree(self.root / f"{PREFIX}{number:06d}", ignore_errors=True)
+
+        if len(older) >= self.KEEP:
+            for path in self.root.iterdir():
+                if path.name in self.exclude or _GENERATION.fullmatch(path.name):
+                    continue
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                elif not path.name.startswith(f".{CURRENT}"):
+                    path.unlink(missing_ok=True)
+
+
+def _link(source: Path, target: Path) -> None:
+    """Hard-link a file or directory tree, copying where links fail."""
+    if source.is_dir():
+        target.mkdir()
+        for path in source.iterdir():
+            _link(path, target / path.name)
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
@@ -0,0 +1,256 @@
+"""Precomputed nearest-neighbor graph for related-paper lookups.
+
+Finding the papers most similar to an indexed paper needs no encoding:
+its own vector is the query. Scanning the index for every lookup still
+costs O(N), so the DEGREE nearest neighbors of every row are computed
+once, by scoring blocks of rows against the whole index with matrix
+products, and stored in <index dir>/knn/:
+
+- neighbors.npy: int32 (total_rows, degree) neighbor rows, best first,
+  -1 where a row has fewer neighbors
+- scores.npy: float16 cosine similarities of those neighbors
+- key_hashes.npy / key_rows.npy: 64-bit key hashes of the live rows,
+  sorted, and their rows, for finding a paper's row by binary search
+
+A lookup reads one row of each array, so it costs O(k).
+
+When rows are only appended (a vector index that gained segments), the
+graph is updated instead of rebuilt: new rows get their neighbors by a
+scan, existing rows merge the new rows into their lists with one matrix
+product per block, and rows that lost a neighbor to a tombstone are
+scanned again. Any other change, such as compaction renumbering the
+rows, rebuilds the graph.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from polyhedra.services.vector_index import VectorIndex, key_hash, top_k
+
+KNN_DIR = "knn"
+KNN_FORMAT = "polyhedra-knn"
+KNN_VERSION = 1
+
+DEFAULT_DEGREE = 32
+
+# Rows scored against the index per matrix product while building
+QUERY_BLOCK = 256
+
+# Similarities held at once while merging new rows into existing lists
+MERGE_CELLS = 1 << 24
+
+
+class KNNGraph:
+    """Nearest neighbors of the live rows of a vector index."""
+
+    MANIFEST = "knn.json"
+
+    def __init__(self, directory: Path):
+        """Initialize graph handle.
+
+        Args:
+            directory: Vector index directory the graph is stored in
+        """
+        self.directory = directory
+        self.path = directory / KNN_DIR
+        self.manifest: dict[str, Any] = {}
+
+    def exists(self) -> bool:
+        """Check whether a graph of the current format is present."""
+        path = self.path / self.MANIFEST
+        if not path.exists():
+            return False
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        return manifest.get("format") == KNN_FORMAT and manifest.get("version") == KNN_VERSION
+
+    def open(self) -> "KNNGraph":
+        """Memory-map the graph arrays.
+
+        Returns:
+            self, for chaining
+        """
+        self.manifest = json.loads((self.path / self.MANIFEST).read_text(encoding="utf-8"))
+        for name in ("neighbors", "scores", "key_hashes", "key_rows"):
+            setattr(self, name, np.load(self.path / f"{name}.npy", mmap_mode="r"))
+        return self
+
+    @property
+    def degree(self) -> int:
+        """Neighbors stored per row."""
+        return int(self.manifest.get("degree", DEFAULT_DEGREE))
+
+    def covers(self, index: Any) -> bool:
+        """Whether the graph still matches the index's rows."""
+        return bool(self.manifest) and (
+            self.manifest["total_rows"] == index.total_rows and self.manifest["count"] == len(index)
+        )
+
+    def extends(self, index: Any) -> bool:
+        """Whether index only appended segments since the graph was built."""
+        segments = self.manifest.get("segments")
+        if not isinstance(index, VectorIndex) or segments is None:
+            return False
+        names = [segment.name for segment in index.segments]
+        return names[: len(segments)] == segments
+
+    def build(self, index: Any, degree: int = DEFAULT_DEGREE) -> dict[str, Any]:
+        """Find the neighbors of every live row and save.
+
+        Args:
+            index: Open VectorIndex or ShardedIndex
+            degree: Neighbors stored per row
+
+        Returns:
+            Dict with rows, degree and the rows scanned
+
+        Raises:
+            ValueError: If degree is below 1
+        """
+        if degree < 1:
+            raise ValueError("Graph degree must be at least 1")
+        total = index.total_rows
+        neighbors = np.full((total, degree), -1, dtype=np.int32)
+        scores = np.full((total, degree), -np.inf, dtype=np.float32)
+        rows = index.live_rows()
+        _scan(index, rows, neighbors, scores)
+        self._save(index, neighbors, scores, degree)
+        return {"rows": len(rows), "degree": degree, "scanned": len(rows)}
+
+    def update(self, index: Any, degree: int | None = None) -> dict[str, Any]:
+        """Bring an open graph in line with index, incrementally where possible.
+
+        Args:
+            index: Open VectorIndex or ShardedIndex
+            degree: Neighbors stored per row (default: the graph's); a new
+                degree rebuilds the graph
+
+        Returns:
+            Dict in the format of build
+        """
+        degree = degree or self.degree
+        old_total = int(self.manifest.get("total_rows", 0))
+        live = np.zeros(index.total_rows, dtype=bool)
+        live[index.live_rows()] = True
+        new = np.flatnonzero(live[old_total:]) + old_total
+
+        # Once most rows are new, a rebuild costs about as much
+        if (
+            not self.manifest
+            or degree != self.degree
+            or not self.extends(index)
+            or len(new) > len(index) // 2
+        ):
+            return self.build(index, degree)
+
+        added = index.total_rows - old_total
+        neighbors = np.concatenate(
+            [self.neighbors, np.full((added, degree), -1, dtype=np.int32)]
+        )
+        scores = np.concatenate(
+            [self.scores.astype(np.float32), np.full((added, degree), -np.inf, np.float32)]
+        )
+        neighbors[~live] = -1
+        scores[~live] = -np.inf
+
+        # Rows that lost a neighbor to a tombstone are scanned again
+        old = np.flatnonzero(live[:old_total])
+        listed = neighbors[old]
+        lost = ((listed >= 0) & ~live[np.maximum(listed, 0)]).any(axis=1)
+        _scan(index, np.concatenate([old[lost], new]), neighbors, scores)
+
+        # The others only need the new rows merged into their lists
+        keep = old[~lost]
+        if len(new) and len(keep):
+            new_vectors = index.get_vectors(new)
+            step = max(1, MERGE_CELLS // len(new))
+            for start in range(0, len(keep), step):
+                block = keep[start : start + step]
+                similarities = index.get_vectors(block) @ new_vectors.T
+                best = top_k(similarities, degree)
+                rows = np.concatenate([neighbors[block], new[best]], axis=1)
+                merged = np.concatenate(
+                    [scores[block], np.take_along_axis(similarities, best, axis=1)], axis=1
+                )
+                order = top_k(merged, degree)
+                neighbors[block] = np.take_along_axis(rows, order, axis=1)
+                scores[block] = np.take_along_axis(merged, order, axis=1)
+
+        self._save(index, neighbors, scores, degree)
+        return {"rows": len(index), "degree": degree, "scanned": int(lost.sum()) + len(new)}
+
+    def row(self, key: str) -> int | None:
+        """Row of a live paper key, or None if it is not indexed."""
+        target = np.uint64(key_hash(key))
+        position = int(np.searchsorted(self.key_hashes, target))
+        if position < len(self.key_hashes) and self.key_hashes[position] == target:
+            return int(self.key_rows[position])
+        return None
+
+    def neighbors_of(self, row: int, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Up to k nearest rows of row and their cosine similarities, best first."""
+        rows = np.asarray(self.neighbors[row, :k], dtype=np.int64)
+        scores = np.asarray(self.scores[row, :k], dtype=np.float32)
+        found = rows >= 0
+        return rows[found], scores[found]
+
+    def remove(self) -> None:
+        """Delete the graph files."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _save(self, index: Any, neighbors: np.ndarray, scores: np.ndarray, degree: int) -> None:
+        """Write the arrays and key table to a temporary directory and swap it in."""
+        entries = index.entries()
+        hashes = np.array([key_hash(key) for key in entries], dtype=np.uint64)
+        key_rows = np.array([row for row, _, _ in entries.values()], dtype=np.int32)
+        order = np.argsort(hashes, kind="stable")
+
+        tmp = self.directory / f".{KNN_DIR}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "neighbors.npy", neighbors.astype(np.int32))
+        np.save(tmp / "scores.npy", scores.astype(np.float16))
+        np.save(tmp / "key_hashes.npy", hashes[order])
+        np.save(tmp / "key_rows.npy", key_rows[order])
+        manifest = {
+            "format": KNN_FORMAT,
+            "version": KNN_VERSION,
+            "degree": degree,
+            "total_rows": index.total_rows,
+            "count": len(index),
+            "segments": (
+                [segment.name for segment in index.segments]
+                if isinstance(index, VectorIndex)
+                else None
+            ),
+        }
+        (tmp / self.MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        self.remove()
+        os.replace(tmp, self.path)
+        self.open()
+
+
+def _scan(index: Any, rows: np.ndarray, neighbors: np.ndarray, scores: np.ndarray) -> None:
+    """Fill the lists of rows by searching the index with their own vectors."""
+    degree = neighbors.shape[1]
+    for start in range(0, len(rows), QUERY_BLOCK):
+        block = rows[start : start + QUERY_BLOCK]
+        found, similarities = index.search_many(index.get_vectors(block), degree + 1)
+        similarities = np.where(found == block[:, None], -np.inf, similarities)
+        best = top_k(similarities, degree)
+        width = best.shape[1]
+        best_scores = np.take_along_axis(similarities, best, axis=1)
+        neighbors[block] = -1
+        scores[block] = -np.inf
+        neighbors[block, :width] = np.where(
+            np.isfinite(best_scores), np.take_along_axis(found, best, axis=1), -1
+        )
+        scores[block, :width] = best_scores
@@ -0,0 +1,247 @@
+"""BM25 inverted index over paper titles and abstracts.
+
+Dense embeddings blur exact terms such as method names and dataset
+acronyms; the lexical index finds them. It is stored next to the vectors
+in <index dir>/bm25/ and uses the vector index's global row numbers, so
+lexical and dense rankings can be fused row by row.
+
+Postings are kept as flat arrays sorted by term: offsets[t]:offsets[t + 1]
+slices the rows (int32) and term frequencies (uint16) of term t. A query
+touches only the postings of its own terms.
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from polyhedra.services.vector_index import top_k
+
+BM25_DIR = "bm25"
+BM25_FORMAT = "polyhedra-bm25"
+BM25_VERSION = 1
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was "
+    "we were which with".split()
+)
+
+# Rows whose metadata is read per batch while building
+BUILD_BATCH = 4096
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens, without common English stopwords."""
+    return [token for token in TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over the live rows of a vector index."""
+
+    MANIFEST = "bm25.json"
+
+    def __init__(self, directory: Path, k1: float = 1.2, b: float = 0.75):
+        """Initialize index handle.
+
+        Args:
+            directory: Vector index directory the lexical index is stored in
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.directory = directory
+        self.path = directory / BM25_DIR
+        self.k1 = k1
+        self.b = b
+        self.manifest: dict[str, Any] = {}
+        self.terms: dict[str, int] = {}
+
+    def exists(self) -> bool:
+        """Check whether a lexical index of the current format is present."""
+        path = self.path / self.MANIFEST
+        if not path.exists():
+            return False
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        return manifest.get("format") == BM25_FORMAT and manifest.get("version") == BM25_VERSION
+
+    def open(self) -> "BM25Index":
+        """Load the vocabulary and memory-map the postings.
+
+        Returns:
+            self, for chaining
+        """
+        self.manifest = json.loads((self.path / self.MANIFEST).read_text(encoding="utf-8"))
+        self.k1 = self.manifest["k1"]
+        self.b = self.manifest["b"]
+        terms = json.loads((self.path / "terms.json").read_text(encoding="utf-8"))
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = np.load(self.path / "offsets.npy", mmap_mode="r")
+        self.rows = np.load(self.path / "rows.npy", mmap_mode="r")
+        self.tf = np.load(self.path / "tf.npy", mmap_mode="r")
+        self.doc_len = np.load(self.path / "doc_len.npy", mmap_mode="r")
+        return self
+
+    def covers(self, index: Any) -> bool:
+        """Whether the postings still use the index's row numbering."""
+        return bool(self.manifest) and (
+            self.manifest["total_rows"] == index.total_rows and self.manifest["count"] == len(index)
+        )
+
+    def build(self, index: Any) -> dict[str, Any]:
+        """Tokenize the title and abstract of every live row and save.
+
+        The new postings are written to a temporary directory that then
+        replaces the old one.
+
+        Args:
+            index: Open VectorIndex or ShardedIndex
+
+        Returns:
+            Dict with docs and terms counts
+        """
+        terms: dict[str, int] = {}
+        term_ids: list[int] = []
+        rows: list[int] = []
+        freqs: list[int] = []
+        doc_len = np.zeros(index.total_rows, dtype=np.int32)
+
+        live = index.live_rows()
+        for start in range(0, len(live), BUILD_BATCH):
+            batch = live[start : start + BUILD_BATCH].tolist()
+            for row, record in zip(batch, index.metadata(batch)):
+                tokens = tokenize(f"{record.get('title', '')} {record.get('abstract', '')}")
+                doc_len[row] = len(tokens)
+                for token, count in Counter(tokens).items():
+                    term_ids.append(terms.setdefault(token, len(terms)))
+                    rows.append(row)
+                    freqs.append(count)
+
+        term_array = np.asarray(term_ids, dtype=np.int32)
+        order = np.lexsort((np.asarray(rows, dtype=np.int32), term_array))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_array, minlength=len(terms)), out=offsets[1:])
+
+        tmp = self.directory / f".{BM25_DIR}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "offsets.npy", offsets)
+        np.save(tmp / "rows.npy", np.asarray(rows, dtype=np.int32)[order])
+        np.save(tmp / "tf.npy", np.minimum(np.asarray(freqs), 65535).astype(np.uint16)[order])
+        np.save(tmp / "doc_len.npy", doc_len)
+        (tmp / "terms.json").write_text(json.dumps(list(terms), ensure_ascii=False), encoding="utf-8")
+        manifest = {
+            "format": BM25_FORMAT,
+            "version": BM25_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "docs": len(live),
+            "avgdl": float(doc_len.sum()) / max(len(live), 1),
+            "total_rows": index.total_rows,
+            "count": len(index),
+        }
+        (tmp / self.MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        self.remove()
+        os.replace(tmp, self.path)
+        self.open()
+        return {"docs": len(live), "terms": len(terms)}
+
+    def _postings(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """Rows matching any query term and their per-term BM25 weights."""
+        docs = self.manifest["docs"]
+        avgdl = self.manifest["avgdl"] or 1.0
+        rows, weights = [np.zeros(0, dtype=np.int32)], [np.zeros(0, dtype=np.float32)]
+        for token in dict.fromkeys(tokenize(text)):
+            term = self.terms.get(token)
+            if term is None:
+                continue
+            start, end = int(self.offsets[term]), int(self.offsets[term + 1])
+            term_rows = np.asarray(self.rows[start:end])
+            tf = np.asarray(self.tf[start:end], dtype=np.float32)
+            idf = math.log(1 + (docs - (end - start) + 0.5) / (end - start + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[term_rows] / avgdl)
+            rows.append(term_rows)
+            weights.append((idf * tf * (self.k1 + 1) / (tf + norm)).astype(np.float32))
+        return np.concatenate(rows), np.concatenate(weights)
+
+    def matches(self, text: str) -> np.ndarray:
+        """Sorted rows containing at least one query term."""
+        return np.unique(self._postings(text)[0])
+
+    def search_many(
+        self, texts: list[str], k: int, mask: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Rank rows by BM25 for each query.
+
+        Args:
+            texts: Query strings
+            k: Number of rows to return per query
+            mask: Boolean mask of the rows that may be returned
+
+        Returns:
+            Global rows and BM25 scores of shape (q, k), best first; rows
+            without any query term are padded with -inf scores
+        """
+        k = min(k, self.manifest.get("docs", 0))
+        out_rows = np.zeros((len(texts), k), dtype=np.int64)
+        out_scores = np.full((len(texts), k), -np.inf, dtype=np.float32)
+        for i, text in enumerate(texts):
+            rows, weights = self._postings(text)
+            if mask is not None:
+                allowed = mask[rows]
+                rows, weights = rows[allowed], weights[allowed]
+            matched, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights, minlength=len(matched))
+            best = top_k(scores, k)
+            out_rows[i, : len(best)] = matched[best]
+            out_scores[i, : len(best)] = scores[best]
+        return out_rows, out_scores
+
+    def remove(self) -> None:
+        """Delete the lexical index."""
+        self.manifest = {}
+        self.terms = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def reciprocal_rank_fusion(
+    rankings: list[tuple[np.ndarray, np.ndarray]], k: int, constant: int = 60
+) -> tuple[np.ndarray, np.ndarray]:
+    """Fuse several rankings of the same rows by reciprocal rank.
+
+    Each row scores sum(1 / (constant + rank)) over the rankings it appears
+    in, so rows ranked well by both retrievers rise to the top whatever the
+    scale of the original scores.
+
+    Args:
+        rankings: (rows, scores) pairs of shape (q, n), best first; -inf
+            scores mark padding
+        k: Number of rows to return per query
+        constant: Damping of the top ranks (60 in the original paper)
+
+    Returns:
+        Rows and fused scores of shape (q, k), best first; -inf pads
+    """
+    queries = len(rankings[0][0])
+    out_rows = np.zeros((queries, k), dtype=np.int64)
+    out_scores = np.full((queries, k), -np.inf, dtype=np.float32)
+    for i in range(queries):
+        fused: dict[int, float] = {}
+        for rows, scores in rankings:
+            ranked = rows[i][np.isfinite(scores[i])].tolist()
+            for rank, row in enumerate(ranked, 1):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (constant + rank)
+        best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        for j, (row, score) in enumerate(best):
+            out_rows[i, j] = row
+            out_scores[i, j] = score
+    return out_rows, out_scores
@@ -67,6 +67,30 @@ class LiteratureReviewService:
         
         return json.dumps(summaries, indent=2)
     
+    def select_papers(
+        self,
+        papers: list[dict],
+        max_papers: Optional[int] = None
+    ) -> list[dict]:
+        """
+        Order papers by influence and keep the most influential ones.
+        
+        Uses the citation-graph centrality written by the rank_papers tool
+        when present and falls back to raw citationCount otherwise.
+        
+        Args:
+            papers: List of paper dictionaries
+            max_papers: Optional maximum number of papers to keep
+            
+        Returns:
+            Papers sorted by influence, descending
+        """
+        has_centrality = any("centrality" in paper for paper in papers)
+        field = "centrality" if has_centrality else "citationCount"
+        
+        ranked = sorted(papers, key=lambda paper: paper.get(field) or 0, reverse=True)
+        return ranked[:max_papers] if max_papers else ranked
+    
     def _format_authors(self, authors: list) -> str:
         """Format author list for citation."""
         if not authors:
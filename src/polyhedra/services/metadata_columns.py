@@ -0,0 +1,211 @@
+"""Columnar paper metadata for filtering searches.
+
+Year, venue, citation count and authors of every row are stored as NumPy
+arrays in <index dir>/columns/, indexed by the vector index's global row
+numbers. A filter turns into a boolean row mask with a few vectorized
+comparisons, so searches can score only the matching rows instead of
+reading metadata JSON or filtering after ranking.
+
+Venues and authors are dictionary-encoded: venue.npy holds one venue ID
+per row and authors are kept in CSR form (author_offsets.npy slices
+author_ids.npy per row, author_rows.npy gives the row of each entry).
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+COLUMNS_DIR = "columns"
+COLUMNS_FORMAT = "polyhedra-columns"
+COLUMNS_VERSION = 1
+
+FILTER_KEYS = ("year_min", "year_max", "venues", "min_citations", "authors")
+
+# Rows whose metadata is read per batch while building
+BUILD_BATCH = 4096
+
+
+def parse_year(value: Any) -> int:
+    """Year as an int, 0 when missing or unparseable."""
+    year = str(value or "")[:4]
+    return int(year) if year.isdigit() else 0
+
+
+def author_keys(authors: Any) -> list[str]:
+    """Keys of a paper's authors: Semantic Scholar IDs, else names.
+
+    Authors may be dicts with authorId and name, or plain name strings.
+    Keys are case-folded so filters match regardless of case.
+    """
+    keys = []
+    for author in authors or []:
+        if isinstance(author, dict):
+            key = author.get("authorId") or author.get("name")
+        else:
+            key = author
+        if key:
+            keys.append(str(key).strip().casefold())
+    return keys
+
+
+class MetadataColumns:
+    """Column arrays of the live rows of a vector index."""
+
+    MANIFEST = "columns.json"
+
+    def __init__(self, directory: Path):
+        """Initialize column store handle.
+
+        Args:
+            directory: Vector index directory the columns are stored in
+        """
+        self.directory = directory
+        self.path = directory / COLUMNS_DIR
+        self.manifest: dict[str, Any] = {}
+        self.venues: dict[str, int] = {}
+        self.authors: dict[str, int] = {}
+
+    def exists(self) -> bool:
+        """Check whether columns of the current format are present."""
+        path = self.path / self.MANIFEST
+        if not path.exists():
+            return False
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        return (
+            manifest.get("format") == COLUMNS_FORMAT
+            and manifest.get("version") == COLUMNS_VERSION
+        )
+
+    def open(self) -> "MetadataColumns":
+        """Load the dictionaries and memory-map the columns.
+
+        Returns:
+            self, for chaining
+        """
+        self.manifest = json.loads((self.path / self.MANIFEST).read_text(encoding="utf-8"))
+        venues = json.loads((self.path / "venues.json").read_text(encoding="utf-8"))
+        authors = json.loads((self.path / "authors.json").read_text(encoding="utf-8"))
+        self.venues = {venue: i for i, venue in enumerate(venues)}
+        self.authors = {author: i for i, author in enumerate(authors)}
+        for name in ("live", "year", "venue", "citations", "author_ids", "author_rows"):
+            setattr(self, name, np.load(self.path / f"{name}.npy", mmap_mode="r"))
+        return self
+
+    def covers(self, index: Any) -> bool:
+        """Whether the columns still use the index's row numbering."""
+        return bool(self.manifest) and (
+            self.manifest["total_rows"] == index.total_rows and self.manifest["count"] == len(index)
+        )
+
+    def build(self, index: Any) -> dict[str, Any]:
+        """Read the metadata of every live row into columns and save.
+
+        Args:
+            index: Open VectorIndex or ShardedIndex
+
+        Returns:
+            Dict with rows, venues and authors counts
+        """
+        total = index.total_rows
+        live = np.zeros(total, dtype=bool)
+        year = np.zeros(total, dtype=np.int16)
+        venue = np.full(total, -1, dtype=np.int32)
+        citations = np.zeros(total, dtype=np.int32)
+        venues: dict[str, int] = {}
+        authors: dict[str, int] = {}
+        author_ids: list[int] = []
+        author_rows: list[int] = []
+
+        rows = index.live_rows()
+        live[rows] = True
+        for start in range(0, len(rows), BUILD_BATCH):
+            batch = rows[start : start + BUILD_BATCH].tolist()
+            for row, record in zip(batch, index.metadata(batch)):
+                year[row] = parse_year(record.get("year"))
+                name = str(record.get("venue") or "").strip().casefold()
+                if name:
+                    venue[row] = venues.setdefault(name, len(venues))
+                citations[row] = int(record.get("citationCount") or 0)
+                for key in dict.fromkeys(author_keys(record.get("authors"))):
+                    author_ids.append(authors.setdefault(key, len(authors)))
+                    author_rows.append(row)
+
+        tmp = self.directory / f".{COLUMNS_DIR}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "live.npy", live)
+        np.save(tmp / "year.npy", year)
+        np.save(tmp / "venue.npy", venue)
+        np.save(tmp / "citations.npy", citations)
+        np.save(tmp / "author_ids.npy", np.asarray(author_ids, dtype=np.int32))
+        np.save(tmp / "author_rows.npy", np.asarray(author_rows, dtype=np.int32))
+        (tmp / "venues.json").write_text(json.dumps(list(venues), ensure_ascii=False), encoding="utf-8")
+        (tmp / "authors.json").write_text(json.dumps(list(authors), ensure_ascii=False), encoding="utf-8")
+        manifest = {
+            "format": COLUMNS_FORMAT,
+            "version": COLUMNS_VERSION,
+            "total_rows": total,
+            "count": len(index),
+        }
+        (tmp / self.MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        self.remove()
+        os.replace(tmp, self.path)
+        self.open()
+        return {"rows": len(rows), "venues": len(venues), "authors": len(authors)}
+
+    def mask(self, filters: dict[str, Any]) -> np.ndarray:
+        """Boolean mask of the live rows matching every filter.
+
+        Args:
+            filters: Any of year_min and year_max (inclusive), venues (names,
+                matching any), min_citations, and authors (Semantic Scholar
+                IDs or names, matching any)
+
+        Returns:
+            Mask of shape (total_rows,)
+
+        Raises:
+            ValueError: If a filter is unknown
+        """
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(
+                f"Unknown filters: {', '.join(sorted(unknown))}. Use: {', '.join(FILTER_KEYS)}"
+            )
+
+        mask = np.array(self.live)
+        if filters.get("year_min") is not None:
+            mask &= self.year >= int(filters["year_min"])
+        if filters.get("year_max") is not None:
+            mask &= (self.year <= int(filters["year_max"])) & (self.year > 0)
+        if filters.get("min_citations") is not None:
+            mask &= self.citations >= int(filters["min_citations"])
+        if filters.get("venues") is not None:
+            ids = [self.venues[v] for v in _folded(filters["venues"]) if v in self.venues]
+            mask &= np.isin(self.venue, ids)
+        if filters.get("authors") is not None:
+            ids = [self.authors[a] for a in _folded(filters["authors"]) if a in self.authors]
+            matched = np.zeros(len(mask), dtype=bool)
+            matched[self.author_rows[np.isin(self.author_ids, ids)]] = True
+            mask &= matched
+        return mask
+
+    def remove(self) -> None:
+        """Delete the columns."""
+        self.manifest = {}
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _folded(values: Any) -> list[str]:
+    """Case-folded strings of a filter value given as a string or a list."""
+    if isinstance(values, str):
+        values = [values]
+    return [str(value).strip().casefold() for value in values]
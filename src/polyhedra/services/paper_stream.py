@@ -0,0 +1,119 @@
+"""Incremental reading of paper collections from JSON or JSONL files.
+
+Multi-GB corpora do not fit in memory as one parsed list. These helpers
+yield one paper at a time from either a JSON array (the papers.json
+format) or JSON Lines (one paper object per line), reading the file in
+fixed-size blocks.
+"""
+
+import json
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any, TextIO, TypeVar
+
+T = TypeVar("T")
+
+READ_BLOCK = 1 << 20
+
+
+def iter_papers(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield the paper objects of a JSON array or JSONL file.
+
+    The format is detected from the first non-blank character: '[' starts
+    a JSON array, anything else is read as JSON Lines.
+
+    Args:
+        path: Papers file
+
+    Yields:
+        Paper dicts in file order
+
+    Raises:
+        ValueError: If the file is not valid JSON or JSONL
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+
+        if first == "[":
+            yield from _iter_json_array(f)
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON on line {number} of {path}: {e}") from e
+
+
+def _iter_json_array(f: TextIO) -> Iterator[Any]:
+    """Decode the items of a top-level JSON array one at a time.
+
+    Only the current block and any item spanning its end are held in
+    memory; the buffer is trimmed only when more input is read.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    expect_item = True
+    exhausted = False
+
+    def refill() -> bool:
+        nonlocal buffer, position, exhausted
+        more = "" if exhausted else f.read(READ_BLOCK)
+        exhausted = not more
+        buffer, position = buffer[position:] + more, 0
+        return bool(more)
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+        if position == len(buffer):
+            if not refill():
+                raise ValueError("Unexpected end of JSON array")
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            if expect_item:
+                raise ValueError("Unexpected ',' in JSON array")
+            position += 1
+            expect_item = True
+            continue
+        if not expect_item:
+            raise ValueError("Missing ',' in JSON array")
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Most likely an item cut off at the end of the block
+            if not refill():
+                raise ValueError("Invalid JSON array") from None
+            continue
+        if end == len(buffer) and not exhausted:
+            # A number may continue in the next block; decode it again
+            refill()
+            continue
+        yield item
+        position = end
+        expect_item = False
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Group items into lists of size (the last one may be shorter)."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,233 @@
+"""Chunked, multi-process embedding for large index builds.
+
+One model.encode call over 100k texts runs in one process and pads every
+batch to its longest member. ChunkedEncoder instead:
+
+- sorts texts by length, so each batch holds texts of similar length
+  and little compute is spent on padding
+- cuts the sorted texts into chunks and encodes them across a process
+  pool, each worker with a fixed number of torch threads so the workers
+  do not oversubscribe the cores
+- saves every finished chunk to a checkpoint directory, so an
+  interrupted build resumes at the first missing chunk
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], None]
+
+# Model loaded once per worker process by _init_worker
+_worker_model: Any = None
+
+
+def load_sentence_transformer(model_name: str) -> Any:
+    """Load a sentence-transformers model (the default loader)."""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+def _init_worker(loader: Callable[[str], Any], model_name: str, threads: int) -> None:
+    """Pin the worker's thread count, then load its model.
+
+    Torch is only configured if the loader imported it: ONNX workers must
+    not pay for importing PyTorch.
+    """
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+    global _worker_model
+    _worker_model = loader(model_name)
+
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def _encode_with(model: Any, texts: list[str], batch_size: int) -> np.ndarray:
+    """Encode texts as a float32 matrix."""
+    embeddings = model.encode(
+        texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _encode_chunk(texts: list[str], batch_size: int) -> np.ndarray:
+    """Encode one chunk with the worker's model."""
+    return _encode_with(_worker_model, texts, batch_size)
+
+
+class ChunkedEncoder:
+    """Encode many texts in length-sorted chunks across worker processes."""
+
+    MANIFEST = "chunks.json"
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int | None = None,
+        chunk_size: int = 1024,
+        batch_size: int = 32,
+        threads_per_worker: int | None = None,
+        checkpoint_dir: Path | None = None,
+        progress: ProgressCallback | None = None,
+        loader: Callable[[str], Any] = load_sentence_transformer,
+        model: Any = None,
+        identity: str | None = None,
+    ):
+        """Initialize encoder.
+
+        Args:
+            model_name: Name of the sentence-transformers model
+            workers: Worker processes (default: CPU count); 1 encodes in
+                this process
+            chunk_size: Texts per chunk; the unit of work and of resuming
+            batch_size: Texts per forward pass within a chunk
+            threads_per_worker: Torch threads per worker (default: CPU
+                count divided by workers)
+            checkpoint_dir: Where finished chunks are saved; None disables
+                resuming
+            progress: Called with (texts done, total texts) after each chunk
+            loader: Builds a model from its name; must be picklable
+            model: Already loaded model used when encoding in this process
+            identity: What the checkpoint is keyed by (default: model_name);
+                must change with anything that changes the embeddings, such
+                as the runtime the loader uses
+        """
+        cpus = os.cpu_count() or 1
+        self.model_name = model_name
+        self.workers = max(1, workers or cpus)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.threads_per_worker = threads_per_worker or max(1, cpus // self.workers)
+        self.checkpoint_dir = checkpoint_dir
+        self.progress = progress
+        self.loader = loader
+        self.model = model
+        self.identity = identity or model_name
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Embed texts, reusing chunks saved by an interrupted run.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 matrix of shape (len(texts), dim), in the order of texts
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Longest first: long chunks start early and short ones fill the tail
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        chunks = [order[start : start + self.chunk_size]
+                  for start in range(0, len(texts), self.chunk_size)]
+
+        results = self._load_checkpoint(texts, len(chunks))
+        done = sum(len(chunks[i]) for i in results)
+        if results:
+            logger.info(f"Resuming embedding: {len(results)}/{len(chunks)} chunks done")
+        self._report(done, len(texts))
+
+        pending = [i for i in range(len(chunks)) if i not in results]
+        for i, vectors in self._run(texts, chunks, pending):
+            results[i] = vectors
+            self._save_chunk(i, vectors)
+            done += len(chunks[i])
+            self._report(done, len(texts))
+
+        dim = next(iter(results.values())).shape[1]
+        embeddings = np.empty((len(texts), dim), dtype=np.float32)
+        for i, chunk in enumerate(chunks):
+            embeddings[chunk] = results[i]
+
+        if self.checkpoint_dir is not None:
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        return embeddings
+
+    def _run(self, texts: list[str], chunks: list[np.ndarray], pending: list[int]):
+        """Yield (chunk number, vectors) as chunks finish."""
+        if not pending:
+            return
+        if self.workers == 1 or len(pending) == 1:
+            if self.model is None:
+                self.model = self.loader(self.model_name)
+            for i in pending:
+                yield i, _encode_with(self.model, [texts[j] for j in chunks[i]], self.batch_size)
+            return
+
+        # Spawned workers do not inherit the parent's torch thread state
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(pending)),
+            mp_context=get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.loader, self.model_name, self.threads_per_worker),
+        ) as pool:
+            futures: dict[Future, int] = {
+                pool.submit(_encode_chunk, [texts[j] for j in chunks[i]], self.batch_size): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _fingerprint(self, texts: list[str]) -> str:
+        """Identify the model, chunking and texts a checkpoint belongs to."""
+        digest = hashlib.sha256(f"{self.identity}\x00{self.chunk_size}".encode("utf-8"))
+        for text in texts:
+            digest.update(text.encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def _load_checkpoint(self, texts: list[str], n_chunks: int) -> dict[int, np.ndarray]:
+        """Chunks saved for the same input, after resetting a stale checkpoint."""
+        if self.checkpoint_dir is None:
+            return {}
+        fingerprint = self._fingerprint(texts)
+        manifest = self.checkpoint_dir / self.MANIFEST
+        if manifest.exists():
+            saved = json.loads(manifest.read_text(encoding="utf-8"))
+            if saved.get("fingerprint") == fingerprint:
+                return {
+                    i: np.load(path)
+                    for i in range(n_chunks)
+                    if (path := self._chunk_path(i)).exists()
+                }
+
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        self.checkpoint_dir.mkdir(parents=True)
+        manifest.write_text(
+            json.dumps({"fingerprint": fingerprint, "model": self.identity,
+                        "chunk_size": self.chunk_size, "chunks": n_chunks}),
+            encoding="utf-8",
+        )
+        return {}
+
+    def _chunk_path(self, i: int) -> Path:
+        return self.checkpoint_dir / f"chunk-{i:06d}.npy"
+
+    def _save_chunk(self, i: int, vectors: np.ndarray) -> None:
+        """Save a finished chunk; written under a temporary name, then renamed."""
+        if self.checkpoint_dir is None:
+            return
+        path = self._chunk_path(i)
+        tmp = path.with_name(f".{path.stem}.tmp.npy")
+        np.save(tmp, vectors)
+        os.replace(tmp, path)
+
+    def _report(self, done: int, total: int) -> None:
+        if self.progress is not None:
+            self.progress(done, total)
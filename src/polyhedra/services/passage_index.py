@@ -0,0 +1,182 @@
+"""Passage chunks of local full texts for fine-grained search.
+
+Title and abstract embeddings cannot tell which paper discusses a point
+in its experiments section. Full texts under literature/ (PDFs, and
+markdown or text notes) are cut into fixed windows of whitespace tokens
+that overlap, so a sentence on a window boundary is still seen whole by
+one of them. Every chunk records its file, paper and page.
+
+Chunks are embedded into their own VectorIndex in
+<index dir>/passages/, keyed "<relative path>#<chunk number>". The size
+and modification time of every indexed file are kept in files.json, so
+an update re-reads and re-embeds only new or changed files.
+"""
+
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from polyhedra.services.citation_graph import paper_key
+from polyhedra.services.pdf_references import TitleMatcher, extract_pdf_text
+
+PASSAGES_DIR = "passages"
+FILES_MANIFEST = "files.json"
+
+TEXT_SUFFIXES = (".md", ".markdown", ".txt")
+
+# Generated by generate_literature_review; not a source text
+EXCLUDED_NAMES = ("review.md",)
+
+# MiniLM reads 256 word pieces, roughly 190 words
+DEFAULT_WINDOW = 160
+DEFAULT_OVERLAP = 32
+
+
+def iter_documents(directory: Path) -> Iterator[Path]:
+    """Full-text files under directory, in path order."""
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.name in EXCLUDED_NAMES:
+            continue
+        if path.suffix.lower() == ".pdf" or path.suffix.lower() in TEXT_SUFFIXES:
+            yield path
+
+
+def read_pages(path: Path) -> list[tuple[int | None, str]]:
+    """Text of a document with 1-based page numbers (None for text files).
+
+    Raises:
+        ImportError: If the file is a PDF and pypdf is not installed
+    """
+    if path.suffix.lower() == ".pdf":
+        return [(number, text) for number, text in enumerate(extract_pdf_text(path), 1)]
+    return [(None, path.read_text(encoding="utf-8", errors="replace"))]
+
+
+def chunk_pages(
+    pages: list[tuple[int | None, str]],
+    window: int = DEFAULT_WINDOW,
+    overlap: int = DEFAULT_OVERLAP,
+) -> list[dict[str, Any]]:
+    """Cut a document into overlapping windows of whitespace tokens.
+
+    Windows run across page breaks; each chunk points to the page of its
+    first token.
+
+    Args:
+        pages: (page number, text) pairs
+        window: Tokens per chunk
+        overlap: Tokens shared by consecutive chunks
+
+    Returns:
+        Dicts with chunk (number), page and text
+
+    Raises:
+        ValueError: If overlap is not smaller than window
+    """
+    if not 0 <= overlap < window:
+        raise ValueError("Overlap must be at least 0 and smaller than the window")
+
+    tokens: list[str] = []
+    token_pages: list[int | None] = []
+    for page, text in pages:
+        words = text.split()
+        tokens.extend(words)
+        token_pages.extend([page] * len(words))
+
+    chunks = []
+    stride = window - overlap
+    for start in range(0, max(len(tokens) - overlap, 1), stride):
+        text = " ".join(tokens[start : start + window])
+        if text:
+            chunks.append({"chunk": len(chunks), "page": token_pages[start], "text": text})
+    return chunks
+
+
+class DocumentOwners:
+    """Finds the corpus paper a full-text file belongs to.
+
+    Like PDFReferenceExtractor: the paper whose paperId or bibtex_key
+    equals the file name, or else whose title matches the first lines of
+    the document.
+    """
+
+    def __init__(self, papers: list[dict[str, Any]]):
+        """Index papers by name and title."""
+        self.papers = papers
+        self.by_name: dict[str, dict[str, Any]] = {}
+        for paper in papers:
+            for name in (paper_key(paper), paper.get("bibtex_key")):
+                if name:
+                    self.by_name.setdefault(name.lower(), paper)
+        self.titles = TitleMatcher([paper.get("title") or "" for paper in papers])
+
+    def match(self, path: Path, pages: list[tuple[int | None, str]]) -> dict[str, Any] | None:
+        """Return the paper a document belongs to, if any."""
+        paper = self.by_name.get(path.stem.lower())
+        if paper is None and pages:
+            # A markdown heading is the title alone; a PDF title may wrap
+            lines = [line for line in pages[0][1].split("\n") if line.strip()][:3]
+            for head in dict.fromkeys([" ".join(lines[:1]), " ".join(lines)]):
+                idx = self.titles.match(head)
+                if idx is not None:
+                    return self.papers[idx]
+        return paper
+
+
+def fingerprint(path: Path) -> list[int]:
+    """Size and modification time, compared to detect changed files."""
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def load_files_manifest(directory: Path) -> dict[str, Any]:
+    """Indexed files and chunking settings of a passage index."""
+    path = directory / FILES_MANIFEST
+    if not path.exists():
+        return {"files": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_files_manifest(directory: Path, manifest: dict[str, Any]) -> None:
+    """Publish the files manifest after the rows it describes are committed."""
+    path = directory / FILES_MANIFEST
+    tmp = path.with_name(f".{FILES_MANIFEST}.tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def group_by_paper(
+    hits: list[dict[str, Any]], k: int, passages_per_paper: int
+) -> list[dict[str, Any]]:
+    """Group ranked passages into the k best papers.
+
+    Args:
+        hits: Passage metadata with relevance_score, best first
+        k: Number of papers to return
+        passages_per_paper: Passages kept per paper
+
+    Returns:
+        Dicts with paper_id, title, path, relevance_score (of the best
+        passage) and passages (page, chunk, text, relevance_score), best
+        paper first
+    """
+    papers: dict[str, dict[str, Any]] = {}
+    for hit in hits:
+        paper = papers.get(hit["paper_id"])
+        if paper is None:
+            if len(papers) == k:
+                continue
+            paper = papers[hit["paper_id"]] = {
+                "paper_id": hit["paper_id"],
+                "title": hit["title"],
+                "path": hit["path"],
+                "relevance_score": hit["relevance_score"],
+                "passages": [],
+            }
+        if len(paper["passages"]) < passages_per_paper:
+            paper["passages"].append(
+                {key: hit[key] for key in ("page", "chunk", "text", "relevance_score")}
+            )
+    return list(papers.values())
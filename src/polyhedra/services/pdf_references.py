@@ -0,0 +1,282 @@
+"""Bibliography extraction from local PDFs, matched against the corpus."""
+
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any
+
+from polyhedra.services.citation_graph import paper_key
+
+_HEADING = re.compile(
+    r"^\s*(?:\d+\.?\s*)?(references|bibliography|works cited|literature cited)\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_TRAILER = re.compile(
+    r"^\s*(?:[A-Z]\.?\s+)?(appendix|appendices|supplementary material)\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+_BRACKETED = re.compile(r"^\s*\[\d+\]\s*", re.MULTILINE)
+_NUMBERED = re.compile(r"^\s*\d{1,3}\.\s+(?=[A-Z])", re.MULTILINE)
+_QUOTED = re.compile(r"[\"“”](.{15,300}?)[,.]?[\"“”]")
+_YEAR = re.compile(r"\(?(?:19|20)\d{2}[a-z]?\)?[.,]")
+
+
+def extract_pdf_text(path: Path) -> list[str]:
+    """Extract text from a PDF, one string per page.
+
+    Requires the optional pypdf package (pip install polyhedra[pdf]).
+
+    Args:
+        path: PDF file
+
+    Returns:
+        Text of each page
+
+    Raises:
+        ImportError: If pypdf is not installed
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise ImportError(
+            "PDF support requires pypdf. Install with: pip install polyhedra[pdf]"
+        ) from e
+
+    reader = PdfReader(str(path))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase and strip punctuation so title variants hash alike."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", title.lower()).split())
+
+
+def split_references(text: str) -> list[str]:
+    """Cut the bibliography section of a paper into single entries.
+
+    Args:
+        text: Full text of the paper
+
+    Returns:
+        Reference entries with line breaks collapsed
+    """
+    headings = list(_HEADING.finditer(text))
+    if not headings:
+        return []
+    section = text[headings[-1].end() :]
+
+    trailer = _TRAILER.search(section)
+    if trailer:
+        section = section[: trailer.start()]
+
+    # Join words hyphenated across line breaks before splitting
+    section = re.sub(r"-\n(?=[a-z])", "", section)
+
+    if len(_BRACKETED.findall(section)) >= 2:
+        entries = _BRACKETED.split(section)
+    elif len(_NUMBERED.findall(section)) >= 2:
+        entries = _NUMBERED.split(section)
+    else:
+        # Author-year style: a new entry starts after a line ending in a period
+        # when the next line opens with "Surname, X." or "Surname X."
+        entries = re.split(r"(?<=\.)\n(?=[A-Z][\w'-]+,?\s+[A-Z]\.)", section)
+
+    cleaned = (" ".join(entry.split()) for entry in entries)
+    return [entry for entry in cleaned if len(entry) > 20]
+
+
+def guess_title(entry: str) -> str:
+    """Pick the most title-like span of a reference entry.
+
+    Prefers a quoted title, then the sentence after the year, then the
+    longest of the first few sentences.
+    """
+    quoted = _QUOTED.search(entry)
+    if quoted:
+        return quoted.group(1)
+
+    year = _YEAR.search(entry)
+    if year:
+        after = entry[year.end() :].strip()
+        sentence = re.split(r"(?<=[a-z0-9?!])\.\s", after, maxsplit=1)[0]
+        if len(sentence.split()) >= 3:
+            return sentence.rstrip(".")
+
+    # The first sentence is normally the author list
+    sentences = re.split(r"(?<=[a-z0-9?!])\.\s", entry)[:4]
+    candidates = sentences[1:] or sentences
+    return max(candidates, key=lambda sentence: len(sentence.split())).rstrip(".")
+
+
+class TitleMatcher:
+    """Matches reference titles to corpus papers.
+
+    Exact matches use a hash index over normalized titles. Otherwise
+    candidates sharing rare title tokens are compared with a fuzzy ratio.
+    """
+
+    MIN_RATIO = 0.9
+    MAX_CANDIDATES = 50
+
+    def __init__(self, titles: list[str]):
+        """Build the indexes.
+
+        Args:
+            titles: Corpus titles; matches are reported as positions in this list
+        """
+        self.normalized = [normalize_title(title) for title in titles]
+        self.exact: dict[str, int] = {}
+        self.postings: dict[str, list[int]] = {}
+
+        for idx, title in enumerate(self.normalized):
+            if not title:
+                continue
+            self.exact.setdefault(title, idx)
+            for token in set(title.split()):
+                self.postings.setdefault(token, []).append(idx)
+
+    def match(self, text: str) -> int | None:
+        """Return the corpus position of the paper text refers to, if any."""
+        query = normalize_title(text)
+        if not query:
+            return None
+        if query in self.exact:
+            return self.exact[query]
+
+        # Rare tokens first: a handful of shared rare words is a strong signal
+        tokens = sorted(
+            (token for token in set(query.split()) if token in self.postings),
+            key=lambda token: len(self.postings[token]),
+        )
+        votes: Counter[int] = Counter()
+        for token in tokens[:8]:
+            votes.update(self.postings.get(token, [])[: self.MAX_CANDIDATES * 4])
+
+        best, best_ratio = None, self.MIN_RATIO
+        for idx, _ in votes.most_common(self.MAX_CANDIDATES):
+            candidate = self.normalized[idx]
+            if len(candidate.split()) >= 4 and candidate in query:
+                return idx
+            ratio = SequenceMatcher(None, query, candidate).ratio()
+            if ratio >= best_ratio:
+                best, best_ratio = idx, ratio
+        return best
+
+
+# Per-process matcher, built once by the pool initializer
+_worker_matcher: TitleMatcher | None = None
+
+
+def _init_worker(titles: list[str]) -> None:
+    global _worker_matcher
+    _worker_matcher = TitleMatcher(titles)
+
+
+def _process_pdf(path: str) -> dict[str, Any]:
+    """Extract and match one PDF (runs in a worker process)."""
+    if _worker_matcher is None:
+        raise RuntimeError("Worker was started without a title matcher")
+    try:
+        pages = extract_pdf_text(Path(path))
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+
+    entries = split_references("\n".join(pages))
+    matched = []
+    for entry in entries:
+        idx = _worker_matcher.match(guess_title(entry))
+        if idx is None:
+            idx = _worker_matcher.match(entry)
+        if idx is not None:
+            matched.append(idx)
+
+    # Title of the PDF itself, used when the filename is not a paper ID
+    head = " ".join(pages[0].split("\n")[:3]) if pages else ""
+    return {
+        "path": path,
+        "self": _worker_matcher.match(head),
+        "entries": len(entries),
+        "matched": sorted(set(matched)),
+    }
+
+
+class PDFReferenceExtractor:
+    """Builds citation edges among corpus papers from their local PDFs."""
+
+    def __init__(self, project_root: Path, max_workers: int | None = None):
+        """Initialize extractor.
+
+        Args:
+            project_root: Root directory of the project
+            max_workers: Worker processes (default: CPU count)
+        """
+        self.project_root = project_root
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def extract(self, papers: list[dict[str, Any]], pdf_dir: Path) -> dict[str, Any]:
+        """Parse every PDF under pdf_dir and match its bibliography.
+
+        A PDF belongs to the corpus paper whose paperId or bibtex_key equals
+        the file name, or else whose title matches the first lines of page 1.
+
+        Args:
+            papers: Corpus paper records
+            pdf_dir: Directory searched recursively for *.pdf
+
+        Returns:
+            Dict with edges (citing ID, cited ID) and per-run statistics
+        """
+        pdfs = sorted(str(path) for path in pdf_dir.rglob("*.pdf"))
+        keys = [paper_key(paper) for paper in papers]
+        titles = [paper.get("title", "") for paper in papers]
+
+        owners: dict[str, int] = {}
+        for idx, paper in enumerate(papers):
+            for name in (keys[idx], paper.get("bibtex_key")):
+                if name:
+                    owners.setdefault(name.lower(), idx)
+
+        if self.max_workers > 1 and len(pdfs) > 1:
+            # Forking the server process would copy its threads' held locks
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(pdfs)),
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(titles,),
+            ) as pool:
+                results = list(pool.map(_process_pdf, pdfs))
+        else:
+            _init_worker(titles)
+            results = [_process_pdf(path) for path in pdfs]
+
+        edges: list[tuple[str, str]] = []
+        errors: list[str] = []
+        unassigned: list[str] = []
+        entries = 0
+        for result in results:
+            path = Path(result["path"])
+            if "error" in result:
+                errors.append(f"{path.name}: {result['error']}")
+                continue
+
+            entries += result["entries"]
+            owner = owners.get(path.stem.lower(), result["self"])
+            if owner is None or not keys[owner]:
+                unassigned.append(path.name)
+                continue
+
+            edges.extend(
+                (keys[owner], keys[cited]) for cited in result["matched"] if cited != owner
+            )
+
+        return {
+            "edges": edges,
+            "pdfs": len(pdfs),
+            "references_found": entries,
+            "unassigned_pdfs": unassigned,
+            "errors": errors,
+        }
@@ -24,7 +24,7 @@ project:
 paths:
   papers: literature/papers.json
   citations: references.bib
-  embeddings: .poly/embeddings/papers.pkl
+  embeddings: .poly/embeddings
 """
 
     def __init__(self, project_root: Path):
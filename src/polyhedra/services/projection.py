@@ -0,0 +1,47 @@
+"""PCA projection of embeddings to fewer dimensions.
+
+Scan time and the size of the vector files grow with the embedding
+dimension. Sentence embeddings spend most of their variance in a minority
+of directions, so projecting them onto their leading principal components
+keeps most of the neighborhood structure at a fraction of the size:
+384 -> 96 dimensions stores and scans 4x less.
+
+The components are fitted by an SVD of a sample of the centered vectors.
+The index normalizes projected vectors again, so similarities stay
+cosine similarities; queries must go through the same projection.
+"""
+
+import numpy as np
+
+# Vectors the components are fitted on; more barely changes them
+SAMPLE_ROWS = 20_000
+
+
+def fit_pca(sample: np.ndarray, dims: int) -> tuple[np.ndarray, np.ndarray]:
+    """Fit the projection onto the leading principal components.
+
+    Args:
+        sample: Vectors of shape (n, dim)
+        dims: Dimensions to keep
+
+    Returns:
+        Mean of shape (dim,) and components of shape (dim, dims)
+
+    Raises:
+        ValueError: If dims is not below dim, or the sample has fewer than
+            dims vectors
+    """
+    sample = np.asarray(sample, dtype=np.float32)
+    if not 1 <= dims < sample.shape[1]:
+        raise ValueError(f"Dimensions must be between 1 and {sample.shape[1] - 1}")
+    if len(sample) < dims:
+        raise ValueError(f"Need at least {dims} vectors to fit {dims} dimensions")
+
+    mean = sample.mean(axis=0)
+    _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+    return mean, np.ascontiguousarray(vt[:dims].T)
+
+
+def apply_pca(vectors: np.ndarray, mean: np.ndarray, components: np.ndarray) -> np.ndarray:
+    """Project vectors (or a single vector) onto the components."""
+    return (np.asarray(vectors, dtype=np.float32) - mean) @ components
@@ -0,0 +1,77 @@
+"""Compressed vector codes for scanning the index cheaply.
+
+Two schemes are supported:
+
+- int8: each dimension scaled by its largest magnitude into [-127, 127]
+  (4x smaller than float32)
+- binary: one sign bit per dimension, packed into 64-bit words (32x
+  smaller); similarity is ranked by Hamming distance
+
+Both only pick a shortlist; the shortlist is rescored with the float
+vectors, so the final scores are exact cosine similarities.
+"""
+
+import numpy as np
+
+MODES = ("none", "int8", "binary")
+
+# Number of set bits in every byte value
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def int8_scale(vectors: np.ndarray, block: int = 65536) -> np.ndarray:
+    """Per-dimension step so the largest magnitude maps to 127."""
+    max_abs = np.zeros(vectors.shape[1], dtype=np.float32)
+    for start in range(0, len(vectors), block):
+        np.maximum(max_abs, np.abs(vectors[start : start + block]).max(axis=0), out=max_abs)
+    return np.where(max_abs == 0, 1, max_abs / 127).astype(np.float32)
+
+
+def quantize_int8(vectors: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Encode float vectors as int8 codes."""
+    return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+
+def int8_scores(
+    codes: np.ndarray, scale: np.ndarray, queries: np.ndarray, block: int = 1024
+) -> np.ndarray:
+    """Approximate dot products of queries (q, dim) with int8 codes (n, dim).
+
+    Codes are widened to float32 a small block at a time so the temporary
+    stays in cache; the product itself then runs in BLAS.
+    """
+    scaled = (queries * scale).T
+    scores = np.empty((len(codes), len(queries)), dtype=np.float32)
+    for start in range(0, len(codes), block):
+        scores[start : start + block] = codes[start : start + block].astype(np.float32) @ scaled
+    return scores.T
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Encode vectors as sign bits, padded to whole 64-bit words per row."""
+    bits = np.packbits(vectors > 0, axis=-1)
+    padding = -bits.shape[-1] % 8
+    if padding:
+        bits = np.pad(bits, [(0, 0)] * (bits.ndim - 1) + [(0, padding)])
+    return bits
+
+
+def hamming_distances(codes: np.ndarray, query_codes: np.ndarray) -> np.ndarray:
+    """Bit differences between packed queries (q, bytes) and codes (n, bytes).
+
+    XORs whole 64-bit words and counts bits with np.bitwise_count where
+    NumPy provides it (2.0+), otherwise with a byte lookup table.
+    """
+    codes = np.ascontiguousarray(codes)
+    query_codes = np.ascontiguousarray(query_codes)
+    distances = np.empty((len(query_codes), len(codes)), dtype=np.int32)
+    for i, query in enumerate(query_codes):
+        if _bitwise_count is not None:
+            diff = np.bitwise_xor(codes.view(np.uint64), query.view(np.uint64))
+            distances[i] = _bitwise_count(diff).sum(axis=1, dtype=np.int32)
+        else:
+            distances[i] = POPCOUNT[np.bitwise_xor(codes, query)].sum(axis=1, dtype=np.int32)
+    return distances
+
+
+_bitwise_count = getattr(np, "bitwise_count", None)
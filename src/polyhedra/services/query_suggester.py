@@ -0,0 +1,212 @@
+"""Query autocomplete backed by a local prefix trie."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from polyhedra.services.semantic_scholar import SemanticScholarService
+
+
+class _TrieNode:
+    """Trie node caching the best completions below it."""
+
+    __slots__ = ("children", "top")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.top: list[tuple[float, str]] = []
+
+
+class PrefixTrie:
+    """Prefix trie where every node keeps its top-N weighted completions.
+
+    Lookups only walk the prefix, so completing costs O(len(prefix))
+    regardless of how many terms are stored.
+    """
+
+    def __init__(self, top_n: int = 10):
+        """Initialize the trie.
+
+        Args:
+            top_n: Completions cached per node
+        """
+        self.top_n = top_n
+        self._root = _TrieNode()
+        self._weights: dict[str, float] = {}
+        self._display: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def insert(self, term: str, weight: float = 1.0) -> None:
+        """Add a term, or raise its weight if it is already present.
+
+        Args:
+            term: Text to complete to
+            weight: Weight added to the term's score
+        """
+        key = normalize_query(term)
+        if not key:
+            return
+
+        score = self._weights.get(key, 0.0) + weight
+        self._weights[key] = score
+        self._display.setdefault(key, " ".join(term.split()))
+
+        node = self._root
+        self._update_top(node, key, score)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            self._update_top(node, key, score)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """Return the highest-weighted terms starting with prefix.
+
+        Args:
+            prefix: Typed prefix
+            limit: Maximum number of completions (at most top_n)
+
+        Returns:
+            Completions, best first
+        """
+        node = self._root
+        for char in normalize_query(prefix):
+            child = node.children.get(char)
+            if child is None:
+                return []
+            node = child
+        return [self._display[key] for _, key in node.top[:limit]]
+
+    def _update_top(self, node: _TrieNode, key: str, score: float) -> None:
+        """Insert or re-score key in a node's cached completions."""
+        top = [entry for entry in node.top if entry[1] != key]
+        top.append((score, key))
+        top.sort(key=lambda entry: (-entry[0], entry[1]))
+        node.top = top[: self.top_n]
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and collapse whitespace so keystrokes map to trie keys."""
+    return " ".join(text.lower().split())
+
+
+class QuerySuggester:
+    """Per-keystroke query suggestions served from memory.
+
+    The trie is seeded from past search queries, titles in papers.json and
+    earlier autocomplete responses. Semantic Scholar is only asked when the
+    trie has nothing for a prefix, and its answers are cached in the trie.
+    Queries and answers are only persisted in initialized projects (with a
+    .poly directory); elsewhere they last for the session.
+    """
+
+    QUERY_WEIGHT = 3.0
+    REMOTE_WEIGHT = 1.0
+    TITLE_WEIGHT = 0.5
+    MIN_REMOTE_PREFIX = 3
+
+    def __init__(
+        self,
+        project_root: Path,
+        semantic_scholar: SemanticScholarService | None = None,
+    ):
+        """Initialize query suggester.
+
+        Args:
+            project_root: Root directory of the project
+            semantic_scholar: Service used for autocomplete on trie misses
+        """
+        self.project_root = project_root
+        self.semantic_scholar = semantic_scholar
+        self.cache_path = project_root / ".poly" / "cache" / "suggestions.json"
+        self.papers_path = project_root / "literature" / "papers.json"
+        self._trie: PrefixTrie | None = None
+        self._queries: dict[str, int] = {}
+        self._remote: dict[str, list[str]] = {}
+
+    def _load_trie(self) -> PrefixTrie:
+        """Build the trie from the cache file and papers.json on first use."""
+        if self._trie is None:
+            trie = PrefixTrie()
+
+            if self.cache_path.exists():
+                # A corrupt cache only costs the suggestions it held
+                try:
+                    cached = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                except (OSError, json.JSONDecodeError):
+                    cached = {}
+                if isinstance(cached, dict):
+                    self._queries = cached.get("queries", {})
+                    self._remote = cached.get("remote", {})
+
+            for query, count in self._queries.items():
+                trie.insert(query, self.QUERY_WEIGHT * count)
+            for titles in self._remote.values():
+                for title in titles:
+                    trie.insert(title, self.REMOTE_WEIGHT)
+
+            if self.papers_path.exists():
+                try:
+                    papers = json.loads(self.papers_path.read_text(encoding="utf-8"))
+                except json.JSONDecodeError:
+                    papers = []
+                for paper in papers if isinstance(papers, list) else []:
+                    if isinstance(paper, dict) and paper.get("title"):
+                        trie.insert(paper["title"], self.TITLE_WEIGHT)
+
+            self._trie = trie
+        return self._trie
+
+    def _save(self) -> None:
+        """Persist past queries and remote completions."""
+        if not (self.project_root / ".poly").is_dir():
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_path.write_text(
+            json.dumps({"queries": self._queries, "remote": self._remote}),
+            encoding="utf-8",
+        )
+
+    def record_query(self, query: str) -> None:
+        """Remember a submitted search query so it ranks high next time.
+
+        Args:
+            query: Search query the user ran
+        """
+        key = normalize_query(query)
+        if not key:
+            return
+        trie = self._load_trie()
+        self._queries[key] = self._queries.get(key, 0) + 1
+        trie.insert(query, self.QUERY_WEIGHT)
+        self._save()
+
+    async def suggest(self, prefix: str, limit: int = 10) -> dict[str, Any]:
+        """Suggest completions for a partial query.
+
+        Args:
+            prefix: Text typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            Dict with suggestions and their source ("cache" or "api")
+        """
+        trie = self._load_trie()
+        suggestions = trie.complete(prefix, limit)
+        if suggestions:
+            return {"suggestions": suggestions, "source": "cache"}
+
+        key = normalize_query(prefix)
+        if key in self._remote:
+            return {"suggestions": self._remote[key][:limit], "source": "cache"}
+        if self.semantic_scholar is None or len(key) < self.MIN_REMOTE_PREFIX:
+            return {"suggestions": [], "source": "cache"}
+
+        titles = await self.semantic_scholar.autocomplete(key)
+        self._remote[key] = titles
+        for title in titles:
+            trie.insert(title, self.REMOTE_WEIGHT)
+        self._save()
+
+        # Remote matches are not always literal prefix matches
+        return {"suggestions": trie.complete(prefix, limit) or titles[:limit], "source": "api"}
@@ -1,57 +1,276 @@
 ﻿"""RAG (Retrieval Augmented Generation) service for semantic paper search."""
 
-import pickle
+import asyncio
+import contextlib
+import functools
+import hashlib
+import itertools
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from polyhedra.services.ann_index import ANNBackend, IVFIndex, load_ann
+from polyhedra.services.dedup import (
+    DEFAULT_BITS,
+    DEFAULT_TABLES,
+    DEFAULT_THRESHOLD,
+    cluster_duplicates,
+)
+from polyhedra.services.embedding_cache import EmbeddingCache, QueryEmbeddingLRU
+from polyhedra.services.index_generations import IndexGenerations
+from polyhedra.services.knn_graph import DEFAULT_DEGREE, KNNGraph
+from polyhedra.services.lexical_index import BM25Index, reciprocal_rank_fusion
+from polyhedra.services.metadata_columns import MetadataColumns
+from polyhedra.services.onnx_embedding import load_onnx_encoder
+from polyhedra.services.paper_stream import batched, iter_papers
+from polyhedra.services.parallel_embedding import ChunkedEncoder, load_sentence_transformer
+from polyhedra.services.passage_index import (
+    DEFAULT_OVERLAP,
+    DEFAULT_WINDOW,
+    PASSAGES_DIR,
+    DocumentOwners,
+    chunk_pages,
+    fingerprint,
+    group_by_paper,
+    iter_documents,
+    load_files_manifest,
+    read_pages,
+    save_files_manifest,
+)
+from polyhedra.services.sharded_index import SHARD_KEYS, ShardedIndex, shard_name
+from polyhedra.services.vector_index import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+# Kept beside the index generations rather than in them
+GENERATION_EXCLUDE = (PASSAGES_DIR, "encode-chunks")
+
+T = TypeVar("T")
 
 
 class RAGService:
     """Semantic search service for academic papers using embeddings."""
 
-    def __init__(self, project_root: Path, model_name: str = "all-MiniLM-L6-v2"):
+    # Larger encodes are length-sorted, chunked and resumable
+    CHUNKED_ENCODE_MIN = 4096
+
+    # Hash shards created when sharding is requested without a count
+    DEFAULT_SHARDS = 4
+
+    # Rankings fused by mode="hybrid" are HYBRID_DEPTH times deeper than k
+    QUERY_MODES = ("dense", "lexical", "hybrid")
+    HYBRID_DEPTH = 4
+
+    # Filters matching fewer rows than this fraction gather just those
+    # vectors; broader ones are cheaper as a masked scan of the matrix
+    GATHER_FRACTION = 0.35
+
+    # Embedding runtimes; the ONNX ones need the optional onnx extra
+    BACKENDS = ("torch", "onnx", "onnx-int8")
+
+    # Full texts read and embedded per passage index commit
+    PASSAGE_FILE_BATCH = 32
+
+    # Passages ranked per query_passages paper before grouping
+    PASSAGE_DEPTH = 4
+
+    def __init__(
+        self,
+        project_root: Path,
+        model_name: str = "all-MiniLM-L6-v2",
+        embedding_cache: EmbeddingCache | None = None,
+        query_cache_size: int = 1024,
+        persist_queries: bool = False,
+        backend: str | None = None,
+    ):
         """Initialize RAG service.
 
         Args:
             project_root: Root directory of the project
             model_name: Name of the sentence-transformers model to use
+            embedding_cache: Paper embedding cache shared across projects
+                (default: the user-level cache)
+            query_cache_size: Query embeddings kept in memory (0 disables)
+            persist_queries: Also store query embeddings in the embedding
+                cache, so repeats are cheap in later sessions
+            backend: "torch" (sentence-transformers), "onnx" or "onnx-int8"
+                (ONNX Runtime, see onnx_embedding.py); default:
+                $POLYHEDRA_EMBEDDING_BACKEND, else "torch"
+
+        Raises:
+            ValueError: If backend is unknown
         """
+        backend = backend or os.getenv("POLYHEDRA_EMBEDDING_BACKEND") or "torch"
+        if backend not in self.BACKENDS:
+            raise ValueError(
+                f"Unknown embedding backend: {backend}. Use one of: {', '.join(self.BACKENDS)}"
+            )
         self.project_root = project_root
         self.model_name = model_name
-        self.embeddings_path = project_root / ".poly" / "embeddings" / "papers.pkl"
-        self._model: SentenceTransformer | None = None
-        self._index: dict[str, Any] | None = None
+        self.embedding_cache = embedding_cache or EmbeddingCache()
+        self.query_cache = QueryEmbeddingLRU(query_cache_size)
+        self.persist_queries = persist_queries
+        self.backend = backend
+        self._model_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self.index_dir = project_root / ".poly" / "embeddings"
+        self.generations = IndexGenerations(self.index_dir, exclude=GENERATION_EXCLUDE)
+        self._generation: str | None = None
+        self._index_path = self.index_dir
+        self._model: Any = None
+        self._index: VectorIndex | ShardedIndex | None = None
+        self._lexical: BM25Index | None = None
+        self._columns: MetadataColumns | None = None
+        self._graph: KNNGraph | None = None
+        self._ann: ANNBackend | None = None
+        self._passages: VectorIndex | None = None
+        self._scratch: tempfile.TemporaryDirectory | None = None
+
+    @property
+    def model_id(self) -> str:
+        """Identity of the embeddings, stored in index manifests and cache keys.
 
-    def _load_model(self) -> SentenceTransformer:
+        ONNX exports, int8 ones especially, embed slightly differently from
+        PyTorch, so the backend is part of it. Torch keeps the bare model
+        name, which indexes and caches written before backends existed use.
+        """
+        if self.backend == "torch":
+            return self.model_name
+        return f"{self.model_name}@{self.backend}"
+
+    def _load_model(self) -> Any:
         """Lazy load the embedding model."""
         if self._model is None:
-            self._model = SentenceTransformer(self.model_name)
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._loader()(self.model_name)
         return self._model
 
-    def _load_index(self) -> dict[str, Any]:
-        """Load index from disk if not in memory."""
+    def _loader(self) -> Callable[[str], Any]:
+        """Picklable function that loads the model for the configured backend.
+
+        PyTorch and sentence-transformers are only imported by the torch
+        backend.
+        """
+        if self.backend == "torch":
+            return load_sentence_transformer
+        return functools.partial(load_onnx_encoder, quantized=self.backend == "onnx-int8")
+
+    def _worker(self) -> ThreadPoolExecutor:
+        """Single thread that runs model and index work off the event loop.
+
+        One thread serializes index updates and keeps the model's own
+        thread pool from being oversubscribed.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="polyhedra-embedding"
+            )
+        return self._executor
+
+    def warm_up(self) -> Future:
+        """Start loading the model and index in the background.
+
+        Returns:
+            Future that completes once both are loaded
+        """
+
+        def load() -> None:
+            self._load_model()
+            self._load_index()
+
+        return self._worker().submit(load)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Await a blocking service method run on the embedding worker thread.
+
+        Example:
+            results = await service.run(service.query, "attention", k=5)
+        """
+        future = self._worker().submit(functools.partial(func, *args, **kwargs))
+        return await asyncio.wrap_future(future)
+
+    def _load_index(self) -> VectorIndex | ShardedIndex | None:
+        """Memory-map the published index generation.
+
+        Checked on every call: once another process or thread publishes a
+        new generation, the next query switches to it.
+        """
+        generation = self.generations.current()
+        if self._index is not None and generation != self._generation:
+            self._close_index()
         if self._index is None:
-            if not self.embeddings_path.exists():
-                return {"embeddings": np.array([]), "metadata": []}
-            with open(self.embeddings_path, "rb") as f:
-                self._index = pickle.load(f)
+            directory = self.generations.current_dir()
+            self._generation = generation
+            self._index_path = directory
+            sharded = ShardedIndex(directory)
+            if sharded.exists():
+                self._index = sharded.open()
+                return self._index
+            index = VectorIndex(directory)
+            if not index.exists():
+                return None
+            self._index = index.open()
+            self._ann = load_ann(directory)
         return self._index
 
     def is_indexed(self) -> bool:
         """Check if papers are indexed.
 
         Returns:
-            True if embeddings file exists, False otherwise
+            True if an index in the current format exists, False otherwise
+        """
+        directory = self.generations.current_dir()
+        return ShardedIndex(directory).exists() or VectorIndex(directory).exists()
+
+    @contextlib.contextmanager
+    def _next_generation(self, inherit: bool = True) -> Iterator[Path]:
+        """Stage a new index generation and publish it if the block succeeds.
+
+        Queries keep reading the current generation meanwhile; a failed
+        update leaves it untouched.
+
+        Args:
+            inherit: Start from the files of the current generation
+                (otherwise the block writes a complete index)
         """
-        return self.embeddings_path.exists()
+        staged = self.generations.stage(inherit=inherit)
+        try:
+            yield staged
+        except BaseException:
+            self.generations.discard(staged)
+            raise
+        self._close_index()
+        self.generations.publish(staged)
 
-    def index_papers(self, papers: list[dict[str, Any]]) -> int:
+    def index_papers(
+        self,
+        papers: list[dict[str, Any]],
+        rebuild: bool = False,
+        workers: int = 1,
+        shard_by: str | None = None,
+        shards: int | None = None,
+        dimensions: int | None = None,
+    ) -> int:
         """Index papers for semantic search.
 
+        Only new or changed papers are encoded; see update_index.
+
         Args:
             papers: List of paper dicts with 'title' and 'abstract' fields
+            rebuild: Re-encode every paper instead of updating the index
+            workers: Processes used to encode large batches of papers
+            shard_by: "hash", "year" or "none"; see update_index
+            shards: Number of hash shards
+            dimensions: PCA dimensions of the stored vectors; see update_index
 
         Returns:
             Number of papers indexed
@@ -59,87 +278,1046 @@ class RAGService:
         Raises:
             ValueError: If papers list is empty or missing required fields
         """
+        return self.update_index(
+            papers,
+            rebuild=rebuild,
+            workers=workers,
+            shard_by=shard_by,
+            shards=shards,
+            dimensions=dimensions,
+        )["indexed"]
+
+    def update_index(
+        self,
+        papers: list[dict[str, Any]],
+        rebuild: bool = False,
+        workers: int = 1,
+        shard_by: str | None = None,
+        shards: int | None = None,
+        dimensions: int | None = None,
+    ) -> dict[str, Any]:
+        """Bring the index in line with a paper list.
+
+        Papers are keyed by ID and compared by a hash of title and abstract.
+        New and changed papers are encoded and appended; papers whose other
+        metadata changed keep their vector; papers no longer in the list are
+        tombstoned. The index is compacted when enough rows are dead. A full
+        rebuild happens when there is no index or the model differs.
+
+        Large batches are encoded by ChunkedEncoder, across worker processes
+        if workers > 1; an interrupted build resumes from its saved chunks.
+
+        The index can be split into shards by a hash of the paper key or by
+        year (see sharded_index.py). Changing the layout rebuilds the index;
+        otherwise the current layout is kept.
+
+        Vectors can be stored reduced to fewer dimensions by a PCA projection
+        fitted on a sample of the papers (see projection.py), which makes
+        scans and the index files smaller at some cost in recall. Queries
+        and new papers go through the same projection. Like the layout, the
+        setting is kept until changed, and changing it rebuilds the index.
+
+        Args:
+            papers: List of paper dicts with 'title' and 'abstract' fields
+            rebuild: Re-encode every paper instead of updating the index
+            workers: Processes used to encode large batches of papers
+            shard_by: "hash", "year", or "none" for a single index
+                (default: the current layout)
+            shards: Number of hash shards (default: DEFAULT_SHARDS)
+            dimensions: Dimensions of the stored vectors, 0 for the model's
+                own (default: the current setting)
+
+        Returns:
+            Dict with indexed, added, updated, removed and unchanged counts and
+            whether the index was compacted
+
+        Raises:
+            ValueError: If papers list is empty or missing required fields, or
+                dimensions are requested for a sharded index
+        """
         if not papers:
             raise ValueError("Cannot index empty papers list")
 
-        model = self._load_model()
-
-        # Prepare text for embedding (title + abstract)
-        texts = []
-        metadata = []
+        # Key and hash every paper; later duplicates of a key win
+        records: dict[str, tuple[dict[str, Any], tuple[str, str, str]]] = {}
         for paper in papers:
             if "title" not in paper:
                 raise ValueError("Paper missing required 'title' field")
             
-            title = paper.get("title", "")
-            abstract = paper.get("abstract", "")
-            text = f"{title}. {abstract}".strip()
-            texts.append(text)
-            
-            # Store metadata for retrieval
-            metadata.append({
-                "id": paper.get("id", ""),
-                "title": title,
-                "abstract": abstract,
-                "authors": paper.get("authors", []),
-                "year": paper.get("year", ""),
-                "bibtex_key": paper.get("bibtex_key", ""),
-            })
-
-        # Generate embeddings
-        embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-
-        # Save to disk
-        self.embeddings_path.parent.mkdir(parents=True, exist_ok=True)
-        index_data = {"embeddings": embeddings, "metadata": metadata}
-        
-        with open(self.embeddings_path, "wb") as f:
-            pickle.dump(index_data, f)
+            key, keys = _paper_keys(paper)
+            records[key] = (paper, keys)
+
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "compacted": False}
+
+        loaded = self._load_index()
+        quantization = loaded.quantization if loaded is not None else "none"
+        current_ann = load_ann(self._index_path)
+        has_graph = KNNGraph(self._index_path).exists()
+        by, count = self._shard_layout(loaded, shard_by, shards)
+        dims = self._dimensions(loaded, by, dimensions)
+        index = None if rebuild else loaded
+        if by != "none":
+            full = not (
+                isinstance(index, ShardedIndex)
+                and (index.by, index.count) == (by, count)
+                and index.manifest.get("model") == self.model_id
+            )
+        else:
+            full = not (
+                isinstance(index, VectorIndex)
+                and index.manifest.get("model") == self.model_id
+                and index.dimensions == dims
+            )
+
+        with self._next_generation(inherit=not full) as staged:
+            if by != "none":
+                updated = self._update_sharded(
+                    records, staged, full, by, count, quantization, workers, stats
+                )
+            elif full:
+                updated = VectorIndex(staged)
+                updated.write(
+                    self._encode_cached(
+                        [_paper_text(paper) for paper, _ in records.values()], workers
+                    ),
+                    [_paper_metadata(paper) for paper, _ in records.values()],
+                    self.model_id,
+                    keys=[keys for _, keys in records.values()],
+                )
+                updated.open()
+                if dims:
+                    updated.reduce(dims)
+                if quantization != "none":
+                    updated.quantize(quantization)
+                if isinstance(current_ann, IVFIndex):
+                    IVFIndex(staged).build(
+                        updated, nlist=len(current_ann.centroids), nprobe=current_ann.nprobe
+                    )
+                stats["added"] = len(records)
+            else:
+                updated = VectorIndex(staged).open()
+                self._update_segments(updated, records, stats, workers)
+
+                # Appended rows are scanned exactly; compaction renumbers rows
+                ann = load_ann(staged)
+                if ann is not None and not ann.covers(updated):
+                    ann.build(updated, retrain=False)
+            self._build_derived(staged, updated, graph=has_graph)
+            stats["indexed"] = len(updated)
+            updated.close()
+
+        return stats
+
+    def _update_segments(
+        self,
+        index: VectorIndex,
+        records: dict[str, tuple[dict[str, Any], tuple[str, str, str]]],
+        stats: dict[str, Any],
+        workers: int = 1,
+    ) -> None:
+        """Append new and changed papers to index and tombstone the rest.
+
+        records must hold every paper that belongs in index; rows of keys
+        not in records are removed. Counts are added to stats.
+        """
+        existing = index.entries()
+        encode: list[str] = []
+        reuse: list[str] = []
+        deleted: list[int] = []
+        for key, (_, (_, content_hash, meta_hash)) in records.items():
+            old = existing.get(key)
+            if old is None:
+                encode.append(key)
+                stats["added"] += 1
+            elif old[1] != content_hash:
+                encode.append(key)
+                deleted.append(old[0])
+                stats["updated"] += 1
+            elif old[2] != meta_hash:
+                reuse.append(key)
+                deleted.append(old[0])
+                stats["updated"] += 1
+            else:
+                stats["unchanged"] += 1
+
+        removed = [row for key, (row, _, _) in existing.items() if key not in records]
+        deleted.extend(removed)
+        stats["removed"] += len(removed)
+
+        if encode or deleted:
+            parts = [np.zeros((0, int(index.manifest["dim"])), dtype=np.float32)]
+            if encode:
+                texts = [_paper_text(records[key][0]) for key in encode]
+                parts.append(index.project(self._encode_cached(texts, workers)))
+            if reuse:
+                parts.append(index.get_vectors([existing[key][0] for key in reuse]))
+            vectors = np.concatenate(parts)
+            changed = encode + reuse
+            compacted = index.append(
+                vectors,
+                [_paper_metadata(records[key][0]) for key in changed],
+                [records[key][1] for key in changed],
+                deleted,
+            )
+            stats["compacted"] = stats["compacted"] or compacted
+
+    def _shard_layout(
+        self,
+        index: "VectorIndex | ShardedIndex | None",
+        shard_by: str | None,
+        shards: int | None,
+    ) -> tuple[str, int]:
+        """Requested shard key and count, defaulting to the current layout."""
+        if shard_by is None and shards is None:
+            if isinstance(index, ShardedIndex):
+                return index.by, index.count
+            return "none", 0
+
+        by = shard_by or "hash"
+        if by not in ("none", *SHARD_KEYS):
+            raise ValueError(f"Unknown shard key: {by}. Use one of: none, {', '.join(SHARD_KEYS)}")
+        if by != "hash":
+            return by, 0
+        count = shards or self.DEFAULT_SHARDS
+        if count < 1:
+            raise ValueError("Number of shards must be at least 1")
+        return by, count
+
+    def _dimensions(
+        self,
+        index: "VectorIndex | ShardedIndex | None",
+        by: str,
+        dimensions: int | None,
+    ) -> int:
+        """Requested PCA dimensions, defaulting to the current setting."""
+        if dimensions is None:
+            dimensions = index.dimensions if index is not None else 0
+        if dimensions < 0:
+            raise ValueError("Dimensions must be at least 1, or 0 for the model's own")
+        if dimensions and by != "none":
+            raise ValueError(
+                "Dimensionality reduction is not supported for sharded indexes "
+                "(set dimensions to 0 to shard a reduced index)"
+            )
+        return dimensions
+
+    def _update_sharded(
+        self,
+        records: dict[str, tuple[dict[str, Any], tuple[str, str, str]]],
+        directory: Path,
+        rebuild: bool,
+        by: str,
+        count: int,
+        quantization: str,
+        workers: int,
+        stats: dict[str, Any],
+    ) -> ShardedIndex:
+        """Update the sharded index in directory, or write it in a new layout.
+
+        Only shards whose papers changed are appended to; papers of a new
+        shard (e.g. a new year) are written to a new shard directory.
+        """
+        groups: dict[str, dict[str, tuple[dict[str, Any], tuple[str, str, str]]]] = {}
+        for key, record in records.items():
+            groups.setdefault(shard_name(key, record[0].get("year"), by, count), {})[key] = record
+
+        if rebuild:
+            embeddings = self._encode_cached(
+                [_paper_text(paper) for paper, _ in records.values()], workers
+            )
+            position = {key: row for row, key in enumerate(records)}
+
+            sharded = ShardedIndex(directory)
+            for name, group in sorted(groups.items()):
+                sharded.write_shard(
+                    name,
+                    embeddings[[position[key] for key in group]],
+                    [_paper_metadata(paper) for paper, _ in group.values()],
+                    self.model_id,
+                    [keys for _, keys in group.values()],
+                )
+            sharded.save({"by": by, "count": count, "model": self.model_id,
+                          "quantization": "none", "shards": sorted(groups)})
+            if quantization != "none":
+                sharded.quantize(quantization)
+            stats["added"] = len(records)
+            return sharded.open()
+
+        index = ShardedIndex(directory).open()
+        names = list(index.manifest["shards"])
+        for name in names + sorted(set(groups) - set(names)):
+            group = groups.get(name, {})
+            if name in index.shards:
+                self._update_segments(index.shards[name], group, stats, workers)
+                continue
+
+            index.write_shard(
+                name,
+                self._encode_cached([_paper_text(paper) for paper, _ in group.values()], workers),
+                [_paper_metadata(paper) for paper, _ in group.values()],
+                self.model_id,
+                [keys for _, keys in group.values()],
+            )
+            names.append(name)
+            stats["added"] += len(group)
+
+        index.save({**index.manifest, "shards": names})
+        return index.open()
+
+    def build_index_streaming(
+        self,
+        papers_path: Path,
+        batch_size: int = 1024,
+        workers: int = 1,
+        dimensions: int | None = None,
+    ) -> dict[str, Any]:
+        """Rebuild the index from a papers file with constant memory.
+
+        Papers are read one at a time from a JSON array or JSONL file,
+        encoded batch_size at a time, and each batch is appended to the
+        on-disk vectors before the next one is read. Peak memory depends on
+        the batch size, not on the size of the corpus. If a paper ID occurs
+        more than once, the last occurrence is kept.
+
+        Args:
+            papers_path: Papers file (JSON array or JSON Lines)
+            batch_size: Papers encoded and written per batch
+            workers: Processes used to encode each batch
+            dimensions: PCA dimensions of the stored vectors; see update_index
+
+        Returns:
+            Dict in the format of update_index, plus duplicates skipped
+
+        Raises:
+            ValueError: If the file has no papers, a paper lacks a title, or
+                the current index is sharded
+        """
+        loaded = self._load_index()
+        if isinstance(loaded, ShardedIndex):
+            raise ValueError(
+                "Streaming builds write an unsharded index; index without streaming "
+                "to keep the sharded layout"
+            )
+
+        papers = iter_papers(papers_path)
+        first = next(papers, None)
+        if first is None:
+            raise ValueError("Cannot index empty papers list")
+
+        def batches():
+            for batch in batched(itertools.chain([first], papers), batch_size):
+                records = {}
+                for paper in batch:
+                    if "title" not in paper:
+                        raise ValueError("Paper missing required 'title' field")
+                    key, keys = _paper_keys(paper)
+                    records[key] = (paper, keys)
+                texts = [_paper_text(paper) for paper, _ in records.values()]
+                yield (
+                    self._encode_cached(texts, workers),
+                    [_paper_metadata(paper) for paper, _ in records.values()],
+                    [keys for _, keys in records.values()],
+                )
+
+        quantization = loaded.quantization if loaded is not None else "none"
+        dims = self._dimensions(loaded, "none", dimensions)
+        current_ann = load_ann(self._index_path)
+        has_graph = KNNGraph(self._index_path).exists()
+        with self._next_generation(inherit=False) as staged:
+            index = VectorIndex(staged)
+            result = index.write_batches(batches(), self.model_id)
+            index.open()
+            if dims:
+                index.reduce(dims)
+            if quantization != "none":
+                index.quantize(quantization)
+            if isinstance(current_ann, IVFIndex):
+                IVFIndex(staged).build(
+                    index, nlist=len(current_ann.centroids), nprobe=current_ann.nprobe
+                )
+            self._build_derived(staged, index, graph=has_graph)
+            index.close()
+
+        indexed = result["rows"] - result["duplicates"]
+        return {"added": indexed, "updated": 0, "removed": 0, "unchanged": 0,
+                "compacted": False, "duplicates": result["duplicates"], "indexed": indexed}
+
+    def set_quantization(self, mode: str) -> None:
+        """Scan compressed vector codes and rescore the shortlist in float.
+
+        Args:
+            mode: "int8" (4x smaller scan), "binary" (32x smaller, Hamming
+                distance) or "none" for exact float scans
+
+        Raises:
+            ValueError: If no papers are indexed or mode is unknown
+        """
+        index = self._load_index()
+        if index is None:
+            raise ValueError("Papers not indexed. Run index_papers first.")
+        with self._next_generation() as staged:
+            staged_index = type(index)(staged).open()
+            staged_index.quantize(mode)
+            staged_index.close()
+
+    def build_ann_index(self, nlist: int | None = None, nprobe: int | None = None) -> dict[str, Any]:
+        """Build an IVF approximate search index next to the embeddings.
+
+        Once built, queries scan only the nprobe lists closest to the query
+        and it is kept up to date by update_index.
+
+        Args:
+            nlist: Number of k-means lists (default: sqrt of the paper count)
+            nprobe: Default lists scanned per query; higher is slower but
+                finds more of the exact neighbors
+
+        Returns:
+            Dict with backend, nlist, nprobe and rows
+
+        Raises:
+            ValueError: If no papers are indexed
+        """
+        index = self._load_index()
+        if index is None or len(index) == 0:
+            raise ValueError("Papers not indexed. Run index_papers first.")
+        if isinstance(index, ShardedIndex):
+            raise ValueError("ANN indexes are not supported for sharded indexes")
+
+        with self._next_generation() as staged:
+            staged_index = VectorIndex(staged).open()
+            stats = IVFIndex(staged).build(staged_index, nlist=nlist, nprobe=nprobe)
+            staged_index.close()
+        return stats
+
+    def build_knn_graph(self, degree: int = DEFAULT_DEGREE) -> dict[str, Any]:
+        """Precompute the nearest neighbors of every indexed paper.
+
+        Once built, find_related answers from the graph and update_index
+        keeps it up to date, scanning only for new and affected papers.
+
+        Args:
+            degree: Neighbors stored per paper; find_related scans the
+                index for larger k
 
-        # Update in-memory cache
-        self._index = index_data
+        Returns:
+            Dict with rows, degree and rows scanned
+
+        Raises:
+            ValueError: If no papers are indexed or degree is below 1
+        """
+        index = self._load_index()
+        if index is None or len(index) == 0:
+            raise ValueError("Papers not indexed. Run index_papers first.")
+
+        with self._next_generation() as staged:
+            staged_index = type(index)(staged).open()
+            graph = KNNGraph(staged)
+            if graph.exists():
+                graph.open()
+            stats = graph.update(staged_index, degree)
+            staged_index.close()
+        return stats
+
+    def find_related(self, paper_id: str, k: int = 10) -> list[dict[str, Any]]:
+        """Papers most similar to an indexed paper, without encoding anything.
+
+        Neighbors come from the k-NN graph (see knn_graph.py), which is
+        built on first use. For k above the graph's degree, the index is
+        scanned with the paper's stored vector instead.
 
-        return len(papers)
+        Args:
+            paper_id: Index key of the paper: its id or paperId
+            k: Number of related papers to return
+
+        Returns:
+            List of dicts with paper metadata and relevance scores,
+            sorted by score descending
+
+        Raises:
+            ValueError: If no papers are indexed or the paper is not
+        """
+        index = self._load_index()
+        if index is None or len(index) == 0:
+            raise ValueError("Papers not indexed. Run index_papers first.")
+
+        graph = self._load_graph(index)
+        if graph is None:
+            self.build_knn_graph()
+            index = self._load_index()
+            graph = self._load_graph(index)
+        row = graph.row(paper_id)
+        if row is None:
+            raise ValueError(f"Paper not indexed: {paper_id}")
+
+        if k <= graph.degree:
+            rows, scores = graph.neighbors_of(row, k)
+        else:
+            found, similarities = index.search_many(index.get_vectors([row]), k + 1)
+            other = found[0] != row
+            rows, scores = found[0][other][:k], similarities[0][other][:k]
+        return [
+            {**metadata, "relevance_score": float(score)}
+            for metadata, score in zip(index.metadata(rows.tolist()), scores.tolist())
+        ]
+
+    def find_duplicates(
+        self,
+        papers: list[dict[str, Any]],
+        threshold: float = DEFAULT_THRESHOLD,
+        bits: int = DEFAULT_BITS,
+        tables: int = DEFAULT_TABLES,
+    ) -> list[list[int]]:
+        """Cluster near-duplicate papers by their stored embeddings and titles.
+
+        Papers are looked up in the index by key; ones that are not indexed
+        are matched by normalized title only (see dedup.py).
+
+        Args:
+            papers: Paper records, e.g. the contents of papers.json
+            threshold: Cosine similarity at which two papers are duplicates
+            bits: Signs per LSH band
+            tables: LSH bands
+
+        Returns:
+            Clusters of at least two positions in papers
+        """
+        index = self._load_index()
+        entries = index.entries() if index is not None else {}
+        rows = np.array(
+            [entries.get(_paper_keys(paper)[0], (-1,))[0] if "title" in paper else -1
+             for paper in papers],
+            dtype=np.int64,
+        )
+        return cluster_duplicates(
+            [paper.get("title", "") for paper in papers],
+            rows,
+            index.get_vectors if index is not None else None,
+            threshold=threshold,
+            bits=bits,
+            tables=tables,
+        )
+
+    def index_passages(
+        self,
+        source_dir: Path | None = None,
+        papers: list[dict[str, Any]] | None = None,
+        window: int = DEFAULT_WINDOW,
+        overlap: int = DEFAULT_OVERLAP,
+        workers: int = 1,
+    ) -> dict[str, Any]:
+        """Index passages of the full texts under source_dir.
+
+        PDFs, markdown and text files are cut into overlapping token windows
+        (see passage_index.py) and embedded into a separate index. Only new
+        or changed files are read and embedded; rows of changed and deleted
+        files are tombstoned. Files are committed PASSAGE_FILE_BATCH at a
+        time, so an interrupted build keeps the batches it finished.
+
+        Args:
+            source_dir: Directory searched recursively (default: literature/)
+            papers: Corpus papers, used to attribute files to papers
+            window: Tokens per passage
+            overlap: Tokens shared by consecutive passages
+            workers: Encoder processes
+
+        Returns:
+            Dict with files (total), added, updated, removed and unchanged
+            file counts, passages (live rows) and errors (unreadable files)
+
+        Raises:
+            FileNotFoundError: If source_dir does not exist
+            ValueError: If overlap is not smaller than window
+        """
+        source_dir = source_dir or self.project_root / "literature"
+        if not source_dir.is_dir():
+            raise FileNotFoundError(f"Full-text directory not found: {source_dir}")
+        if not 0 <= overlap < window:
+            raise ValueError("Overlap must be at least 0 and smaller than the window")
+
+        directory = self.index_dir / PASSAGES_DIR
+        if self._passages is not None:
+            self._passages.close()
+            self._passages = None
+
+        # Other chunking or another model invalidates every passage
+        settings = {"model": self.model_id, "window": window, "overlap": overlap}
+        index = VectorIndex(directory)
+        manifest = load_files_manifest(directory)
+        if index.exists() and manifest.get("settings") == settings:
+            index.open()
+        else:
+            index.remove()
+            manifest = {"settings": settings, "files": {}}
+
+        documents = {path.relative_to(source_dir).as_posix(): path
+                     for path in iter_documents(source_dir)}
+        files: dict[str, Any] = manifest["files"]
+        stats: dict[str, Any] = {"files": len(documents), "added": 0, "updated": 0,
+                                 "removed": 0, "unchanged": 0, "errors": []}
+        changed = []
+        for name, path in documents.items():
+            if name not in files:
+                stats["added"] += 1
+            elif files[name] != fingerprint(path):
+                stats["updated"] += 1
+            else:
+                stats["unchanged"] += 1
+                continue
+            changed.append(name)
+        removed = [name for name in files if name not in documents]
+        stats["removed"] = len(removed)
+
+        def rows_by_file() -> dict[str, list[int]]:
+            rows: dict[str, list[int]] = {}
+            for key, (row, _, _) in (index.entries() if index.segments else {}).items():
+                rows.setdefault(key.rsplit("#", 1)[0], []).append(row)
+            return rows
+
+        existing = rows_by_file()
+        deleted = [row for name in removed for row in existing.get(name, [])]
+        for name in removed:
+            del files[name]
+
+        def commit(texts: list[str], metadata: list[dict[str, Any]],
+                   keys: list[tuple[str, str, str]]) -> None:
+            nonlocal deleted, existing
+            if not index.segments:
+                if texts:
+                    index.write(self._encode_cached(texts, workers), metadata,
+                                self.model_id, keys=keys)
+                    index.open()
+            elif texts or deleted:
+                vectors = np.zeros((0, int(index.manifest["dim"])), dtype=np.float32)
+                if texts:
+                    vectors = self._encode_cached(texts, workers)
+                if index.append(vectors, metadata, keys, deleted):
+                    existing = rows_by_file()
+            deleted = []
+            directory.mkdir(parents=True, exist_ok=True)
+            save_files_manifest(directory, manifest)
+
+        owners = DocumentOwners(papers or [])
+        for batch in batched(changed, self.PASSAGE_FILE_BATCH):
+            texts: list[str] = []
+            metadata: list[dict[str, Any]] = []
+            keys: list[tuple[str, str, str]] = []
+            for name in batch:
+                path = documents[name]
+                deleted.extend(existing.get(name, []))
+                files.pop(name, None)
+                try:
+                    pages = read_pages(path)
+                except Exception as e:
+                    stats["errors"].append({"path": name, "error": str(e)})
+                    continue
+
+                paper = owners.match(path, pages)
+                owner = {
+                    "paper_id": (paper.get("id") or paper.get("paperId")) if paper else name,
+                    "title": paper.get("title", "") if paper else path.stem,
+                    "path": _display_path(path, self.project_root),
+                }
+                for chunk in chunk_pages(pages, window, overlap):
+                    texts.append(chunk["text"])
+                    metadata.append({**owner, **chunk})
+                    keys.append((
+                        f"{name}#{chunk['chunk']}",
+                        _digest(chunk["text"]),
+                        _digest(f"{owner['paper_id']}\x1f{owner['title']}\x1f{chunk['page']}"),
+                    ))
+                files[name] = fingerprint(path)
+            commit(texts, metadata, keys)
+
+        if deleted or not changed:
+            commit([], [], [])
+
+        stats["passages"] = len(index) if index.segments else 0
+        self._passages = index if index.segments else None
+        return stats
+
+    def query_passages(
+        self, query_text: str, k: int = 5, passages_per_paper: int = 3
+    ) -> list[dict[str, Any]]:
+        """Find the papers whose full texts best match a query.
+
+        Passages are ranked by cosine similarity and grouped per paper, so
+        a paper with many matching passages still takes one result slot.
+
+        Args:
+            query_text: Natural language search query
+            k: Number of papers to return
+            passages_per_paper: Best passages returned per paper
+
+        Returns:
+            List of dicts with paper_id, title, path, relevance_score (best
+            passage) and passages (page, chunk, text, relevance_score)
+        """
+        index = self._load_passages()
+        if index is None or len(index) == 0:
+            return []
 
-    def query(self, query_text: str, k: int = 5) -> list[dict[str, Any]]:
+        depth = min(k * max(passages_per_paper, 1) * self.PASSAGE_DEPTH, len(index))
+        rows, scores = index.search_many(self._encode_queries([query_text]), depth)
+        found = [(row, score) for row, score in zip(rows[0].tolist(), scores[0].tolist())
+                 if np.isfinite(score)]
+        metadata = index.metadata([row for row, _ in found])
+        hits = [{**meta, "relevance_score": float(score)}
+                for meta, (_, score) in zip(metadata, found)]
+        return group_by_paper(hits, k, passages_per_paper)
+
+    def _load_passages(self) -> VectorIndex | None:
+        """Open the passage index, if one has been built."""
+        if self._passages is None:
+            index = VectorIndex(self.index_dir / PASSAGES_DIR)
+            if not index.exists():
+                return None
+            self._passages = index.open()
+        return self._passages
+
+    def _encode(self, texts: list[str], workers: int = 1) -> np.ndarray:
+        """Embed texts as a float32 matrix."""
+        if workers == 1 and len(texts) < self.CHUNKED_ENCODE_MIN:
+            model = self._load_model()
+            embeddings = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+            return np.asarray(embeddings, dtype=np.float32)
+
+        encoder = ChunkedEncoder(
+            self.model_name,
+            workers=workers,
+            checkpoint_dir=self.index_dir / "encode-chunks",
+            progress=_log_progress,
+            loader=self._loader(),
+            model=self._load_model() if workers == 1 else None,
+            identity=self.model_id,
+        )
+        return encoder.encode(texts)
+
+    def _encode_cached(self, texts: list[str], workers: int = 1) -> np.ndarray:
+        """Embed texts, encoding only those missing from the embedding cache.
+
+        The cache is an optimization: if it cannot be read or written (e.g.
+        a read-only home directory), every text is encoded.
+        """
+        try:
+            cached = self.embedding_cache.get_many(self.model_id, texts)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Embedding cache unavailable: {e}")
+            return self._encode(texts, workers)
+
+        missing = [i for i in range(len(texts)) if i not in cached]
+        if not missing:
+            return np.stack([cached[i] for i in range(len(texts))])
+
+        encoded = self._encode([texts[i] for i in missing], workers)
+        try:
+            self.embedding_cache.put_many(self.model_id, [texts[i] for i in missing], encoded)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Embedding cache not updated: {e}")
+
+        embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[missing] = encoded
+        for i, vector in cached.items():
+            embeddings[i] = vector
+        return embeddings
+
+    def _encode_queries(self, query_texts: list[str]) -> np.ndarray:
+        """Embed queries, running the model only for ones not seen recently."""
+        cached = [self.query_cache.get(text) for text in query_texts]
+        missing = list(
+            dict.fromkeys(text for text, vector in zip(query_texts, cached) if vector is None)
+        )
+        if missing:
+            if self.persist_queries:
+                encoded = self._encode_cached(missing)
+            else:
+                encoded = self._encode(missing)
+            for text, vector in zip(missing, encoded):
+                self.query_cache.put(text, vector)
+            fresh = dict(zip(missing, encoded))
+            cached = [fresh[text] if vector is None else vector
+                      for text, vector in zip(query_texts, cached)]
+        return np.stack(cached)
+
+    def _close_index(self) -> None:
+        """Drop the in-memory index handle and its maps."""
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        self._ann = None
+        self._lexical = None
+        self._columns = None
+        self._graph = None
+        if self._scratch is not None:
+            self._scratch.cleanup()
+            self._scratch = None
+
+    def _scratch_dir(self) -> Path:
+        """Private directory for derived indexes the published generation lacks.
+
+        Published generations are never modified, so a generation written
+        before a derived index existed gets a copy only this process uses,
+        until the next update writes one into a new generation. Deleted
+        when the generation is closed.
+        """
+        if self._scratch is None:
+            self._scratch = tempfile.TemporaryDirectory(
+                prefix="polyhedra-derived-", ignore_cleanup_errors=True
+            )
+        return Path(self._scratch.name)
+
+    def _build_derived(
+        self, directory: Path, index: VectorIndex | ShardedIndex, graph: bool = False
+    ) -> None:
+        """Rebuild the BM25 index and metadata columns in directory if index rows changed.
+
+        A k-NN graph in directory is updated as well, or built when graph is
+        set (after a full rebuild, which does not inherit the old one).
+        """
+        for derived in (BM25Index(directory), MetadataColumns(directory)):
+            if derived.exists():
+                derived.open()
+            if not derived.covers(index):
+                derived.build(index)
+
+        knn = KNNGraph(directory)
+        if knn.exists():
+            knn.open()
+        if (graph or knn.manifest) and not knn.covers(index):
+            knn.update(index)
+
+    def _load_lexical(self, index: VectorIndex | ShardedIndex) -> BM25Index:
+        """Open the BM25 index, building a private one if the generation has none that fits."""
+        if self._lexical is None or not self._lexical.covers(index):
+            lexical = BM25Index(self._index_path)
+            if not lexical.exists() or not lexical.open().covers(index):
+                lexical = BM25Index(self._scratch_dir())
+                lexical.build(index)
+            self._lexical = lexical
+        return self._lexical
+
+    def _load_columns(self, index: VectorIndex | ShardedIndex) -> MetadataColumns:
+        """Open the metadata columns, building private ones if the generation lacks fitting ones."""
+        if self._columns is None or not self._columns.covers(index):
+            columns = MetadataColumns(self._index_path)
+            if not columns.exists() or not columns.open().covers(index):
+                columns = MetadataColumns(self._scratch_dir())
+                columns.build(index)
+            self._columns = columns
+        return self._columns
+
+    def _load_graph(self, index: VectorIndex | ShardedIndex) -> KNNGraph | None:
+        """Open the k-NN graph, or None if the published generation has none that fits."""
+        if self._graph is None or not self._graph.covers(index):
+            graph = KNNGraph(self._index_path)
+            if not graph.exists() or not graph.open().covers(index):
+                return None
+            self._graph = graph
+        return self._graph
+
+    def query(
+        self,
+        query_text: str,
+        k: int = 5,
+        nprobe: int | None = None,
+        exact: bool = False,
+        mode: str = "dense",
+        prefilter: bool = False,
+        filters: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
         """Query indexed papers with semantic search.
 
         Args:
             query_text: Natural language search query
             k: Number of top results to return
+            nprobe: Lists scanned when an ANN index exists (default: its setting)
+            exact: Scan every vector even if an ANN index exists
+            mode: "dense" (embeddings), "lexical" (BM25) or "hybrid" (both,
+                fused by reciprocal rank)
+            prefilter: Only consider papers sharing a term with the query
+            filters: Metadata filters applied before scoring: year_min,
+                year_max, venues, min_citations, authors (see query_many)
 
         Returns:
             List of dicts with paper metadata and relevance scores,
             sorted by score descending
 
         Raises:
-            ValueError: If no papers are indexed
+            ValueError: If mode or a filter is unknown
+        """
+        return self.query_many(
+            [query_text],
+            k=k,
+            nprobe=nprobe,
+            exact=exact,
+            mode=mode,
+            prefilter=prefilter,
+            filters=filters,
+        )[0]
+
+    def query_many(
+        self,
+        query_texts: list[str],
+        k: int = 5,
+        nprobe: int | None = None,
+        exact: bool = False,
+        mode: str = "dense",
+        prefilter: bool = False,
+        filters: dict[str, Any] | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """Query indexed papers with several queries at once.
+
+        All queries are encoded in one batch and scored against the index
+        with one matrix-matrix product per block of rows, or through the
+        ANN index when one has been built.
+
+        mode="lexical" ranks by BM25 over titles and abstracts, which finds
+        exact terms such as method names and dataset acronyms. mode="hybrid"
+        fuses the dense and BM25 rankings by reciprocal rank; its
+        relevance_score is the fused score.
+
+        With prefilter, only papers containing at least one query term are
+        scored, which skips most of the dense work for selective queries.
+
+        filters restrict results by metadata, e.g. {"year_min": 2020,
+        "year_max": 2024, "venues": ["NeurIPS"]}. They are evaluated on
+        column arrays (see metadata_columns.py) into a row mask before
+        scoring, so selective filters read only the matching vectors.
+        venues and authors (Semantic Scholar IDs or names) match any of
+        the given values, case-insensitively.
+
+        Args:
+            query_texts: Natural language search queries
+            k: Number of top results to return per query
+            nprobe: Lists scanned when an ANN index exists (default: its setting)
+            exact: Scan every vector even if an ANN index exists
+            mode: "dense", "lexical" or "hybrid"
+            prefilter: Only consider papers sharing a term with the query
+            filters: Metadata filters: year_min, year_max, venues,
+                min_citations, authors
+
+        Returns:
+            One result list per query, in the format of query()
+
+        Raises:
+            ValueError: If mode or a filter is unknown
         """
+        if mode not in self.QUERY_MODES:
+            raise ValueError(f"Unknown query mode: {mode}. Use one of: {', '.join(self.QUERY_MODES)}")
         index = self._load_index()
         
-        if len(index["embeddings"]) == 0:
+        if not query_texts:
             return []
+        if index is None or len(index) == 0:
+            return [[] for _ in query_texts]
 
-        model = self._load_model()
-        
-        # Generate query embedding
-        query_embedding = model.encode([query_text], convert_to_numpy=True)[0]
+        mask = self._load_columns(index).mask(filters) if filters else None
+        if mode == "lexical":
+            rows, scores = self._load_lexical(index).search_many(query_texts, k, mask=mask)
+        else:
+            depth = k * self.HYBRID_DEPTH if mode == "hybrid" else k
+            rows, scores = self._dense_search(
+                index, query_texts, depth, nprobe, exact, prefilter, mask
+            )
+            if mode == "hybrid":
+                lexical = self._load_lexical(index).search_many(query_texts, depth, mask=mask)
+                rows, scores = reciprocal_rank_fusion([(rows, scores), lexical], k)
 
-        # Calculate cosine similarities
-        embeddings = index["embeddings"]
-        similarities = np.dot(embeddings, query_embedding) / (
-            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
-        )
+        # Read metadata once per distinct row
+        unique_rows = sorted(set(rows[np.isfinite(scores)].tolist()))
+        metadata = dict(zip(unique_rows, index.metadata(unique_rows)))
 
-        # Get top-k indices
-        top_k = min(k, len(similarities))
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-
-        # Build results
         results = []
-        for idx in top_indices:
-            result = index["metadata"][idx].copy()
-            result["relevance_score"] = float(similarities[idx])
-            results.append(result)
+        for query_rows, query_scores in zip(rows.tolist(), scores.tolist()):
+            results.append(
+                [
+                    {**metadata[row], "relevance_score": float(score)}
+                    for row, score in zip(query_rows, query_scores)
+                    if np.isfinite(score)
+                ]
+            )
 
         return results
+
+    def _dense_search(
+        self,
+        index: VectorIndex | ShardedIndex,
+        query_texts: list[str],
+        k: int,
+        nprobe: int | None,
+        exact: bool,
+        prefilter: bool,
+        mask: np.ndarray | None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Cosine similarity of the queries against live rows.
+
+        With prefilter or a selective filter mask, only the allowed rows are
+        read and scored exactly; broader masks skip rows during a full scan.
+        Without either, the whole index (or its ANN index) is searched.
+        """
+        query_embeddings = index.project(self._encode_queries(query_texts))
+        if prefilter:
+            lexical = self._load_lexical(index)
+            rows = np.zeros((len(query_texts), k), dtype=np.int64)
+            scores = np.full((len(query_texts), k), -np.inf, dtype=np.float32)
+            for i, text in enumerate(query_texts):
+                candidates = lexical.matches(text)
+                if mask is not None:
+                    candidates = candidates[mask[candidates]]
+                found, similarities = index.search_rows(query_embeddings[i : i + 1], candidates, k)
+                rows[i, : found.shape[1]] = found[0]
+                scores[i, : found.shape[1]] = similarities[0]
+            return rows, scores
+
+        if mask is not None:
+            allowed = np.flatnonzero(mask)
+            if len(allowed) < self.GATHER_FRACTION * len(index):
+                return index.search_rows(query_embeddings, allowed, k)
+            return index.search_many(query_embeddings, k, allowed=mask)
+        if self._ann is not None and not exact and self._ann.covers(index):
+            return self._ann.search_many(index, query_embeddings, k, nprobe=nprobe)
+        return index.search_many(query_embeddings, k)
+
+
+def _paper_text(paper: dict[str, Any]) -> str:
+    """Text that is embedded for a paper (title + abstract)."""
+    return f"{paper.get('title', '')}. {paper.get('abstract', '')}".strip()
+
+
+def _paper_metadata(paper: dict[str, Any]) -> dict[str, Any]:
+    """Metadata stored for retrieval."""
+    return {
+        "id": paper.get("id", ""),
+        "title": paper.get("title", ""),
+        "abstract": paper.get("abstract", ""),
+        "authors": paper.get("authors", []),
+        "year": paper.get("year", ""),
+        "bibtex_key": paper.get("bibtex_key", ""),
+        "venue": paper.get("venue", ""),
+        "citationCount": paper.get("citationCount", 0),
+    }
+
+
+def _paper_keys(paper: dict[str, Any]) -> tuple[str, tuple[str, str, str]]:
+    """Index key of a paper and its (key, content hash, metadata hash) row key."""
+    key = paper.get("id") or paper.get("paperId") or f"title:{paper['title'].lower()}"
+    extra = (
+        f"{paper.get('id', '')}\x1f{paper.get('authors', [])!r}"
+        f"\x1f{paper.get('year', '')}\x1f{paper.get('bibtex_key', '')}"
+        f"\x1f{paper.get('venue', '')}\x1f{paper.get('citationCount', 0)}"
+    )
+    return key, (key, _digest(_paper_text(paper)), _digest(extra))
+
+
+def _display_path(path: Path, root: Path) -> str:
+    """Path relative to root when inside it, else absolute."""
+    return path.relative_to(root).as_posix() if path.is_relative_to(root) else str(path)
+
+
+def _log_progress(done: int, total: int) -> None:
+    """Log the progress of a chunked encode."""
+    logger.info(f"Embedded {done}/{total} papers")
+
+
+def _digest(text: str) -> str:
+    """Short content hash used to detect changed papers."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
@@ -0,0 +1,211 @@
+"""Saved searches with incremental (delta-only) polling."""
+
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from polyhedra.services.citation_graph import paper_key
+from polyhedra.services.semantic_scholar import SemanticScholarService
+
+
+class SavedSearchService:
+    """Registry of saved queries that are re-run only for new papers.
+
+    Each saved search lives in .poly/searches/<slug>.json together with a
+    watermark: the latest publication date seen so far. Polling asks the API
+    only for papers published on or after the watermark and appends the ones
+    not already in the corpus to papers.json.
+
+    Results come in relevance order, not by date, so the watermark only
+    advances when every page was fetched. A poll cut off at MAX_PAGES keeps
+    the old watermark and is reported as truncated: moving it would skip
+    older matches on the pages never fetched.
+    """
+
+    PAGE_SIZE = 100
+    MAX_PAGES = 5
+
+    def __init__(
+        self,
+        project_root: Path,
+        semantic_scholar: SemanticScholarService | None = None,
+    ):
+        """Initialize saved search service.
+
+        Args:
+            project_root: Root directory of the project
+            semantic_scholar: Service used to run the searches
+        """
+        self.project_root = project_root
+        self.semantic_scholar = semantic_scholar
+        self.searches_dir = project_root / ".poly" / "searches"
+
+    def _path(self, name: str) -> Path:
+        """Return the registry file for a search name."""
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+        if not slug:
+            raise ValueError("Search name must contain letters or digits")
+        return self.searches_dir / f"{slug}.json"
+
+    def save_search(
+        self,
+        name: str,
+        query: str,
+        fields_of_study: list[str] | None = None,
+        since: str | None = None,
+    ) -> dict[str, Any]:
+        """Create or update a saved search.
+
+        Updating keeps the existing watermark unless since is given.
+
+        Args:
+            name: Unique name of the search
+            query: Search query string
+            fields_of_study: Optional fields of study filter
+            since: Initial watermark (YYYY-MM-DD); None backfills on first poll
+
+        Returns:
+            The stored search record
+
+        Raises:
+            ValueError: If name or query is empty
+        """
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty")
+
+        path = self._path(name)
+        existing = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+        search = {
+            "name": name,
+            "query": query,
+            "fields_of_study": fields_of_study or [],
+            "watermark": since or existing.get("watermark"),
+            "created": existing.get("created", datetime.now().isoformat(timespec="seconds")),
+            "last_run": existing.get("last_run"),
+            "total_added": existing.get("total_added", 0),
+        }
+        self._write(path, search)
+        return search
+
+    def list_searches(self) -> list[dict[str, Any]]:
+        """Return all saved searches sorted by name."""
+        if not self.searches_dir.exists():
+            return []
+        searches = [
+            json.loads(path.read_text(encoding="utf-8"))
+            for path in self.searches_dir.glob("*.json")
+        ]
+        return sorted(searches, key=lambda search: search["name"])
+
+    async def poll(
+        self,
+        papers_file: Path,
+        names: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Fetch papers newer than each search's watermark into the corpus.
+
+        Args:
+            papers_file: Corpus file new papers are appended to
+            names: Searches to poll (default: all)
+
+        Returns:
+            Dict with per-search results and the total number of papers added
+
+        Raises:
+            RuntimeError: If no Semantic Scholar service is configured
+            ValueError: If a named search does not exist
+        """
+        if self.semantic_scholar is None:
+            raise RuntimeError("Semantic Scholar service is required to poll searches")
+
+        searches = self.list_searches()
+        if names:
+            known = {search["name"] for search in searches}
+            unknown = [name for name in names if name not in known]
+            if unknown:
+                raise ValueError(f"Unknown saved searches: {', '.join(unknown)}")
+            searches = [search for search in searches if search["name"] in names]
+
+        papers = []
+        if papers_file.exists():
+            papers = json.loads(papers_file.read_text(encoding="utf-8"))
+        seen = {paper_key(paper) for paper in papers}
+
+        results = []
+        for search in searches:
+            hits, complete = await self._fetch_since(self.semantic_scholar, search)
+
+            added = 0
+            for paper in hits:
+                key = paper_key(paper)
+                if key and key not in seen:
+                    seen.add(key)
+                    papers.append(paper)
+                    added += 1
+
+            watermark = search["watermark"]
+            if complete:
+                dates = [paper["publicationDate"] for paper in hits if paper.get("publicationDate")]
+                watermark = max([watermark or "", *dates]) or None
+
+            search.update(
+                watermark=watermark,
+                last_run=datetime.now().isoformat(timespec="seconds"),
+                total_added=search["total_added"] + added,
+            )
+            self._write(self._path(search["name"]), search)
+            results.append(
+                {
+                    "name": search["name"],
+                    "fetched": len(hits),
+                    "added": added,
+                    "watermark": watermark,
+                    "truncated": not complete,
+                }
+            )
+
+        new_total = sum(result["added"] for result in results)
+        if new_total:
+            _write_json(papers_file, papers)
+
+        return {"searches": results, "added": new_total, "corpus_size": len(papers)}
+
+    async def _fetch_since(
+        self, semantic_scholar: SemanticScholarService, search: dict[str, Any]
+    ) -> tuple[list[dict], bool]:
+        """Page through results published on or after the watermark.
+
+        Returns:
+            The hits, and whether paging ran out before MAX_PAGES
+        """
+        hits: list[dict] = []
+
+        for page in range(self.MAX_PAGES):
+            batch = await semantic_scholar.search(
+                query=search["query"],
+                limit=self.PAGE_SIZE,
+                fields_of_study=search["fields_of_study"] or None,
+                published_since=search["watermark"],
+                offset=page * self.PAGE_SIZE,
+            )
+            hits.extend(batch)
+            if len(batch) < self.PAGE_SIZE:
+                return hits, True
+
+        return hits, False
+
+    def _write(self, path: Path, search: dict[str, Any]) -> None:
+        """Write a search record to the registry."""
+        _write_json(path, search)
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Write JSON under a temporary name, then rename it into place."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
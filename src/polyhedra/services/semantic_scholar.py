@@ -2,6 +2,7 @@
 
 import asyncio
 import re
+from typing import Any
 
 import httpx
 
@@ -14,6 +15,8 @@ class SemanticScholarService:
     BASE_URL = "https://api.semanticscholar.org/graph/v1"
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0  # seconds
+    BATCH_SIZE = 500  # max IDs per /paper/batch request
+    AUTOCOMPLETE_MAX_QUERY = 100  # autocomplete truncates longer queries
 
     def __init__(self, timeout: float = 30.0):
         """Initialize the service.
@@ -43,6 +46,8 @@ class SemanticScholarService:
         year_start: int | None = None,
         year_end: int | None = None,
         fields_of_study: list[str] | None = None,
+        published_since: str | None = None,
+        offset: int = 0,
     ) -> list[dict]:
         """Search for academic papers.
 
@@ -52,6 +57,9 @@ class SemanticScholarService:
             year_start: Start year for filtering (inclusive)
             year_end: End year for filtering (inclusive)
             fields_of_study: List of fields to filter by
+            published_since: Only papers published on or after this date
+                (YYYY-MM-DD, YYYY-MM or YYYY)
+            offset: Index of the first result, for paging
 
         Returns:
             List of paper dictionaries with metadata
@@ -71,13 +79,15 @@ class SemanticScholarService:
         # Build request parameters
         fields = (
             "paperId,title,authors,year,venue,abstract,citationCount,"
-            "fieldsOfStudy,url,openAccessPdf"
+            "fieldsOfStudy,url,openAccessPdf,publicationDate"
         )
         params = {
             "query": query,
             "limit": limit,
             "fields": fields,
         }
+        if offset:
+            params["offset"] = offset
 
         # Add year filter if provided
         if year_start is not None or year_end is not None:
@@ -89,6 +99,10 @@ class SemanticScholarService:
             if year_filter:
                 params["year"] = year_filter
 
+        # Open-ended date range; papers with only a year match by year
+        if published_since:
+            params["publicationDateOrYear"] = f"{published_since}:"
+
         # Add fields of study filter
         if fields_of_study:
             params["fieldsOfStudy"] = ",".join(fields_of_study)
@@ -207,6 +221,100 @@ class SemanticScholarService:
 
         return paper
 
+    async def autocomplete(self, query: str) -> list[str]:
+        """Get paper title completions for a partial query.
+
+        Args:
+            query: Partial query string
+
+        Returns:
+            Suggested paper titles
+
+        Raises:
+            ValueError: If query is empty
+        """
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty")
+
+        client = await self._get_client()
+        response = await self._request_with_retry(
+            client,
+            "GET",
+            f"{self.BASE_URL}/paper/autocomplete",
+            params={"query": query[: self.AUTOCOMPLETE_MAX_QUERY]},
+        )
+
+        matches = response.json().get("matches", [])
+        return [match["title"] for match in matches if match.get("title")]
+
+    async def get_references_batch(
+        self, paper_ids: list[str]
+    ) -> dict[str, list[dict]]:
+        """Get reference lists for many papers using the batch endpoint.
+
+        Args:
+            paper_ids: Semantic Scholar paper IDs
+
+        Returns:
+            Map of paper ID to its references (dicts with paperId and title).
+            References the API could not resolve to a paper ID are dropped.
+
+        Raises:
+            Exception: If the API keeps failing after retries
+        """
+        client = await self._get_client()
+        references: dict[str, list[dict]] = {}
+
+        for start in range(0, len(paper_ids), self.BATCH_SIZE):
+            chunk = paper_ids[start : start + self.BATCH_SIZE]
+            response = await self._request_with_retry(
+                client,
+                "POST",
+                f"{self.BASE_URL}/paper/batch",
+                params={"fields": "paperId,references.paperId,references.title"},
+                json={"ids": chunk},
+            )
+
+            # The batch endpoint answers in request order, with null for unknown IDs
+            for paper_id, paper in zip(chunk, response.json()):
+                if not paper:
+                    continue
+                references[paper_id] = [
+                    {"paperId": ref["paperId"], "title": ref.get("title") or ""}
+                    for ref in paper.get("references") or []
+                    if ref.get("paperId")
+                ]
+
+        return references
+
+    async def _request_with_retry(
+        self, client: httpx.AsyncClient, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        """Send a request, backing off on rate limits and transient errors."""
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                response = await client.request(method, url, **kwargs)
+
+                if response.status_code == 429:
+                    await asyncio.sleep(self.RETRY_DELAY * (2**attempt))
+                    continue
+
+                response.raise_for_status()
+                return response
+
+            except httpx.HTTPStatusError as e:
+                raise Exception(
+                    f"Semantic Scholar API error: {e.response.status_code} - {e.response.text}"
+                )
+
+            except httpx.HTTPError as e:
+                if attempt < self.MAX_RETRIES - 1:
+                    await asyncio.sleep(self.RETRY_DELAY)
+                    continue
+                raise Exception(f"HTTP error occurred: {str(e)}")
+
+        raise Exception(f"Failed after {self.MAX_RETRIES} retries due to rate limiting")
+
     def generate_bibtex(self, paper: dict) -> tuple[str, str]:
         """Generate BibTeX key and entry from paper metadata.
 
@@ -0,0 +1,334 @@
+"""Vector index split into independent shards.
+
+A sharded index directory holds shards.json and one VectorIndex per shard
+under shards/<name>/. Papers are assigned to a shard by a hash of their
+key (a fixed number of shards) or by publication year (one shard per
+year, created when the first paper of that year arrives). Each shard has
+its own segments and vector files, so adding or updating papers of one
+shard never rewrites the others' files.
+
+Queries scan the shards in a thread pool; NumPy releases the GIL during
+the matrix products, so large indexes use several cores. The per-shard
+top-k lists are merged with a heap.
+
+Rows are numbered globally by concatenating the shards in manifest order,
+so a sharded index can be searched and read like a single VectorIndex.
+These numbers are not stable: rows appended to a shard shift the global
+rows of every shard after it. Indexes keyed by global row (BM25, metadata
+columns, the k-NN graph) therefore do not cover an updated sharded index
+and are rebuilt with it rather than updated.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from polyhedra.services.quantization import MODES
+from polyhedra.services.vector_index import VectorIndex, top_k
+
+SHARDS_MANIFEST = "shards.json"
+SHARDS_FORMAT = "polyhedra-shards"
+SHARDS_VERSION = 1
+
+SHARD_KEYS = ("hash", "year")
+
+
+def shard_name(key: str, year: Any, by: str, count: int) -> str:
+    """Shard a paper belongs to.
+
+    Args:
+        key: Paper key (ID, or title for papers without one)
+        year: Publication year, as int or string
+        by: "hash" or "year"
+        count: Number of shards when sharding by hash
+
+    Returns:
+        Shard name, e.g. "hash-003" or "year-2019"
+    """
+    if by == "hash":
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        return f"hash-{int.from_bytes(digest, 'little') % count:03d}"
+    year = str(year or "")[:4]
+    return f"year-{year}" if year.isdigit() else "year-unknown"
+
+
+class ShardedIndex:
+    """Set of VectorIndex shards searched in parallel."""
+
+    SHARDS_DIR = "shards"
+
+    def __init__(self, directory: Path):
+        """Initialize index handle.
+
+        Args:
+            directory: Directory holding shards.json and the shards
+        """
+        self.directory = directory
+        self.manifest: dict[str, Any] = {}
+        self.shards: dict[str, VectorIndex] = {}
+        self.bases: dict[str, int] = {}
+        self._pool: ThreadPoolExecutor | None = None
+
+    def exists(self) -> bool:
+        """Check whether a sharded index of the current format is present."""
+        path = self.directory / SHARDS_MANIFEST
+        if not path.exists():
+            return False
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        return (
+            manifest.get("format") == SHARDS_FORMAT
+            and manifest.get("version") == SHARDS_VERSION
+        )
+
+    def open(self) -> "ShardedIndex":
+        """Read the manifest and map every shard.
+
+        Returns:
+            self, for chaining
+
+        Raises:
+            FileNotFoundError: If no sharded index exists
+        """
+        self.close()
+        self.manifest = json.loads((self.directory / SHARDS_MANIFEST).read_text(encoding="utf-8"))
+        base = 0
+        for name in self.manifest["shards"]:
+            shard = VectorIndex(self.shard_dir(name))
+            self.shards[name] = shard.open() if shard.exists() else shard
+            self.bases[name] = base
+            base += shard.total_rows if shard.manifest else 0
+        return self
+
+    @property
+    def by(self) -> str:
+        """Shard key: "hash" or "year"."""
+        return self.manifest.get("by", "hash")
+
+    @property
+    def count(self) -> int:
+        """Number of hash shards (0 when sharding by year)."""
+        return int(self.manifest.get("count", 0))
+
+    @property
+    def quantization(self) -> str:
+        """Compressed code scheme scanned by every shard."""
+        return self.manifest.get("quantization", "none")
+
+    @property
+    def dimensions(self) -> int:
+        """Always 0: shards store model embeddings without a projection."""
+        return 0
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Return query embeddings unchanged (see dimensions)."""
+        return np.asarray(vectors, dtype=np.float32)
+
+    def __len__(self) -> int:
+        """Number of live rows across shards."""
+        return sum(len(shard) for shard in self._open_shards())
+
+    @property
+    def total_rows(self) -> int:
+        """Number of stored rows across shards, including tombstoned ones."""
+        return sum(shard.total_rows for shard in self._open_shards())
+
+    def live_rows(self) -> np.ndarray:
+        """Global row numbers of the live rows, ascending."""
+        parts = [np.zeros(0, dtype=np.int64)]
+        parts.extend(
+            shard.live_rows() + self.bases[name]
+            for name, shard in self.shards.items() if shard.manifest
+        )
+        return np.concatenate(parts)
+
+    def shard_dir(self, name: str) -> Path:
+        """Directory of a shard's VectorIndex."""
+        return self.directory / self.SHARDS_DIR / name
+
+    def _open_shards(self) -> list[VectorIndex]:
+        return [shard for shard in self.shards.values() if shard.manifest]
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Find the live rows most similar to a query vector."""
+        rows, scores = self.search_many(np.asarray(query)[None, :], k)
+        return rows[0], scores[0]
+
+    def search_many(
+        self, queries: np.ndarray, k: int, allowed: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Scan all shards in parallel and merge their top-k lists.
+
+        Args:
+            queries: Query embeddings of shape (q, dim)
+            k: Number of rows to return per query
+            allowed: Boolean mask over all global rows; other rows are skipped
+
+        Returns:
+            Global rows and cosine similarities of shape (q, k'), best first
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, len(self))
+        shards = [(name, shard) for name, shard in self.shards.items() if shard.manifest]
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=max(1, min(len(shards), os.cpu_count() or 1)),
+                thread_name_prefix="polyhedra-shard",
+            )
+
+        def scan(item: tuple[str, VectorIndex]) -> tuple[np.ndarray, np.ndarray]:
+            name, shard = item
+            if allowed is None:
+                return shard.search_many(queries, k)
+            part = allowed[self.bases[name] : self.bases[name] + shard.total_rows]
+            return shard.search_many(queries, k, allowed=part)
+
+        partials = list(self._pool.map(scan, shards))
+
+        rows = np.zeros((len(queries), k), dtype=np.int64)
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for i in range(len(queries)):
+            # Each shard's list is sorted best first; merge them lazily
+            lists = [
+                zip((-shard_scores[i]).tolist(), (shard_rows[i] + self.bases[name]).tolist())
+                for (name, _), (shard_rows, shard_scores) in zip(shards, partials)
+            ]
+            for j, (negative, row) in enumerate(islice(heapq.merge(*lists), k)):
+                rows[i, j] = row
+                scores[i, j] = -negative
+        return rows, scores
+
+    def search_rows(
+        self, queries: np.ndarray, rows: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the most similar rows among a subset, shard by shard."""
+        queries = np.asarray(queries, dtype=np.float32)
+        rows = np.asarray(rows, dtype=np.int64)
+        k = min(k, len(rows))
+        row_parts = [np.zeros((len(queries), 0), dtype=np.int64)]
+        score_parts = [np.zeros((len(queries), 0), dtype=np.float32)]
+        for name, shard in self.shards.items():
+            if not shard.manifest:
+                continue
+            base = self.bases[name]
+            inside = rows[(rows >= base) & (rows < base + shard.total_rows)]
+            if len(inside):
+                shard_rows, shard_scores = shard.search_rows(queries, inside - base, k)
+                row_parts.append(shard_rows + base)
+                score_parts.append(shard_scores)
+
+        rows = np.concatenate(row_parts, axis=1)
+        scores = np.concatenate(score_parts, axis=1)
+        best = top_k(scores, k)
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def _locate(self, row: int) -> tuple[VectorIndex, int]:
+        """Map a global row to its shard and the shard's row."""
+        for name, shard in reversed(list(self.shards.items())):
+            if row >= self.bases[name] and shard.manifest:
+                return shard, row - self.bases[name]
+        raise IndexError(row)
+
+    def metadata(self, rows: list[int]) -> list[dict[str, Any]]:
+        """Read metadata for the given global rows, one read per shard."""
+        grouped: dict[int, tuple[VectorIndex, list[int], list[int]]] = {}
+        for position, row in enumerate(rows):
+            shard, local = self._locate(row)
+            entry = grouped.setdefault(id(shard), (shard, [], []))
+            entry[1].append(position)
+            entry[2].append(local)
+
+        records: list[dict[str, Any]] = [{}] * len(rows)
+        for shard, positions, local_rows in grouped.values():
+            for position, record in zip(positions, shard.metadata(local_rows)):
+                records[position] = record
+        return records
+
+    def get_vectors(self, rows: list[int] | np.ndarray) -> np.ndarray:
+        """Copy the vectors of the given global rows into memory."""
+        rows = np.asarray(rows, dtype=np.int64)
+        dim = next((int(shard.manifest["dim"]) for shard in self._open_shards()), 0)
+        out = np.empty((len(rows), dim), dtype=np.float32)
+        for name, shard in self.shards.items():
+            if not shard.manifest:
+                continue
+            inside = (rows >= self.bases[name]) & (rows < self.bases[name] + shard.total_rows)
+            if inside.any():
+                out[inside] = shard.get_vectors(rows[inside] - self.bases[name])
+        return out
+
+    def entries(self) -> dict[str, tuple[int, str, str]]:
+        """Map each live key to its global row, content hash and metadata hash."""
+        entries = {}
+        for name, shard in self.shards.items():
+            if shard.manifest:
+                for key, (row, content_hash, meta_hash) in shard.entries().items():
+                    entries[key] = (row + self.bases[name], content_hash, meta_hash)
+        return entries
+
+    def quantize(self, mode: str) -> None:
+        """Switch the compressed codes scanned by every shard.
+
+        Raises:
+            ValueError: If mode is unknown
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown quantization: {mode}. Use one of: {', '.join(MODES)}")
+        for shard in self._open_shards():
+            shard.quantize(mode)
+        self.save({**self.manifest, "quantization": mode})
+
+    def write_shard(
+        self,
+        name: str,
+        vectors: np.ndarray,
+        metadata: list[dict[str, Any]],
+        model_name: str,
+        keys: list[tuple[str, str, str]],
+    ) -> VectorIndex:
+        """Write a new shard, with the codes of the index's quantization.
+
+        The shard is not listed until the manifest is saved.
+        """
+        shard = VectorIndex(self.shard_dir(name))
+        shard.write(vectors, metadata, model_name, keys=keys)
+        shard.open()
+        if self.quantization != "none":
+            shard.quantize(self.quantization)
+        self.shards[name] = shard
+        return shard
+
+    def save(self, manifest: dict[str, Any]) -> None:
+        """Publish the manifest after the shards it lists are written."""
+        self.manifest = {"format": SHARDS_FORMAT, "version": SHARDS_VERSION, **manifest}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / SHARDS_MANIFEST
+        tmp = path.with_name(f".{SHARDS_MANIFEST}.tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def remove(self) -> None:
+        """Delete the sharded index (manifest first, so readers stop using it)."""
+        self.close()
+        (self.directory / SHARDS_MANIFEST).unlink(missing_ok=True)
+        shutil.rmtree(self.directory / self.SHARDS_DIR, ignore_errors=True)
+
+    def close(self) -> None:
+        """Drop the shard maps and stop the scan threads."""
+        for shard in self.shards.values():
+            shard.close()
+        self.shards = {}
+        self.bases = {}
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
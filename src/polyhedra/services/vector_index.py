@@ -0,0 +1,956 @@
+"""On-disk vector index format for semantic search.
+
+An index is a directory holding a manifest and a list of immutable
+segments. Each segment directory contains:
+
+- vectors.npy: float32 matrix of unit-length rows, opened memory-mapped
+- metadata.jsonl: one JSON object per row
+- metadata_offsets.npy: int64 byte offsets of each metadata line
+- keys.json: [key, content hash, metadata hash] per row
+- codes_int8.npy / codes_binary.npy: compressed copies of the vectors when
+  the index is quantized (see quantization.py)
+
+Rows are numbered globally in segment order. Updates append a segment and
+record replaced or removed rows in a tombstone array; compaction copies
+the live rows into a single new segment. Segments and tombstone files are
+written before the manifest that references them, so a reader never sees
+a manifest pointing at partial files.
+
+Vectors are normalized when written, so cosine similarity is a single
+matrix-vector product at query time. An index can be reduced to fewer
+dimensions by a PCA projection (see projection.py), stored beside the
+segments as projection-NNNNNN.npz; rows appended later and queries must
+then be mapped through project() first.
+
+Opening an index only parses the manifest and maps the arrays, so load
+time does not grow with the corpus and the OS shares the pages between
+server processes. Nothing is unpickled.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import numpy as np
+from numpy.lib.format import dtype_to_descr, open_memmap, write_array_header_1_0
+
+from polyhedra.services.projection import SAMPLE_ROWS, apply_pca, fit_pca
+from polyhedra.services.quantization import (
+    MODES,
+    hamming_distances,
+    int8_scale,
+    int8_scores,
+    quantize_binary,
+    quantize_int8,
+)
+
+FORMAT_NAME = "polyhedra-vectors"
+FORMAT_VERSION = 3
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale vectors (or rows of a matrix) to unit length; zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.ascontiguousarray(vectors / np.where(norms == 0, 1, norms), dtype=np.float32)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores along the last axis, best first.
+
+    argpartition selects the candidates in linear time, so only k values
+    are sorted instead of the whole array. Works on a score vector or on a
+    matrix with one row of scores per query.
+    """
+    n = scores.shape[-1]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(scores, n - k, axis=-1)[..., n - k :]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape).copy()
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=-1), axis=-1)[..., ::-1]
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+class NpyAppender:
+    """Appends rows to a .npy file whose final length is not known up front.
+
+    The header is first written for a placeholder row count and rewritten
+    in place on close. NumPy pads headers to a multiple of 64 bytes, so
+    the real header fits in the placeholder's space.
+    """
+
+    PLACEHOLDER_ROWS = 10**15
+
+    def __init__(self, path: Path, dtype: type, width: int | None = None):
+        """Open path for writing.
+
+        Args:
+            path: File to create
+            dtype: Element type
+            width: Row length of a 2D array; None for a 1D array
+        """
+        self.dtype = np.dtype(dtype)
+        self.width = width
+        self.rows = 0
+        self.file = open(path, "wb")
+        self._write_header(self.PLACEHOLDER_ROWS)
+        self.data_start = self.file.tell()
+
+    def _write_header(self, rows: int) -> None:
+        shape = (rows,) if self.width is None else (rows, self.width)
+        header = {"descr": dtype_to_descr(self.dtype), "fortran_order": False, "shape": shape}
+        write_array_header_1_0(self.file, header)
+
+    def append(self, array: np.ndarray) -> None:
+        """Write rows at the end of the file."""
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        self.file.write(array.tobytes())
+        self.rows += len(array)
+
+    def close(self) -> None:
+        """Record the final row count in the header."""
+        self.file.seek(0)
+        self._write_header(self.rows)
+        if self.file.tell() != self.data_start:
+            raise RuntimeError("NumPy header size changed while finalizing")
+        self.file.close()
+
+
+def key_hash(key: str) -> int:
+    """64-bit hash of a row key, for finding repeated keys."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@dataclass
+class Segment:
+    """An open, memory-mapped segment."""
+
+    name: str
+    start: int
+    vectors: np.ndarray
+    offsets: np.ndarray
+    codes: np.ndarray | None = None
+    scale: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+
+class VectorIndex:
+    """Read and write access to a vector index directory."""
+
+    MANIFEST = "manifest.json"
+    VECTORS = "vectors.npy"
+    METADATA = "metadata.jsonl"
+    OFFSETS = "metadata_offsets.npy"
+    KEYS = "keys.json"
+    CODES = {"int8": "codes_int8.npy", "binary": "codes_binary.npy"}
+    SCALE = "codes_int8_scale.npy"
+
+    # Compact once this share of rows is dead, or there are too many segments
+    COMPACT_RATIO = 0.2
+    MAX_SEGMENTS = 16
+
+    # Rows scored per matrix product; bounds the score buffer for many queries
+    SCAN_BLOCK = 65536
+    CODE_BLOCK = 16384
+
+    # Quantized scans shortlist this many candidates per result for rescoring
+    RESCORE_FACTOR = {"int8": 4, "binary": 16}
+
+    def __init__(self, directory: Path):
+        """Initialize index handle.
+
+        Args:
+            directory: Directory containing the index files
+        """
+        self.directory = directory
+        self.manifest: dict[str, Any] = {}
+        self.segments: list[Segment] = []
+        self.tombstones = np.zeros(0, dtype=np.int64)
+        self.projection: tuple[np.ndarray, np.ndarray] | None = None
+
+    def exists(self) -> bool:
+        """Check whether a readable index of the current format is present."""
+        path = self.directory / self.MANIFEST
+        if not path.exists():
+            return False
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return False
+        return (
+            manifest.get("format") == FORMAT_NAME
+            and manifest.get("version") == FORMAT_VERSION
+        )
+
+    def open(self) -> "VectorIndex":
+        """Memory-map the index files.
+
+        Returns:
+            self, for chaining
+
+        Raises:
+            FileNotFoundError: If no index of the current format exists
+        """
+        if not self.exists():
+            raise FileNotFoundError(f"No vector index in {self.directory}")
+
+        self.manifest = json.loads((self.directory / self.MANIFEST).read_text(encoding="utf-8"))
+        self.segments = []
+        start = 0
+        mode = self.quantization
+        for entry in self.manifest["segments"]:
+            path = self.directory / entry["name"]
+            segment = Segment(
+                name=entry["name"],
+                start=start,
+                vectors=np.load(path / self.VECTORS, mmap_mode="r"),
+                offsets=np.load(path / self.OFFSETS, mmap_mode="r"),
+            )
+            if mode != "none":
+                segment.codes = np.load(path / self.CODES[mode], mmap_mode="r")
+            if mode == "int8":
+                segment.scale = np.load(path / self.SCALE)
+            self.segments.append(segment)
+            start += len(segment)
+
+        tombstones = self.manifest.get("tombstones")
+        self.tombstones = (
+            np.load(self.directory / tombstones)
+            if tombstones
+            else np.zeros(0, dtype=np.int64)
+        )
+        self.projection = None
+        if self.manifest.get("projection"):
+            with np.load(self.directory / self.manifest["projection"]) as stored:
+                self.projection = (stored["mean"], stored["components"])
+        return self
+
+    def __len__(self) -> int:
+        """Number of live rows."""
+        return int(self.manifest.get("count", 0))
+
+    @property
+    def quantization(self) -> str:
+        """Compressed code scheme scanned by searches ("none", "int8" or "binary")."""
+        return self.manifest.get("quantization", "none")
+
+    @property
+    def dimensions(self) -> int:
+        """Dimensions the vectors were reduced to, 0 if they are model embeddings."""
+        return int(self.manifest["dim"]) if self.manifest.get("projection") else 0
+
+    @property
+    def total_rows(self) -> int:
+        """Number of stored rows, including tombstoned ones."""
+        return sum(len(segment) for segment in self.segments)
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Map model embeddings (e.g. queries) into the space of the stored vectors.
+
+        Unchanged when the index is not reduced or vectors already have
+        the stored dimension.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.projection is None or vectors.shape[-1] == int(self.manifest["dim"]):
+            return vectors
+        return normalize(apply_pca(vectors, *self.projection))
+
+    def live_rows(self) -> np.ndarray:
+        """Global row numbers of the live rows, ascending."""
+        return np.setdiff1d(np.arange(self.total_rows, dtype=np.int64), self.tombstones)
+
+    def live_mask(self, segment: Segment) -> np.ndarray | None:
+        """Boolean mask of live rows in a segment, or None if all are live."""
+        lo, hi = np.searchsorted(self.tombstones, [segment.start, segment.start + len(segment)])
+        if lo == hi:
+            return None
+        mask = np.ones(len(segment), dtype=bool)
+        mask[self.tombstones[lo:hi] - segment.start] = False
+        return mask
+
+    def _scan_mask(self, segment: Segment, allowed: np.ndarray | None) -> np.ndarray | None:
+        """Live rows of a segment that are also allowed, or None if all are."""
+        mask = self.live_mask(segment)
+        if allowed is None:
+            return mask
+        part = np.asarray(allowed[segment.start : segment.start + len(segment)])
+        return part if mask is None else mask & part
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Find the live rows most similar to a query vector.
+
+        Args:
+            query: Query embedding
+            k: Number of rows to return
+
+        Returns:
+            Global row numbers and cosine similarities, best first
+        """
+        rows, scores = self.search_many(np.asarray(query)[None, :], k)
+        return rows[0], scores[0]
+
+    def search_many(
+        self,
+        queries: np.ndarray,
+        k: int,
+        first_segment: int = 0,
+        allowed: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the most similar live rows for several queries at once.
+
+        The matrix is scanned once in row blocks; each block is scored
+        against all queries with one matrix-matrix product and only its
+        per-query top-k are kept for the final merge.
+
+        Args:
+            queries: Query embeddings of shape (q, dim)
+            k: Number of rows to return per query
+            first_segment: Skip the segments before this one (used to scan
+                rows added after an ANN index was built)
+            allowed: Boolean mask over all rows; other rows are skipped
+
+        Returns:
+            Global row numbers and cosine similarities, each of shape (q, k'),
+            best first, where k' = min(k, number of live rows). When only
+            some segments are scanned, missing results score -inf.
+        """
+        queries = normalize(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        if self.quantization != "none":
+            return self._search_quantized(queries, k, self.segments[first_segment:], allowed)
+
+        row_parts = [np.zeros((len(queries), 0), dtype=np.int64)]
+        score_parts = [np.zeros((len(queries), 0), dtype=np.float32)]
+
+        for segment in self.segments[first_segment:]:
+            mask = self._scan_mask(segment, allowed)
+            for start in range(0, len(segment), self.SCAN_BLOCK):
+                block = segment.vectors[start : start + self.SCAN_BLOCK]
+                scores = (block @ queries.T).T
+                if mask is not None:
+                    scores[:, ~mask[start : start + len(block)]] = -np.inf
+                best = top_k(scores, k)
+                row_parts.append(best + segment.start + start)
+                score_parts.append(np.take_along_axis(scores, best, axis=1))
+
+        rows = np.concatenate(row_parts, axis=1)
+        scores = np.concatenate(score_parts, axis=1)
+        best = top_k(scores, k)
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def search_rows(
+        self, queries: np.ndarray, rows: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find the most similar rows among a subset of the index.
+
+        Only the vectors of rows are read, in blocks, so the cost is
+        proportional to the subset rather than the whole matrix.
+
+        Args:
+            queries: Query embeddings of shape (q, dim)
+            rows: Live global row numbers to score, ascending
+            k: Number of rows to return per query
+
+        Returns:
+            Global row numbers and cosine similarities of shape (q, k'),
+            best first, where k' = min(k, len(rows))
+        """
+        queries = normalize(np.asarray(queries, dtype=np.float32))
+        rows = np.asarray(rows, dtype=np.int64)
+        k = min(k, len(rows))
+        row_parts = [np.zeros((len(queries), 0), dtype=np.int64)]
+        score_parts = [np.zeros((len(queries), 0), dtype=np.float32)]
+
+        for start in range(0, len(rows), self.SCAN_BLOCK):
+            block = rows[start : start + self.SCAN_BLOCK]
+            scores = (self.get_vectors(block) @ queries.T).T
+            best = top_k(scores, k)
+            row_parts.append(block[best])
+            score_parts.append(np.take_along_axis(scores, best, axis=1))
+
+        rows = np.concatenate(row_parts, axis=1)
+        scores = np.concatenate(score_parts, axis=1)
+        best = top_k(scores, k)
+        return np.take_along_axis(rows, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def _search_quantized(
+        self,
+        queries: np.ndarray,
+        k: int,
+        segments: list[Segment],
+        allowed: np.ndarray | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Shortlist by compressed codes, then rescore with float vectors."""
+        shortlist = k * self.RESCORE_FACTOR[self.quantization]
+        binary = self.quantization == "binary"
+        query_codes = quantize_binary(queries) if binary else None
+        row_parts = [np.zeros((len(queries), 0), dtype=np.int64)]
+        score_parts = [np.zeros((len(queries), 0), dtype=np.float32)]
+
+        for segment in segments:
+            if segment.codes is None:
+                raise RuntimeError(f"Segment {segment.name} has no {self.quantization} codes")
+            mask = self._scan_mask(segment, allowed)
+            for start in range(0, len(segment), self.CODE_BLOCK):
+                codes = segment.codes[start : start + self.CODE_BLOCK]
+                if query_codes is not None:
+                    approx = -hamming_distances(codes, query_codes).astype(np.float32)
+                else:
+                    approx = int8_scores(codes, segment.scale, queries)
+                if mask is not None:
+                    approx[:, ~mask[start : start + len(codes)]] = -np.inf
+                best = top_k(approx, shortlist)
+                row_parts.append(best + segment.start + start)
+                score_parts.append(np.take_along_axis(approx, best, axis=1))
+
+        approx = np.concatenate(score_parts, axis=1)
+        best = top_k(approx, shortlist)
+        candidates = np.take_along_axis(np.concatenate(row_parts, axis=1), best, axis=1)
+        valid = np.isfinite(np.take_along_axis(approx, best, axis=1))
+
+        # Exact cosine similarity for the shortlist only
+        unique = np.unique(candidates[valid])
+        scores = np.full(candidates.shape, -np.inf, dtype=np.float32)
+        if len(unique):
+            vectors = self.get_vectors(unique)
+            gathered = vectors[np.searchsorted(unique, candidates).clip(max=len(unique) - 1)]
+            exact = np.einsum("qmd,qd->qm", gathered, queries)
+            scores = np.where(valid, exact, -np.inf).astype(np.float32)
+
+        best = top_k(scores, k)
+        return np.take_along_axis(candidates, best, axis=1), np.take_along_axis(scores, best, axis=1)
+
+    def _locate(self, row: int) -> tuple[Segment, int]:
+        """Map a global row to its segment and local row."""
+        starts = [segment.start for segment in self.segments]
+        segment = self.segments[int(np.searchsorted(starts, row, side="right")) - 1]
+        return segment, row - segment.start
+
+    def metadata(self, rows: list[int]) -> list[dict[str, Any]]:
+        """Read metadata for the given rows only.
+
+        Args:
+            rows: Global row numbers
+
+        Returns:
+            Metadata dicts in the order of rows
+        """
+        if not self.segments:
+            raise RuntimeError("Index is not open")
+
+        records = []
+        files: dict[str, BinaryIO] = {}
+        try:
+            for row in rows:
+                segment, local = self._locate(row)
+                start, end = int(segment.offsets[local]), int(segment.offsets[local + 1])
+                if segment.name not in files:
+                    files[segment.name] = open(self.directory / segment.name / self.METADATA, "rb")
+                f = files[segment.name]
+                f.seek(start)
+                records.append(json.loads(f.read(end - start)))
+        finally:
+            for f in files.values():
+                f.close()
+        return records
+
+    def get_vectors(self, rows: list[int] | np.ndarray) -> np.ndarray:
+        """Copy the vectors of the given rows into memory."""
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((len(rows), int(self.manifest.get("dim", 0))), dtype=np.float32)
+        for segment in self.segments:
+            inside = (rows >= segment.start) & (rows < segment.start + len(segment))
+            if inside.any():
+                out[inside] = segment.vectors[rows[inside] - segment.start]
+        return out
+
+    def entries(self) -> dict[str, tuple[int, str, str]]:
+        """Map each live key to its row, content hash and metadata hash."""
+        dead = set(self.tombstones.tolist())
+        entries = {}
+        for segment in self.segments:
+            keys = json.loads(
+                (self.directory / segment.name / self.KEYS).read_text(encoding="utf-8")
+            )
+            for local, (key, content_hash, meta_hash) in enumerate(keys):
+                row = segment.start + local
+                if row not in dead:
+                    entries[key] = (row, content_hash, meta_hash)
+        return entries
+
+    def write(
+        self,
+        vectors: np.ndarray,
+        metadata: list[dict[str, Any]],
+        model_name: str,
+        keys: list[tuple[str, str, str]] | None = None,
+    ) -> None:
+        """Write a complete index, replacing any existing one.
+
+        Args:
+            vectors: Embedding matrix of shape (count, dim)
+            metadata: One metadata dict per row
+            model_name: Embedding model that produced the vectors
+            keys: (key, content hash, metadata hash) per row; defaults to row numbers
+
+        Raises:
+            ValueError: If vectors, metadata and keys lengths differ
+        """
+        if keys is None:
+            keys = [(str(row), "", "") for row in range(len(metadata))]
+        if not len(vectors) == len(metadata) == len(keys):
+            raise ValueError("Vectors and metadata must have the same length")
+
+        vectors = normalize(np.asarray(vectors, dtype=np.float32))
+        manifest = self._read_manifest() or {}
+        name = self._next_segment(manifest)
+        self._write_segment(name, vectors, metadata, keys, manifest.get("quantization", "none"))
+
+        self._commit(
+            {
+                "model": model_name,
+                "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+                "segments": [{"name": name, "rows": len(metadata)}],
+                "tombstones": None,
+                "count": len(metadata),
+                "projection": None,
+            },
+            manifest,
+        )
+
+    def write_batches(
+        self,
+        batches: Iterable[tuple[np.ndarray, list[dict[str, Any]], list[tuple[str, str, str]]]],
+        model_name: str,
+    ) -> dict[str, int]:
+        """Write a complete index from batches, replacing any existing one.
+
+        Only one batch is held in memory: vectors, metadata and keys are
+        appended to the segment's files as each batch arrives. Rows whose
+        key appears again later are tombstoned, so the last copy wins.
+
+        Args:
+            batches: (vectors, metadata, keys) per batch, as for write()
+            model_name: Embedding model that produced the vectors
+
+        Returns:
+            Dict with rows written and duplicates tombstoned
+
+        Raises:
+            ValueError: If a batch's lengths differ or no rows are given
+        """
+        manifest = self._read_manifest() or {}
+        name = self._next_segment(manifest)
+        path = self.directory / name
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+
+        vectors_out: NpyAppender | None = None
+        offsets_out = NpyAppender(path / self.OFFSETS, np.int64)
+        offsets_out.append(np.zeros(1, dtype=np.int64))
+        key_hashes = [np.zeros(0, dtype=np.uint64)]
+        position = 0
+        try:
+            with (
+                open(path / self.METADATA, "wb") as metadata_out,
+                open(path / self.KEYS, "w", encoding="utf-8") as keys_out,
+            ):
+                keys_out.write("[")
+                for vectors, metadata, keys in batches:
+                    if not len(vectors) == len(metadata) == len(keys):
+                        raise ValueError("Vectors and metadata must have the same length")
+                    if not len(metadata):
+                        continue
+                    vectors = normalize(np.asarray(vectors, dtype=np.float32))
+                    if vectors_out is None:
+                        vectors_out = NpyAppender(
+                            path / self.VECTORS, np.float32, vectors.shape[1]
+                        )
+                    else:
+                        keys_out.write(",")
+                    vectors_out.append(vectors)
+
+                    lines = [
+                        json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                        for record in metadata
+                    ]
+                    metadata_out.write(b"".join(lines))
+                    ends = position + np.cumsum([len(line) for line in lines], dtype=np.int64)
+                    offsets_out.append(ends)
+                    position = int(ends[-1])
+
+                    keys_out.write(",".join(json.dumps(list(key)) for key in keys))
+                    key_hashes.append(np.array([key_hash(key[0]) for key in keys], np.uint64))
+                keys_out.write("]")
+            if vectors_out is None:
+                raise ValueError("Cannot write an index without rows")
+        except BaseException:
+            offsets_out.file.close()
+            if vectors_out is not None:
+                vectors_out.file.close()
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        offsets_out.close()
+        vectors_out.close()
+
+        rows = vectors_out.rows
+        self._write_codes(
+            path, np.load(path / self.VECTORS, mmap_mode="r"), manifest.get("quantization", "none")
+        )
+
+        # Earlier rows of a repeated key; the reversed unique keeps the last
+        hashes = np.concatenate(key_hashes)
+        _, last = np.unique(hashes[::-1], return_index=True)
+        keep = np.zeros(rows, dtype=bool)
+        keep[rows - 1 - last] = True
+        duplicates = np.flatnonzero(~keep).astype(np.int64)
+
+        tombstones_file = None
+        if len(duplicates):
+            tombstones_file = f"tombstones-{manifest['next_segment']:06d}.npy"
+            self._replace(tombstones_file, lambda f: np.save(f, duplicates))
+
+        self._commit(
+            {
+                "model": model_name,
+                "dim": int(vectors_out.width),
+                "segments": [{"name": name, "rows": rows}],
+                "tombstones": tombstones_file,
+                "count": rows - len(duplicates),
+                "projection": None,
+            },
+            manifest,
+        )
+        return {"rows": rows, "duplicates": len(duplicates)}
+
+    def append(
+        self,
+        vectors: np.ndarray,
+        metadata: list[dict[str, Any]],
+        keys: list[tuple[str, str, str]],
+        deleted: list[int],
+    ) -> bool:
+        """Add rows as a new segment and tombstone replaced or removed rows.
+
+        The index must be open. Compacts afterwards when enough rows are dead.
+
+        Args:
+            vectors: Embeddings of the new rows, projected if the index is
+                reduced and they are model embeddings
+            metadata: One metadata dict per new row
+            keys: (key, content hash, metadata hash) per new row
+            deleted: Global rows that are no longer live
+
+        Returns:
+            True if the index was compacted
+
+        Raises:
+            ValueError: If vectors, metadata and keys lengths differ
+        """
+        if not len(vectors) == len(metadata) == len(keys):
+            raise ValueError("Vectors and metadata must have the same length")
+
+        manifest = dict(self.manifest)
+        segments = list(manifest["segments"])
+        if len(metadata):
+            name = self._next_segment(manifest)
+            vectors = normalize(self.project(vectors))
+            self._write_segment(name, vectors, metadata, keys, self.quantization)
+            segments.append({"name": name, "rows": len(metadata)})
+
+        tombstones = np.union1d(self.tombstones, np.asarray(deleted, dtype=np.int64))
+        tombstones_file = manifest.get("tombstones")
+        if len(tombstones) != len(self.tombstones):
+            tombstones_file = f"tombstones-{manifest['next_segment']:06d}.npy"
+            self._replace(tombstones_file, lambda f: np.save(f, tombstones))
+
+        total = self.total_rows + len(metadata)
+        self._commit(
+            {
+                "segments": segments,
+                "tombstones": tombstones_file,
+                "count": total - len(tombstones),
+            },
+            manifest,
+        )
+        self.open()
+
+        if len(self.segments) > self.MAX_SEGMENTS or (
+            len(self.tombstones) > self.COMPACT_RATIO * self.total_rows
+        ):
+            self.compact()
+            return True
+        return False
+
+    def compact(self) -> None:
+        """Copy live rows into a single segment and drop the old ones."""
+        manifest = dict(self.manifest)
+        name = self._next_segment(manifest)
+        path = self.directory / name
+        path.mkdir()
+
+        # Fill the new matrix segment by segment instead of materializing it
+        out = open_memmap(
+            path / self.VECTORS,
+            mode="w+",
+            dtype=np.float32,
+            shape=(len(self), int(manifest["dim"])),
+        )
+        metadata_lines: list[bytes] = []
+        keys: list[Any] = []
+        pos = 0
+        for segment in self.segments:
+            mask = self.live_mask(segment)
+            live = np.arange(len(segment)) if mask is None else np.flatnonzero(mask)
+            out[pos : pos + len(live)] = segment.vectors[live]
+            pos += len(live)
+
+            segment_keys = json.loads(
+                (self.directory / segment.name / self.KEYS).read_text(encoding="utf-8")
+            )
+            with open(self.directory / segment.name / self.METADATA, "rb") as f:
+                lines = f.readlines()
+            for local in live.tolist():
+                metadata_lines.append(lines[local])
+                keys.append(segment_keys[local])
+        out.flush()
+        del out
+        self._write_codes(path, np.load(path / self.VECTORS, mmap_mode="r"), self.quantization)
+
+        offsets = np.zeros(len(metadata_lines) + 1, dtype=np.int64)
+        np.cumsum([len(line) for line in metadata_lines], out=offsets[1:])
+        with open(path / self.METADATA, "wb") as f:
+            f.writelines(metadata_lines)
+        np.save(path / self.OFFSETS, offsets)
+        (path / self.KEYS).write_text(json.dumps(keys), encoding="utf-8")
+
+        self._commit(
+            {
+                "segments": [{"name": name, "rows": len(keys)}],
+                "tombstones": None,
+                "count": len(keys),
+            },
+            manifest,
+        )
+        self.open()
+
+    def quantize(self, mode: str) -> None:
+        """Switch the compressed codes that searches scan.
+
+        Codes are added to every segment (or removed for "none") and kept
+        for segments written later. The index must be open.
+
+        Args:
+            mode: "none", "int8" or "binary"
+
+        Raises:
+            ValueError: If mode is unknown
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown quantization: {mode}. Use one of: {', '.join(MODES)}")
+
+        for segment in self.segments:
+            self._write_codes(self.directory / segment.name, segment.vectors, mode)
+
+        manifest = dict(self.manifest)
+        self._commit(
+            {
+                "segments": manifest["segments"],
+                "tombstones": manifest.get("tombstones"),
+                "count": manifest["count"],
+                "quantization": mode,
+            },
+            manifest,
+        )
+        self.open()
+
+    def reduce(self, dims: int, sample_rows: int = SAMPLE_ROWS) -> None:
+        """Project the vectors onto their leading principal components.
+
+        The projection is fitted on a random sample of live rows and stored
+        with the index. The vectors (and codes) of every segment are
+        replaced by their projections; model embeddings are not kept, so
+        going back to more dimensions means encoding the papers again. The
+        index must be open.
+
+        Args:
+            dims: Dimensions to keep
+            sample_rows: Rows the projection is fitted on
+
+        Raises:
+            ValueError: If the index is already reduced, dims is not below
+                its dimension, or there are fewer than dims live rows
+        """
+        if self.projection is not None:
+            raise ValueError("Index is already reduced; rebuild it to change dimensions")
+
+        live = self.live_rows()
+        rng = np.random.default_rng(0)
+        sample = np.sort(rng.choice(live, min(sample_rows, len(live)), replace=False))
+        mean, components = fit_pca(self.get_vectors(sample), dims)
+
+        manifest = dict(self.manifest)
+        name = f"projection-{manifest['next_segment']:06d}.npz"
+        self._replace(name, lambda f: np.savez(f, mean=mean, components=components))
+        for segment in self.segments:
+            path = self.directory / segment.name
+            self._write_blocks(path / self.VECTORS, segment.vectors, np.float32, dims,
+                               lambda block: normalize(apply_pca(block, mean, components)))
+            self._write_codes(path, np.load(path / self.VECTORS, mmap_mode="r"), self.quantization)
+
+        self._commit(
+            {
+                "dim": dims,
+                "segments": manifest["segments"],
+                "tombstones": manifest.get("tombstones"),
+                "count": manifest["count"],
+                "projection": name,
+            },
+            manifest,
+        )
+        self.open()
+
+    def remove(self) -> None:
+        """Delete the index files (manifest first, so readers stop using it)."""
+        self.close()
+        (self.directory / self.MANIFEST).unlink(missing_ok=True)
+        for path in self.directory.glob("seg-*"):
+            shutil.rmtree(path, ignore_errors=True)
+        for path in self.directory.glob("tombstones-*"):
+            path.unlink(missing_ok=True)
+        for path in self.directory.glob("projection-*"):
+            path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Drop the memory maps (required before replacing files on Windows)."""
+        self.segments = []
+        self.tombstones = np.zeros(0, dtype=np.int64)
+
+    def _read_manifest(self) -> dict[str, Any] | None:
+        """Return the current manifest, or None if there is no valid index."""
+        if not self.exists():
+            return None
+        return json.loads((self.directory / self.MANIFEST).read_text(encoding="utf-8"))
+
+    def _next_segment(self, manifest: dict[str, Any]) -> str:
+        """Reserve the next segment number in manifest."""
+        number = manifest.get("next_segment", 1)
+        manifest["next_segment"] = number + 1
+        return f"seg-{number:06d}"
+
+    def _write_segment(
+        self,
+        name: str,
+        vectors: np.ndarray,
+        metadata: list[dict[str, Any]],
+        keys: list[tuple[str, str, str]],
+        quantization: str = "none",
+    ) -> None:
+        """Write the files of a new segment."""
+        path = self.directory / name
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+
+        np.save(path / self.VECTORS, vectors)
+        self._write_codes(path, vectors, quantization)
+
+        offsets = np.zeros(len(metadata) + 1, dtype=np.int64)
+        with open(path / self.METADATA, "wb") as f:
+            for i, record in enumerate(metadata):
+                line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets[i + 1] = offsets[i] + len(line)
+        np.save(path / self.OFFSETS, offsets)
+        (path / self.KEYS).write_text(json.dumps([list(key) for key in keys]), encoding="utf-8")
+
+    def _write_codes(self, path: Path, vectors: np.ndarray, mode: str) -> None:
+        """Write the compressed codes of a segment's vectors, block by block.
+
+        Files are written under a temporary name and renamed into place, so
+        readers that still map the previous codes are not disturbed.
+        """
+        if mode == "int8":
+            scale = int8_scale(vectors, self.SCAN_BLOCK)
+            self._write_blocks(path / self.CODES[mode], vectors, np.int8, vectors.shape[1],
+                               lambda block: quantize_int8(block, scale))
+            np.save(path / f".{self.SCALE}.tmp.npy", scale)
+            os.replace(path / f".{self.SCALE}.tmp.npy", path / self.SCALE)
+        elif mode == "binary":
+            self._write_blocks(path / self.CODES[mode], vectors, np.uint8,
+                               (vectors.shape[1] + 63) // 64 * 8, quantize_binary)
+
+        # Codes of other schemes are no longer kept up to date
+        for other, filename in self.CODES.items():
+            if other != mode:
+                (path / filename).unlink(missing_ok=True)
+        if mode != "int8":
+            (path / self.SCALE).unlink(missing_ok=True)
+
+    def _write_blocks(
+        self,
+        path: Path,
+        vectors: np.ndarray,
+        dtype: type,
+        width: int,
+        encode: Callable[[np.ndarray], np.ndarray],
+    ) -> None:
+        """Encode vectors into a new .npy file one scan block at a time."""
+        tmp = path.with_name(f".{path.name}.tmp")
+        out = open_memmap(tmp, mode="w+", dtype=dtype, shape=(len(vectors), width))
+        for start in range(0, len(vectors), self.SCAN_BLOCK):
+            block = vectors[start : start + self.SCAN_BLOCK]
+            out[start : start + len(block)] = encode(np.asarray(block))
+        out.flush()
+        del out
+        os.replace(tmp, path)
+
+    def _commit(self, changes: dict[str, Any], previous: dict[str, Any]) -> None:
+        """Publish a new manifest, then delete files it no longer references."""
+        manifest = {
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "model": previous.get("model"),
+            "dim": previous.get("dim"),
+            "dtype": "float32",
+            "next_segment": previous.get("next_segment", 1),
+            "quantization": previous.get("quantization", "none"),
+            "projection": previous.get("projection"),
+            **changes,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._replace(
+            self.MANIFEST, lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8"))
+        )
+        self.manifest = manifest
+
+        # Leftovers from the previous manifest or from interrupted writes
+        keep = {entry["name"] for entry in manifest["segments"]}
+        keep.add(manifest.get("tombstones") or "")
+        keep.add(manifest.get("projection") or "")
+        for path in self.directory.iterdir():
+            if path.name.startswith("seg-") and path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.name.startswith(("tombstones-", "projection-")) and path.name not in keep:
+                path.unlink(missing_ok=True)
+            elif path.name in (self.VECTORS, self.METADATA, self.OFFSETS):
+                # Single-file layout of format version 1
+                path.unlink(missing_ok=True)
+
+    def _replace(self, name: str, writer: Callable[[BinaryIO], Any]) -> None:
+        """Write a file under a temporary name, then rename it into place."""
+        target = self.directory / name
+        tmp = target.with_name(f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            writer(f)
+        os.replace(tmp, target)
@@ -3,6 +3,12 @@
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def isolated_embedding_cache(tmp_path, monkeypatch):
+    """Keep tests out of the user-level embedding cache."""
+    monkeypatch.setenv("POLYHEDRA_CACHE_DIR", str(tmp_path / "embedding-cache"))
+
+
 @pytest.fixture
 def mock_semantic_scholar_response():
     """Mock Semantic Scholar API response."""
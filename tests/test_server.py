@@ -3,6 +3,7 @@
 import json
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -30,9 +31,9 @@ class TestServerInitialization:
 
     @pytest.mark.asyncio
     async def test_list_tools_count(self):
-        """Should list all 11 tools (10 existing + generate_literature_review)."""
+        """Should list all 23 tools."""
         tools = await list_tools()
-        assert len(tools) == 11
+        assert len(tools) == 23
 
     @pytest.mark.asyncio
     async def test_list_tools_names(self):
@@ -45,6 +46,8 @@ class TestServerInitialization:
             "get_paper",
             "get_context",
             "query_similar_papers",
+            "query_similar_papers_batch",
+            "build_ann_index",
             "index_papers",
             "save_file",
             "add_citation",
@@ -52,6 +55,16 @@ class TestServerInitialization:
             "get_project_status",
             "init_project",
             "generate_literature_review",
+            "analyze_citations",
+            "rank_papers",
+            "suggest_queries",
+            "save_search",
+            "poll_saved_searches",
+            "extract_pdf_references",
+            "index_full_texts",
+            "query_passages",
+            "find_duplicates",
+            "find_related",
         }
 
         assert tool_names == expected_names
@@ -221,6 +234,20 @@ class TestServiceIntegration:
         assert "test.md" in data["contents"]
         assert "missing.md" in data["missing"]
 
+    @pytest.mark.asyncio
+    async def test_search_papers_when_recording_fails(self, temp_project, monkeypatch):
+        """A query that cannot be recorded still returns its results."""
+        monkeypatch.chdir(temp_project)
+        services = get_services()
+        services.clear()
+        services = get_services()
+        services["semantic_scholar"].search = AsyncMock(return_value=[{"paperId": "a"}])
+        services["query_suggester"].record_query = MagicMock(side_effect=OSError("read-only"))
+
+        result = await call_tool("search_papers", {"query": "graph networks"})
+
+        assert json.loads(result[0].text) == [{"paperId": "a"}]
+
     @pytest.mark.asyncio
     async def test_query_similar_papers_not_indexed(self, temp_project, monkeypatch):
         """Should handle query before indexing."""
@@ -237,6 +264,68 @@ class TestServiceIntegration:
         assert "error" in data
         assert "not indexed" in data["error"].lower()
 
+    @pytest.mark.asyncio
+    async def test_query_similar_papers_batch_not_indexed(self, temp_project, monkeypatch):
+        """Should handle batched queries before indexing."""
+        monkeypatch.chdir(temp_project)
+
+        # Clear service cache
+        services = get_services()
+        services.clear()
+
+        result = await call_tool("query_similar_papers_batch", {"queries": ["a", "b"]})
+
+        data = json.loads(result[0].text)
+        assert "not indexed" in data["error"].lower()
+
+    @pytest.mark.asyncio
+    async def test_index_papers_stream_with_shards(self, temp_project, monkeypatch):
+        """Streaming builds reject shard options instead of ignoring them."""
+        monkeypatch.chdir(temp_project)
+        services = get_services()
+        services.clear()
+
+        result = await call_tool("index_papers", {"stream": True, "shard_by": "year"})
+
+        data = json.loads(result[0].text)
+        assert "cannot be sharded" in data["error"]
+
+    @pytest.mark.asyncio
+    async def test_find_related_not_indexed(self, temp_project, monkeypatch):
+        """Should handle related-paper lookups before indexing."""
+        monkeypatch.chdir(temp_project)
+        services = get_services()
+        services.clear()
+
+        result = await call_tool("find_related", {"paper_id": "abc"})
+
+        data = json.loads(result[0].text)
+        assert "not indexed" in data["error"].lower()
+
+    @pytest.mark.asyncio
+    async def test_find_duplicates_by_title(self, temp_project, monkeypatch):
+        """Without an index, title variants are found and can be collapsed."""
+        monkeypatch.chdir(temp_project)
+        services = get_services()
+        services.clear()
+        papers = [
+            {"id": "a", "title": "Attention Is All You Need", "venue": "arXiv.org"},
+            {"id": "b", "title": "Deep Residual Learning", "venue": "CVPR"},
+            {"id": "c", "title": "Attention is all you need!", "venue": "NeurIPS"},
+        ]
+        papers_file = temp_project / "literature" / "papers.json"
+        papers_file.write_text(json.dumps(papers), encoding="utf-8")
+
+        result = await call_tool("find_duplicates", {"collapse": True})
+
+        data = json.loads(result[0].text)
+        assert data["duplicates"] == 1
+        assert [(p["id"], p["keep"]) for p in data["clusters"][0]] == [("a", False), ("c", True)]
+        assert data["embeddings_used"] is False
+        collapsed = json.loads(papers_file.read_text(encoding="utf-8"))
+        assert [p["id"] for p in collapsed] == ["b", "c"]
+        assert collapsed[1]["duplicate_ids"] == ["a"]
+
     @pytest.mark.asyncio
     async def test_generate_literature_review_missing_papers(
         self, temp_project, monkeypatch
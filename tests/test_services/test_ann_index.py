@@ -0,0 +1,124 @@
+"""Unit tests for approximate nearest-neighbor backends."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.ann_index import (
+    IVFIndex,
+    assign_clusters,
+    load_ann,
+    spherical_kmeans,
+)
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def clustered(n, centers, rng):
+    """Points scattered around the given centers."""
+    labels = rng.integers(0, len(centers), n)
+    return centers[labels] + 0.3 * rng.standard_normal((n, centers.shape[1]))
+
+
+@pytest.fixture
+def data():
+    """Clustered vectors, queries and their generator."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 16))
+    return clustered(2000, centers, rng), clustered(20, centers, rng), centers, rng
+
+
+@pytest.fixture
+def index(temp_dir, data):
+    """Open vector index over the clustered vectors."""
+    vectors = data[0]
+    keys = [(f"p{i}", "", "") for i in range(len(vectors))]
+    VectorIndex(temp_dir).write(vectors, [{"id": i} for i in range(len(vectors))], "m", keys)
+    return VectorIndex(temp_dir).open()
+
+
+def recall(approx_rows, exact_rows):
+    """Share of exact neighbors found by the approximate search."""
+    hits = [len(set(a) & set(e)) / len(e) for a, e in zip(approx_rows, exact_rows)]
+    return float(np.mean(hits))
+
+
+class TestKMeans:
+    """Tests for the clustering helpers."""
+
+    def test_recovers_clusters(self, data):
+        """Points of one generating cluster end up in one centroid."""
+        vectors, _, centers, _ = data
+        centroids = spherical_kmeans(normalize(vectors), 20, iterations=15)
+
+        assert centroids.shape == (20, 16)
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1, rtol=1e-5)
+        assign = assign_clusters(normalize(vectors), centroids)
+        truth = assign_clusters(normalize(vectors), normalize(centers))
+        purity = sum(np.bincount(assign[truth == c]).max() for c in range(20)) / len(vectors)
+        assert purity > 0.9
+
+    def test_more_clusters_than_points(self):
+        """The number of centroids is capped by the number of points."""
+        vectors = normalize(np.eye(3))
+        assert spherical_kmeans(vectors, 10).shape == (3, 3)
+
+
+class TestIVFIndex:
+    """Tests for the IVF backend."""
+
+    def test_recall(self, temp_dir, index, data):
+        """Probing more lists approaches exact search."""
+        ivf = IVFIndex(temp_dir)
+        stats = ivf.build(index, nlist=20, nprobe=2)
+        exact_rows, _ = index.search_many(data[1], 10)
+
+        assert stats == {"backend": "ivf", "nlist": 20, "nprobe": 2, "rows": 2000}
+        assert recall(ivf.search_many(index, data[1], 10)[0], exact_rows) > 0.9
+        assert recall(ivf.search_many(index, data[1], 10, nprobe=20)[0], exact_rows) == 1.0
+
+    def test_persistence(self, temp_dir, index, data):
+        """A saved index loads back with its settings."""
+        IVFIndex(temp_dir).build(index, nlist=10, nprobe=3)
+
+        ivf = load_ann(temp_dir)
+        assert isinstance(ivf, IVFIndex)
+        assert ivf.nprobe == 3
+        assert len(ivf.centroids) == 10
+        assert ivf.covers(index)
+
+    def test_appended_rows_and_tombstones(self, temp_dir, index, data):
+        """Rows added after the build are found; deleted rows are not."""
+        ivf = IVFIndex(temp_dir)
+        ivf.build(index, nlist=20, nprobe=20)
+        index.COMPACT_RATIO = 1.0
+        query = data[1][:1]
+        nearest = int(index.search_many(query, 1)[0][0, 0])
+
+        index.append(query, [{"id": "new"}], [("new", "", "")], deleted=[nearest])
+        rows, scores = ivf.search_many(index, query, 5)
+
+        assert ivf.covers(index)
+        assert rows[0, 0] == 2000
+        assert scores[0, 0] == pytest.approx(1.0)
+        assert nearest not in rows[0].tolist()
+
+    def test_compaction_invalidates(self, temp_dir, index):
+        """Compaction renumbers rows, so the lists no longer cover the index."""
+        ivf = IVFIndex(temp_dir)
+        ivf.build(index, nlist=5)
+
+        index.append(np.zeros((0, 16)), [], [], deleted=list(range(1000)))
+
+        assert not ivf.covers(index)
+        ivf.build(index, retrain=False)
+        assert ivf.covers(index)
+        assert len(ivf.rows) == 1000
@@ -0,0 +1,211 @@
+"""Unit tests for citation graph service."""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import pytest
+
+from polyhedra.services.citation_graph import (
+    CitationGraphService,
+    cooccurrence,
+    hits,
+    pagerank,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def corpus():
+    """Three corpus papers."""
+    return [
+        {"paperId": "p1", "title": "Paper One"},
+        {"paperId": "p2", "title": "Paper Two"},
+        {"id": "p3", "title": "Paper Three"},
+    ]
+
+
+@pytest.fixture
+def references():
+    """Reference lists: r1 is cited by every paper, r2 by p1 and p2."""
+    return {
+        "p1": [
+            {"paperId": "r1", "title": "Ref One"},
+            {"paperId": "r2", "title": "Ref Two"},
+            {"paperId": "p2", "title": "Paper Two"},
+        ],
+        "p2": [
+            {"paperId": "r1", "title": "Ref One"},
+            {"paperId": "r2", "title": "Ref Two"},
+        ],
+        "p3": [{"paperId": "r1", "title": "Ref One"}],
+    }
+
+
+class TestCooccurrence:
+    """Tests for the sparse pair counting kernel."""
+
+    def test_matches_dense_product(self):
+        """Counts should equal the off-diagonal of the dense M·Mᵀ."""
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, 30, size=400)
+        members = rng.integers(0, 50, size=400)
+
+        left, right, counts = cooccurrence(keys, members, 50)
+
+        incidence = np.zeros((50, 30), dtype=np.int64)
+        incidence[members, keys] = 1
+        dense = incidence @ incidence.T
+        expected = {
+            (i, j): dense[i, j]
+            for i in range(50)
+            for j in range(i + 1, 50)
+            if dense[i, j]
+        }
+        assert dict(zip(zip(left.tolist(), right.tolist()), counts.tolist())) == expected
+
+    def test_no_shared_keys(self):
+        """Members that share nothing produce no pairs."""
+        left, right, counts = cooccurrence(np.array([0, 1]), np.array([0, 1]), 2)
+        assert len(left) == len(right) == len(counts) == 0
+
+
+class TestGraphAnalysis:
+    """Tests for graph building and analysis."""
+
+    def test_build_graph(self, temp_dir, corpus, references):
+        """Corpus papers come first and duplicate edges are dropped."""
+        service = CitationGraphService(temp_dir)
+        references["p3"].append({"paperId": "r1", "title": "Ref One"})
+
+        graph = service.build_graph(corpus, references)
+
+        assert graph.node_ids[:3] == ["p1", "p2", "p3"]
+        assert graph.corpus_size == 3
+        assert graph.num_nodes == 5
+        assert len(graph.src) == 6
+
+    def test_analyze(self, temp_dir, corpus, references):
+        """Strongest pairs and missing candidates are reported."""
+        service = CitationGraphService(temp_dir)
+        graph = service.build_graph(corpus, references)
+
+        result = service.analyze(graph, top_k=5)
+
+        coupling = result["bibliographic_coupling"][0]
+        assert {coupling["a"]["paperId"], coupling["b"]["paperId"]} == {"p1", "p2"}
+        assert coupling["strength"] == 2
+
+        co_cited = result["co_citation"][0]
+        assert {co_cited["a"]["paperId"], co_cited["b"]["paperId"]} == {"r1", "r2"}
+        assert co_cited["strength"] == 2
+
+        missing = result["missing_candidates"]
+        assert [m["paperId"] for m in missing] == ["r1", "r2"]
+        assert missing[0]["cited_by"] == 3
+
+
+class TestFetchReferences:
+    """Tests for reference fetching and caching."""
+
+    @pytest.mark.asyncio
+    async def test_fetch_uses_cache(self, temp_dir, corpus):
+        """Only uncached papers are requested from the API."""
+        semantic_scholar = MagicMock()
+        semantic_scholar.get_references_batch = AsyncMock(
+            return_value={"p2": [{"paperId": "r1", "title": "Ref One"}]}
+        )
+        service = CitationGraphService(temp_dir, semantic_scholar)
+        service.save_references({"p1": []})
+
+        references = await service.fetch_references(corpus)
+
+        semantic_scholar.get_references_batch.assert_awaited_once_with(["p2", "p3"])
+        assert references["p2"][0]["paperId"] == "r1"
+        assert references["p3"] == []
+        assert service.load_references() == references
+
+    @pytest.mark.asyncio
+    async def test_fetch_without_api(self, temp_dir, corpus):
+        """Fetching uncached papers requires the API service."""
+        service = CitationGraphService(temp_dir)
+        with pytest.raises(RuntimeError, match="Semantic Scholar"):
+            await service.fetch_references(corpus)
+
+
+class TestCentrality:
+    """Tests for PageRank and HITS ranking."""
+
+    def test_pagerank_sums_to_one(self, temp_dir, corpus, references):
+        """PageRank is a probability distribution favoring cited papers."""
+        graph = CitationGraphService(temp_dir).build_graph(corpus, references)
+
+        rank = pagerank(graph)
+
+        assert rank.sum() == pytest.approx(1.0)
+        # r1 is cited by every corpus paper
+        assert int(np.argmax(rank)) == graph.node_ids.index("r1")
+
+    def test_hits_authorities(self, temp_dir, corpus, references):
+        """Authorities are the most cited nodes, hubs the best citers."""
+        graph = CitationGraphService(temp_dir).build_graph(corpus, references)
+
+        hubs, authorities = hits(graph)
+
+        assert int(np.argmax(authorities)) == graph.node_ids.index("r1")
+        assert int(np.argmax(hubs)) == graph.node_ids.index("p1")
+
+    @pytest.mark.parametrize("method", ["pagerank", "hits"])
+    def test_rank_papers_writes_scores(self, temp_dir, corpus, references, method):
+        """Every corpus paper gets a score scaled to a maximum of 1."""
+        service = CitationGraphService(temp_dir)
+        graph = service.build_graph(corpus, references)
+
+        service.rank_papers(corpus, graph, method=method)
+
+        scores = {paper["title"]: paper["centrality"] for paper in corpus}
+        assert max(scores.values()) == pytest.approx(1.0)
+        assert scores["Paper Two"] == pytest.approx(1.0)
+        assert all(paper["centrality_method"] == method for paper in corpus)
+
+    def test_rank_papers_invalid_method(self, temp_dir, corpus, references):
+        """Unknown methods are rejected."""
+        service = CitationGraphService(temp_dir)
+        graph = service.build_graph(corpus, references)
+        with pytest.raises(ValueError, match="pagerank"):
+            service.rank_papers(corpus, graph, method="katz")
+
+
+class TestLocalEdges:
+    """Tests for the offline adjacency file."""
+
+    def test_round_trip(self, temp_dir):
+        """Edges survive the compact CSR file."""
+        service = CitationGraphService(temp_dir)
+        service.save_local_edges([("p1", "p2"), ("p1", "p3"), ("p3", "p2")])
+
+        local = service.load_local_references()
+
+        assert {key: [r["paperId"] for r in refs] for key, refs in local.items()} == {
+            "p1": ["p2", "p3"],
+            "p3": ["p2"],
+        }
+
+    @pytest.mark.asyncio
+    async def test_collect_offline_merges(self, temp_dir, corpus, references):
+        """Offline collection merges cached and PDF references without the API."""
+        service = CitationGraphService(temp_dir)
+        service.save_references(references)
+        service.save_local_edges([("p3", "p2"), ("p3", "r1")])
+
+        merged = await service.collect_references(corpus, offline=True)
+
+        assert [ref["paperId"] for ref in merged["p3"]] == ["r1", "p2"]
+        assert merged["p1"] == references["p1"]
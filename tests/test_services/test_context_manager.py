@@ -4,9 +4,11 @@ import json
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
+import numpy as np
 import pytest
 
 from polyhedra.services.context_manager import ContextManager
+from polyhedra.services.vector_index import VectorIndex
 
 
 @pytest.fixture
@@ -165,9 +167,9 @@ class TestGetStatus:
 
     def test_with_rag_index(self, context_manager, temp_dir):
         """Should detect RAG index file."""
-        rag_dir = temp_dir / ".poly" / "embeddings"
-        rag_dir.mkdir(parents=True)
-        (rag_dir / "papers.pkl").write_bytes(b"dummy")
+        VectorIndex(temp_dir / ".poly" / "embeddings").write(
+            np.zeros((1, 4)), [{"id": "p1"}], "test-model"
+        )
 
         status = context_manager.get_status()
 
@@ -0,0 +1,95 @@
+"""Unit tests for near-duplicate detection."""
+
+import numpy as np
+import pytest
+
+from polyhedra.services.dedup import (
+    band_keys,
+    canonical,
+    cluster_duplicates,
+    collapse_duplicates,
+)
+from polyhedra.services.vector_index import normalize
+
+
+@pytest.fixture
+def vectors():
+    """300 random unit vectors; rows 300-304 are near copies of rows 0-4."""
+    rng = np.random.default_rng(0)
+    base = normalize(rng.standard_normal((300, 32)).astype(np.float32))
+    copies = normalize(base[:5] + 0.02 * rng.standard_normal((5, 32)).astype(np.float32))
+    return np.concatenate([base, copies])
+
+
+def test_band_keys():
+    """Equal vectors share every bucket; opposite ones share none."""
+    planes = np.random.default_rng(0).standard_normal((8, 3 * 4)).astype(np.float32)
+    vector = np.random.default_rng(1).standard_normal((1, 8))
+
+    keys = band_keys(np.concatenate([vector, vector, -vector]), planes, bits=4)
+
+    assert keys.shape == (3, 3)
+    assert (keys[0] == keys[1]).all()
+    assert (keys[0] != keys[2]).all()
+
+
+class TestClusterDuplicates:
+    """Tests for cluster_duplicates."""
+
+    def test_embedding_duplicates(self, vectors):
+        """Planted near copies are found, and nothing else."""
+        titles = [f"Paper number {i}" for i in range(len(vectors))]
+        rows = np.arange(len(vectors))
+
+        clusters = cluster_duplicates(titles, rows, lambda r: vectors[r], threshold=0.95)
+
+        assert clusters == [[i, 300 + i] for i in range(5)]
+
+    def test_matches_all_pairs(self, vectors):
+        """LSH finds the same pairs as comparing every pair at this threshold."""
+        similarities = vectors @ vectors.T
+        expected = {
+            (int(i), int(j)) for i, j in zip(*np.nonzero(similarities >= 0.9)) if i < j
+        }
+        titles = [""] * len(vectors)
+
+        clusters = cluster_duplicates(titles, np.arange(len(vectors)), lambda r: vectors[r], 0.9)
+
+        assert {tuple(cluster) for cluster in clusters} == expected
+
+    def test_title_duplicates(self):
+        """Normalized titles match without embeddings; short titles do not."""
+        titles = [
+            "BERT: Pre-training of Deep Bidirectional Transformers",
+            "Introduction",
+            "Bert - pre-training of deep bidirectional transformers.",
+            "Introduction",
+        ]
+
+        clusters = cluster_duplicates(titles, np.full(4, -1), None)
+
+        assert clusters == [[0, 2]]
+
+    def test_invalid_bands(self):
+        """Bands must fit in an int64 key."""
+        with pytest.raises(ValueError, match="bits"):
+            cluster_duplicates(["a"], np.zeros(1), None, bits=64)
+
+
+def test_collapse_keeps_published_version():
+    """The published, most cited version stays and absorbs the others."""
+    papers = [
+        {"id": "pre", "title": "T", "venue": "arXiv", "citationCount": 900, "abstract": "Long"},
+        {"id": "other", "title": "U"},
+        {"id": "pub", "title": "T", "venue": "ICML", "citationCount": 10, "abstract": ""},
+        {"id": "pub2", "title": "T", "venue": "ICML", "citationCount": 5, "bibtex_key": "t2020"},
+    ]
+    assert canonical([papers[0], papers[2], papers[3]]) == 1
+
+    collapsed = collapse_duplicates(papers, [[0, 2, 3]])
+
+    assert [paper["id"] for paper in collapsed] == ["other", "pub"]
+    assert collapsed[1]["duplicate_ids"] == ["pre", "pub2"]
+    assert collapsed[1]["abstract"] == "Long"
+    assert collapsed[1]["bibtex_key"] == "t2020"
+    assert "duplicate_ids" not in papers[2]
@@ -0,0 +1,127 @@
+"""Unit tests for the shared embedding cache."""
+
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.embedding_cache import (
+    EmbeddingCache,
+    QueryEmbeddingLRU,
+    cache_key,
+    default_cache_dir,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def cache(temp_dir):
+    """Cache in a temporary directory."""
+    cache = EmbeddingCache(temp_dir)
+    yield cache
+    cache.close()
+
+
+def fill(directory, start):
+    """Write entries from another process."""
+    cache = EmbeddingCache(directory)
+    for i in range(start, start + 50):
+        cache.put_many("m", [f"text {i}"], np.full((1, 4), i, dtype=np.float32))
+    cache.close()
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache."""
+
+    def test_round_trip(self, cache):
+        """Stored vectors come back for the same model and text only."""
+        cache.put_many("m", ["a", "b"], np.array([[1, 2], [3, 4]]))
+
+        hits = cache.get_many("m", ["b", "c", "a"])
+
+        assert sorted(hits) == [0, 2]
+        np.testing.assert_array_equal(hits[0], [3, 4])
+        assert hits[2].dtype == np.float32
+        assert cache.get_many("other-model", ["a"]) == {}
+        assert cache.stats() == {"entries": 2, "bytes": 16, "hits": 2, "misses": 2}
+
+    def test_key(self):
+        """Keys depend on both the model and the text."""
+        assert len(cache_key("m", "text")) == 32
+        assert cache_key("m", "ab") != cache_key("ma", "b")
+
+    def test_evicts_least_recently_used(self, temp_dir):
+        """Entries not read recently are evicted first once over the cap."""
+        texts = [f"text {i}" for i in range(10)]
+        cache = EmbeddingCache(temp_dir, max_bytes=10 * 16)
+        cache.put_many("m", texts, np.ones((10, 4)))
+        cache.get_many("m", texts[:1])
+
+        cache.put_many("m", ["new"], np.ones((1, 4)))
+
+        assert sorted(cache.get_many("m", texts + ["new"])) == [0, *range(3, 11)]
+        assert cache.stats()["bytes"] <= 10 * 16
+        cache.close()
+
+    def test_shared_between_processes(self, temp_dir):
+        """Concurrent writers in separate processes do not lose entries."""
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=fill, args=(temp_dir, n * 50)) for n in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        cache = EmbeddingCache(temp_dir)
+        hits = cache.get_many("m", [f"text {i}" for i in range(150)])
+        assert len(hits) == 150
+        assert hits[120][0] == 120
+        cache.close()
+
+    def test_default_dir(self, monkeypatch, temp_dir):
+        """The directory can be moved with an environment variable."""
+        monkeypatch.setenv("POLYHEDRA_CACHE_DIR", str(temp_dir))
+        assert default_cache_dir() == temp_dir
+
+        monkeypatch.delenv("POLYHEDRA_CACHE_DIR")
+        monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir))
+        assert default_cache_dir() == temp_dir / "polyhedra" / "embeddings"
+
+
+class TestQueryEmbeddingLRU:
+    """Tests for the in-memory query cache."""
+
+    def test_hits_and_eviction(self):
+        """The least recently used query is evicted when full."""
+        cache = QueryEmbeddingLRU(capacity=2)
+        cache.put("a", np.ones(3))
+        cache.put("b", np.ones(3))
+        assert cache.get("a") is not None
+
+        cache.put("c", np.ones(3))
+
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.stats() == {
+            "size": 2, "capacity": 2, "hits": 2, "misses": 1, "hit_rate": 2 / 3
+        }
+
+    def test_whitespace_insensitive(self):
+        """Repeats differing only in spacing share an entry."""
+        cache = QueryEmbeddingLRU()
+        cache.put("graph  neural\nnetworks ", np.zeros(2))
+        assert cache.get(" graph neural networks") is not None
+
+    def test_disabled(self):
+        """A capacity of zero stores nothing."""
+        cache = QueryEmbeddingLRU(capacity=0)
+        cache.put("a", np.ones(3))
+        assert len(cache) == 0
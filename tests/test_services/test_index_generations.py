@@ -0,0 +1,102 @@
+"""Unit tests for index generations."""
+
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.index_generations import IndexGenerations
+from polyhedra.services.vector_index import VectorIndex
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def generations(temp_dir):
+    """Generations with one cache directory that is not part of the index."""
+    (temp_dir / "cache").mkdir()
+    return IndexGenerations(temp_dir, exclude=["cache"])
+
+
+def write_index(directory: Path, rows: int) -> None:
+    """Write a small vector index."""
+    vectors = np.random.default_rng(rows).standard_normal((rows, 4))
+    VectorIndex(directory).write(vectors, [{"row": i} for i in range(rows)], "test-model")
+
+
+def test_flat_layout_until_published(temp_dir, generations):
+    """Without CURRENT, the root itself holds the index."""
+    assert generations.current() is None
+    assert generations.current_dir() == temp_dir
+
+    staged = generations.stage()
+    assert generations.current_dir() == temp_dir
+
+    generations.publish(staged)
+
+    assert staged.name == "gen-000001"
+    assert (temp_dir / "CURRENT").read_text(encoding="utf-8") == "gen-000001\n"
+    assert generations.current_dir() == staged
+
+
+def test_stage_links_current_files(temp_dir, generations):
+    """Inherited files are hard links; replacing one leaves the original intact."""
+    first = generations.stage(inherit=False)
+    write_index(first, 3)
+    generations.publish(first)
+
+    second = generations.stage()
+    manifest = second / VectorIndex.MANIFEST
+    assert os.stat(manifest).st_ino == os.stat(first / VectorIndex.MANIFEST).st_ino
+
+    index = VectorIndex(second).open()
+    index.append(np.ones((1, 4)), [{"row": 3}], [("3", "", "")], [0])
+
+    assert sorted(VectorIndex(first).open().entries()) == ["0", "1", "2"]
+    assert sorted(VectorIndex(second).open().entries()) == ["1", "2", "3"]
+    assert os.stat(manifest).st_ino != os.stat(first / VectorIndex.MANIFEST).st_ino
+
+
+def test_stage_migrates_flat_layout(temp_dir, generations):
+    """The first generation starts from the flat index, without caches."""
+    write_index(temp_dir, 2)
+
+    staged = generations.stage()
+
+    assert len(VectorIndex(staged).open()) == 2
+    assert not (staged / "cache").exists()
+
+
+def test_prune_keeps_recent_generations(temp_dir, generations):
+    """Older generations and the flat layout go; excluded names stay."""
+    write_index(temp_dir, 2)
+    published = []
+    for _ in range(4):
+        staged = generations.stage()
+        generations.publish(staged)
+        published.append(staged)
+        if len(published) == 1:
+            assert (temp_dir / VectorIndex.MANIFEST).exists()
+
+    assert generations.numbers() == [3, 4]
+    assert not (temp_dir / VectorIndex.MANIFEST).exists()
+    assert not list(temp_dir.glob("seg-*"))
+    assert (temp_dir / "cache").exists()
+    assert len(VectorIndex(generations.current_dir()).open()) == 2
+
+
+def test_discard(generations):
+    """An unpublished generation can be dropped; numbering moves on."""
+    staged = generations.stage()
+    generations.discard(staged)
+
+    assert not staged.exists()
+    assert generations.current() is None
+    assert generations.stage().name == "gen-000001"
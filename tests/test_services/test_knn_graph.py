@@ -0,0 +1,136 @@
+"""Unit tests for the k-NN graph."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.knn_graph import KNNGraph
+from polyhedra.services.sharded_index import ShardedIndex
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def make_index(directory: Path, vectors: np.ndarray) -> VectorIndex:
+    """Write and open a vector index with keys p0, p1, ..."""
+    index = VectorIndex(directory)
+    index.write(
+        vectors,
+        [{"id": f"p{i}"} for i in range(len(vectors))],
+        "test-model",
+        keys=[(f"p{i}", "", "") for i in range(len(vectors))],
+    )
+    return index.open()
+
+
+def brute_force(index, degree: int) -> dict[int, list[int]]:
+    """Nearest live rows of every live row, by comparing all pairs."""
+    rows = index.live_rows()
+    vectors = index.get_vectors(rows)
+    similarities = vectors @ vectors.T
+    np.fill_diagonal(similarities, -np.inf)
+    order = np.argsort(-similarities, axis=1)[:, :degree]
+    return {int(row): rows[order[i]].tolist() for i, row in enumerate(rows)}
+
+
+def graph_lists(graph: KNNGraph, index) -> dict[int, list[int]]:
+    """Neighbor lists of every live row."""
+    return {
+        int(row): graph.neighbors_of(int(row), graph.degree)[0].tolist()
+        for row in index.live_rows()
+    }
+
+
+@pytest.fixture
+def vectors():
+    """200 random unit vectors."""
+    return normalize(np.random.default_rng(0).standard_normal((200, 16)).astype(np.float32))
+
+
+def test_build_matches_brute_force(temp_dir, vectors):
+    """Stored lists are the exact nearest neighbors, without the row itself."""
+    index = make_index(temp_dir, vectors)
+    graph = KNNGraph(temp_dir)
+
+    stats = graph.build(index, degree=5)
+
+    assert stats == {"rows": 200, "degree": 5, "scanned": 200}
+    assert graph.neighbors.dtype == np.int32
+    assert graph.scores.dtype == np.float16
+    assert graph_lists(graph, index) == brute_force(index, 5)
+    rows, scores = graph.neighbors_of(7, 3)
+    assert scores == pytest.approx(vectors[rows] @ vectors[7], abs=1e-3)
+
+
+def test_update_after_append(temp_dir, vectors):
+    """Appending and tombstoning updates the lists to what a rebuild finds."""
+    index = make_index(temp_dir, vectors[:150])
+    graph = KNNGraph(temp_dir)
+    graph.build(index, degree=5)
+    lists = brute_force(index, 5)
+    deleted = [lists[0][0], lists[1][0]]
+
+    index.append(vectors[150:], [{"id": f"p{i}"} for i in range(150, 200)],
+                 [(f"p{i}", "", "") for i in range(150, 200)], deleted)
+    assert not graph.covers(index) and graph.extends(index)
+    stats = graph.update(index)
+
+    # Scores are stored as float16, so near ties may swap places
+    assert graph.covers(index)
+    assert stats["scanned"] < 150
+    expected = brute_force(index, 5)
+    assert {row: set(found) for row, found in graph_lists(graph, index).items()} == {
+        row: set(found) for row, found in expected.items()
+    }
+
+
+def test_compaction_rebuilds(temp_dir, vectors):
+    """Renumbered rows cannot be updated in place."""
+    index = make_index(temp_dir, vectors[:100])
+    graph = KNNGraph(temp_dir)
+    graph.build(index, degree=3)
+
+    index.append(vectors[100:], [{}] * 100, [(f"p{i}", "", "") for i in range(100, 200)],
+                 list(range(50)))
+
+    assert not graph.extends(index)
+    assert graph.update(index)["scanned"] == 150
+    assert graph_lists(graph, index) == brute_force(index, 3)
+
+
+def test_row_lookup(temp_dir, vectors):
+    """Paper keys map to live rows; unknown and removed keys to None."""
+    index = make_index(temp_dir, vectors[:10])
+    index.append(np.zeros((0, 16)), [], [], [3])
+    graph = KNNGraph(temp_dir)
+    graph.build(index)
+
+    assert graph.row("p7") == 7
+    assert graph.row("p3") is None
+    assert graph.row("other") is None
+    assert len(graph.neighbors_of(0, 32)[0]) == 8
+    assert KNNGraph(temp_dir).exists()
+
+
+def test_sharded_index(temp_dir, vectors):
+    """Graphs use the global rows of sharded indexes."""
+    sharded = ShardedIndex(temp_dir)
+    for name, part in (("hash-0", slice(0, 120)), ("hash-1", slice(120, 200))):
+        keys = [(f"p{i}", "", "") for i in range(200)][part]
+        sharded.write_shard(name, vectors[part], [{}] * len(keys), "test-model", keys)
+    sharded.save({"by": "hash", "count": 2, "model": "test-model",
+                  "quantization": "none", "shards": ["hash-0", "hash-1"]})
+    sharded.open()
+    graph = KNNGraph(temp_dir)
+    graph.build(sharded, degree=4)
+
+    assert graph.row("p150") == 150
+    assert not graph.extends(sharded)
+    assert graph_lists(graph, sharded) == brute_force(sharded, 4)
@@ -0,0 +1,105 @@
+"""Unit tests for the BM25 lexical index."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from polyhedra.services.vector_index import VectorIndex
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def papers():
+    """Papers whose titles share some terms."""
+    return [
+        {"id": "p0", "title": "ResNet-50 on ImageNet", "abstract": "Deep residual learning."},
+        {"id": "p1", "title": "Vision transformers", "abstract": "Transformers for images."},
+        {"id": "p2", "title": "SQuAD reading comprehension", "abstract": "A QA dataset."},
+        {"id": "p3", "title": "Transformers for QA", "abstract": "Fine-tuning on SQuAD."},
+    ]
+
+
+@pytest.fixture
+def index(temp_dir, papers):
+    """Vector index over the papers with random vectors."""
+    vectors = np.random.default_rng(0).standard_normal((len(papers), 8))
+    keys = [(paper["id"], "", "") for paper in papers]
+    VectorIndex(temp_dir).write(vectors, papers, "test-model", keys=keys)
+    return VectorIndex(temp_dir).open()
+
+
+def test_tokenize():
+    """Tokens are lowercase alphanumerics without stopwords."""
+    assert tokenize("ResNet-50 on the ImageNet") == ["resnet", "50", "imagenet"]
+
+
+class TestBM25Index:
+    """Tests for BM25Index."""
+
+    def test_build_layout(self, temp_dir, index):
+        """Postings are compact arrays stored next to the vectors."""
+        stats = BM25Index(temp_dir).build(index)
+        lexical = BM25Index(temp_dir).open()
+
+        assert stats["docs"] == 4
+        assert (temp_dir / "bm25" / "bm25.json").exists()
+        assert lexical.rows.dtype == np.int32
+        assert lexical.tf.dtype == np.uint16
+        assert lexical.offsets[-1] == len(lexical.rows)
+        term = lexical.terms["transformers"]
+        assert lexical.rows[lexical.offsets[term] : lexical.offsets[term + 1]].tolist() == [1, 3]
+
+    def test_exact_terms_rank_first(self, temp_dir, index):
+        """Rare terms outweigh common ones."""
+        lexical = BM25Index(temp_dir)
+        lexical.build(index)
+
+        rows, scores = lexical.search_many(["squad transformers", "imagenet", "unknown"], 3)
+
+        assert rows[0, 0] == 3
+        assert set(rows[0, :3].tolist()) == {1, 2, 3}
+        assert rows[1, 0] == 0
+        assert np.isinf(scores[1, 1:]).all()
+        assert np.isinf(scores[2]).all()
+
+    def test_matches(self, temp_dir, index):
+        """Rows sharing any term with the query."""
+        lexical = BM25Index(temp_dir)
+        lexical.build(index)
+
+        assert lexical.matches("QA and images").tolist() == [1, 2, 3]
+        assert lexical.matches("the").tolist() == []
+
+    def test_tombstoned_rows_are_skipped(self, temp_dir, index, papers):
+        """Only live rows are indexed; covers() notices appends."""
+        lexical = BM25Index(temp_dir)
+        lexical.build(index)
+        assert lexical.covers(index)
+
+        index.append(np.ones((1, 8)), [papers[3]], [("p3", "x", "")], [3])
+        assert not lexical.covers(index)
+
+        lexical.build(index)
+        rows, _ = lexical.search_many(["squad"], 2)
+        assert sorted(rows[0].tolist()) == [2, 4]
+
+
+def test_reciprocal_rank_fusion():
+    """Rows ranked by both lists win; padding is ignored."""
+    dense = (np.array([[1, 2, 3]]), np.array([[0.9, 0.8, -np.inf]]))
+    lexical = (np.array([[2, 4, 0]]), np.array([[5.0, 1.0, -np.inf]]))
+
+    rows, scores = reciprocal_rank_fusion([dense, lexical], 4)
+
+    assert rows[0].tolist() == [2, 1, 4, 0]
+    assert scores[0, 0] == pytest.approx(1 / 62 + 1 / 61)
+    assert np.isinf(scores[0, 3])
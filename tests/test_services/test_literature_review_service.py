@@ -134,6 +134,24 @@ class TestLiteratureReviewService:
         assert '"year": 2017' in result
         assert "Vaswani et al." in result
     
+    def test_select_papers_by_citation_count(self, review_service):
+        """Test papers fall back to citationCount ordering."""
+        papers = list(reversed(SAMPLE_PAPERS))
+        selected = review_service.select_papers(papers, max_papers=2)
+        
+        assert [p["citationCount"] for p in selected] == [50000, 40000]
+    
+    def test_select_papers_by_centrality(self, review_service):
+        """Test centrality takes precedence over citationCount."""
+        papers = [
+            {**paper, "centrality": score}
+            for paper, score in zip(SAMPLE_PAPERS, [0.2, 0.5, 1.0])
+        ]
+        selected = review_service.select_papers(papers)
+        
+        assert selected[0]["title"].startswith("An Image is Worth")
+        assert len(selected) == 3
+    
     def test_build_prompt_brief(self, review_service):
         """Test prompt building for brief depth."""
         prompt = review_service._build_prompt(
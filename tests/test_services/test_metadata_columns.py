@@ -0,0 +1,102 @@
+"""Unit tests for columnar metadata filters."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.metadata_columns import MetadataColumns, author_keys, parse_year
+from polyhedra.services.vector_index import VectorIndex
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def papers():
+    """Papers with the metadata forms seen in papers.json."""
+    return [
+        {"id": "p0", "year": 2019, "venue": "NeurIPS", "citationCount": 500,
+         "authors": [{"authorId": "111", "name": "Ada"}]},
+        {"id": "p1", "year": "2021", "venue": "neurips ", "citationCount": 12,
+         "authors": [{"authorId": "222", "name": "Bo"}, {"authorId": "111", "name": "Ada"}]},
+        {"id": "p2", "year": 2023, "venue": "ICML", "citationCount": 40, "authors": ["Cy"]},
+        {"id": "p3", "year": None, "venue": "", "authors": []},
+    ]
+
+
+@pytest.fixture
+def index(temp_dir, papers):
+    """Vector index over the papers."""
+    vectors = np.random.default_rng(0).standard_normal((len(papers), 8))
+    keys = [(paper["id"], "", "") for paper in papers]
+    VectorIndex(temp_dir).write(vectors, papers, "test-model", keys=keys)
+    return VectorIndex(temp_dir).open()
+
+
+@pytest.fixture
+def columns(temp_dir, index):
+    """Columns built from the index."""
+    MetadataColumns(temp_dir).build(index)
+    return MetadataColumns(temp_dir).open()
+
+
+def test_parse_year_and_author_keys():
+    """Years come from ints or date strings; authors key by ID, else name."""
+    assert parse_year("2019-06-01") == 2019
+    assert parse_year(None) == 0
+    assert author_keys([{"authorId": "7", "name": "X"}, {"name": "Yo"}, "Zed", {}]) == [
+        "7", "yo", "zed",
+    ]
+
+
+class TestMetadataColumns:
+    """Tests for MetadataColumns."""
+
+    def test_column_layout(self, temp_dir, columns):
+        """Columns are typed arrays indexed by row."""
+        assert (temp_dir / "columns" / "columns.json").exists()
+        assert columns.year.tolist() == [2019, 2021, 2023, 0]
+        assert columns.year.dtype == np.int16
+        assert columns.venue.tolist() == [0, 0, 1, -1]
+        assert columns.citations.tolist() == [500, 12, 40, 0]
+        assert len(columns.author_ids) == 4
+
+    @pytest.mark.parametrize(
+        "filters, expected",
+        [
+            ({}, [0, 1, 2, 3]),
+            ({"year_min": 2020}, [1, 2]),
+            ({"year_min": 2020, "year_max": 2022}, [1]),
+            ({"year_max": 2022}, [0, 1]),
+            ({"venues": ["NeurIPS"]}, [0, 1]),
+            ({"venues": "icml"}, [2]),
+            ({"venues": ["Nature"]}, []),
+            ({"min_citations": 40}, [0, 2]),
+            ({"authors": ["111"]}, [0, 1]),
+            ({"authors": ["cy", "222"]}, [1, 2]),
+            ({"authors": ["111"], "year_min": 2020}, [1]),
+        ],
+    )
+    def test_mask(self, columns, filters, expected):
+        """Each filter narrows the live rows."""
+        assert np.flatnonzero(columns.mask(filters)).tolist() == expected
+
+    def test_unknown_filter(self, columns):
+        """Misspelled filters are rejected."""
+        with pytest.raises(ValueError, match="Unknown filters: year"):
+            columns.mask({"year": 2020})
+
+    def test_dead_rows_are_masked(self, temp_dir, index, papers, columns):
+        """Tombstoned rows never match; covers() notices the change."""
+        index.append(np.ones((1, 8)), [papers[0]], [("p0", "x", "")], [0])
+        assert not columns.covers(index)
+
+        columns.build(index)
+
+        assert np.flatnonzero(columns.mask({"venues": ["NeurIPS"]})).tolist() == [1, 4]
@@ -0,0 +1,105 @@
+"""Unit tests for the ONNX Runtime embedding backend."""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services import onnx_embedding
+from polyhedra.services.onnx_embedding import ONNXEncoder, mean_pool, model_dir_for
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+class FakeSession:
+    """Stand-in for an InferenceSession: token states are token IDs."""
+
+    def run(self, outputs, feed):
+        ids = feed["input_ids"].astype(np.float32)
+        return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+
+@pytest.fixture
+def encoder():
+    """Encoder with a word-level tokenizer and a fake session."""
+    tokenizers = pytest.importorskip("tokenizers")
+    vocab = {"[PAD]": 0, "a": 1, "b": 2, "c": 3}
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[PAD]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+    encoder = ONNXEncoder.__new__(ONNXEncoder)
+    encoder.config = {"normalize": False}
+    encoder.tokenizer = tokenizer
+    encoder.session = FakeSession()
+    encoder.input_names = ["input_ids", "attention_mask"]
+    return encoder
+
+
+def test_mean_pool():
+    """Padding tokens do not count toward the mean."""
+    hidden = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+
+    np.testing.assert_allclose(mean_pool(hidden, mask), [[2.0, 3.0]])
+
+
+def test_model_dir_for(temp_dir, monkeypatch):
+    """Names map into the export directory; existing exports are used as is."""
+    monkeypatch.setenv("POLYHEDRA_ONNX_DIR", str(temp_dir))
+    assert model_dir_for("org/model") == temp_dir / "org--model"
+
+    (temp_dir / onnx_embedding.CONFIG).write_text("{}", encoding="utf-8")
+    assert model_dir_for(str(temp_dir)) == temp_dir
+
+
+def test_missing_onnxruntime(temp_dir, monkeypatch):
+    """The error names the extra to install."""
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+
+    with pytest.raises(ImportError, match=r"polyhedra\[onnx\]"):
+        ONNXEncoder(temp_dir)
+
+
+class TestEncode:
+    """Tests for ONNXEncoder.encode."""
+
+    def test_batches_keep_input_order(self, encoder):
+        """Length-sorted batches are put back in input order."""
+        embeddings = encoder.encode(["a", "c c c", "b b", "a c"], batch_size=2)
+
+        assert embeddings.dtype == np.float32
+        np.testing.assert_allclose(embeddings[:, 0], [1.0, 3.0, 2.0, 2.0])
+        np.testing.assert_allclose(embeddings[:, 1], 1.0)
+
+    def test_single_sentence_and_normalize(self, encoder):
+        """A string gives one vector; normalization is optional."""
+        vector = encoder.encode("b", normalize_embeddings=True)
+
+        assert vector.shape == (2,)
+        np.testing.assert_allclose(vector, np.array([2.0, 1.0]) / np.sqrt(5), rtol=1e-6)
+
+
+@pytest.mark.integration
+def test_matches_pytorch(temp_dir):
+    """ONNX vectors match sentence-transformers; int8 stays close."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from sentence_transformers import SentenceTransformer
+
+    sentences = ["Attention is all you need.", "Deep residual learning", "BERT " * 300]
+    expected = SentenceTransformer("all-MiniLM-L6-v2").encode(sentences)
+    onnx_embedding.export_onnx("all-MiniLM-L6-v2", temp_dir, quantize=True)
+
+    exact = ONNXEncoder(temp_dir).encode(sentences)
+    quantized = ONNXEncoder(temp_dir, quantized=True).encode(sentences)
+
+    np.testing.assert_allclose(exact, expected, atol=1e-4)
+    assert (np.sum(quantized * expected, axis=1) > 0.98).all()
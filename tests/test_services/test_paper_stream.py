@@ -0,0 +1,87 @@
+"""Unit tests for incremental paper file reading."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from polyhedra.services import paper_stream
+from polyhedra.services.paper_stream import batched, iter_papers
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def papers():
+    """Papers with non-ASCII text and nested fields."""
+    return [
+        {"id": f"p{i}", "title": f"Paper {i} – ü", "authors": [{"name": "A"}], "year": 2000 + i}
+        for i in range(25)
+    ]
+
+
+class TestIterPapers:
+    """Tests for iter_papers."""
+
+    @pytest.mark.parametrize("block", [1, 7, 1 << 20])
+    def test_json_array(self, temp_dir, papers, monkeypatch, block):
+        """Items are decoded one at a time across read blocks."""
+        monkeypatch.setattr(paper_stream, "READ_BLOCK", block)
+        path = temp_dir / "papers.json"
+        path.write_text("﻿ \n" + json.dumps(papers, indent=2, ensure_ascii=False),
+                        encoding="utf-8")
+
+        assert list(iter_papers(path)) == papers
+
+    def test_number_at_block_end(self, temp_dir, monkeypatch):
+        """A number cut by the end of a block is read whole."""
+        monkeypatch.setattr(paper_stream, "READ_BLOCK", 3)
+        path = temp_dir / "papers.json"
+        path.write_text("[12345, 678]", encoding="utf-8")
+
+        assert list(iter_papers(path)) == [12345, 678]
+
+    def test_jsonl(self, temp_dir, papers):
+        """JSON Lines are read line by line; blank lines are skipped."""
+        path = temp_dir / "papers.jsonl"
+        path.write_text("\n".join(json.dumps(p) for p in papers) + "\n\n", encoding="utf-8")
+
+        assert list(iter_papers(path)) == papers
+
+    def test_empty_array(self, temp_dir):
+        """An empty array yields nothing."""
+        path = temp_dir / "papers.json"
+        path.write_text("[ ]", encoding="utf-8")
+
+        assert list(iter_papers(path)) == []
+
+    @pytest.mark.parametrize(
+        "text", ['[{"a": 1} {"b": 2}]', '[{"a": 1},, {"b": 2}]', '[{"a": 1}', '[{"a":']
+    )
+    def test_invalid_array(self, temp_dir, text):
+        """Malformed arrays raise ValueError."""
+        path = temp_dir / "papers.json"
+        path.write_text(text, encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            list(iter_papers(path))
+
+    def test_invalid_line(self, temp_dir):
+        """The failing line is reported."""
+        path = temp_dir / "papers.jsonl"
+        path.write_text('{"a": 1}\n{"a": \n', encoding="utf-8")
+
+        with pytest.raises(ValueError, match="line 2"):
+            list(iter_papers(path))
+
+
+def test_batched():
+    """Items are grouped into fixed-size lists."""
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
@@ -0,0 +1,138 @@
+"""Unit tests for chunked, multi-process embedding."""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.parallel_embedding import ChunkedEncoder
+
+
+class FakeModel:
+    """Deterministic stand-in for a sentence-transformers model."""
+
+    def __init__(self, fail_after: int | None = None):
+        self.calls: list[list[str]] = []
+        self.fail_after = fail_after
+
+    def encode(self, texts, **kwargs):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise RuntimeError("interrupted")
+        self.calls.append(list(texts))
+        return np.array([[len(text), text.count("a"), 1.0] for text in texts])
+
+
+def fake_loader(model_name):
+    """Loader used by worker processes."""
+    return FakeModel()
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def texts():
+    """Texts of varied length."""
+    return [("a" * (i % 7)) + "b" * (i % 13) for i in range(50)]
+
+
+def expected(texts):
+    """Embeddings the fake model produces in input order."""
+    return FakeModel().encode(texts).astype(np.float32)
+
+
+class TestChunkedEncoder:
+    """Tests for ChunkedEncoder."""
+
+    def test_keeps_input_order(self, texts):
+        """Vectors come back in input order although chunks are length-sorted."""
+        model = FakeModel()
+        encoder = ChunkedEncoder("m", workers=1, chunk_size=8, model=model)
+
+        np.testing.assert_array_equal(encoder.encode(texts), expected(texts))
+        assert len(model.calls) == 7
+        assert [len(text) for text in model.calls[0]] == sorted(
+            (len(text) for text in texts), reverse=True
+        )[:8]
+
+    def test_progress(self, texts):
+        """Progress is reported after every chunk."""
+        reports = []
+        encoder = ChunkedEncoder("m", workers=1, chunk_size=20, model=FakeModel(),
+                                 progress=lambda done, total: reports.append((done, total)))
+        encoder.encode(texts)
+
+        assert reports == [(0, 50), (20, 50), (40, 50), (50, 50)]
+
+    def test_resume(self, temp_dir, texts):
+        """An interrupted run resumes at the first unfinished chunk."""
+        checkpoint = temp_dir / "chunks"
+        with pytest.raises(RuntimeError):
+            ChunkedEncoder("m", workers=1, chunk_size=10, checkpoint_dir=checkpoint,
+                           model=FakeModel(fail_after=3)).encode(texts)
+        assert len(list(checkpoint.glob("chunk-*.npy"))) == 3
+
+        model = FakeModel()
+        embeddings = ChunkedEncoder("m", workers=1, chunk_size=10, checkpoint_dir=checkpoint,
+                                    model=model).encode(texts)
+
+        np.testing.assert_array_equal(embeddings, expected(texts))
+        assert len(model.calls) == 2
+        assert not checkpoint.exists()
+
+    def test_stale_checkpoint_ignored(self, temp_dir, texts):
+        """Saved chunks of different texts are discarded."""
+        checkpoint = temp_dir / "chunks"
+        with pytest.raises(RuntimeError):
+            ChunkedEncoder("m", workers=1, chunk_size=10, checkpoint_dir=checkpoint,
+                           model=FakeModel(fail_after=2)).encode(texts)
+
+        model = FakeModel()
+        changed = texts[:-1] + ["new"]
+        embeddings = ChunkedEncoder("m", workers=1, chunk_size=10, checkpoint_dir=checkpoint,
+                                    model=model).encode(changed)
+
+        np.testing.assert_array_equal(embeddings, expected(changed))
+        assert len(model.calls) == 5
+
+    def test_checkpoint_of_other_identity_ignored(self, temp_dir, texts):
+        """Chunks saved for another runtime of the same model are not reused."""
+        checkpoint = temp_dir / "chunks"
+        with pytest.raises(RuntimeError):
+            ChunkedEncoder("m", workers=1, chunk_size=10, checkpoint_dir=checkpoint,
+                           model=FakeModel(fail_after=2), identity="m@onnx").encode(texts)
+
+        model = FakeModel()
+        ChunkedEncoder("m", workers=1, chunk_size=10, checkpoint_dir=checkpoint,
+                       model=model).encode(texts)
+
+        assert len(model.calls) == 5
+
+    def test_worker_processes(self, texts):
+        """Chunks encoded in worker processes match in-process encoding."""
+        encoder = ChunkedEncoder("m", workers=2, chunk_size=10, threads_per_worker=1,
+                                 loader=fake_loader)
+
+        np.testing.assert_array_equal(encoder.encode(texts), expected(texts))
+
+    def test_worker_without_torch(self):
+        """Workers with a loader that does not need PyTorch never import it."""
+        code = (
+            "import sys\n"
+            "from polyhedra.services.parallel_embedding import _init_worker\n"
+            "_init_worker(str, 'm', 1)\n"
+            "assert 'torch' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_empty(self):
+        """No texts give an empty matrix."""
+        assert ChunkedEncoder("m", workers=1, model=FakeModel()).encode([]).shape[0] == 0
+
@@ -0,0 +1,105 @@
+"""Unit tests for full-text passage chunking and grouping."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from polyhedra.services.passage_index import (
+    DocumentOwners,
+    chunk_pages,
+    group_by_paper,
+    iter_documents,
+    read_pages,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+def words(start: int, stop: int) -> str:
+    """Numbered words w<start> ... w<stop - 1>."""
+    return " ".join(f"w{i}" for i in range(start, stop))
+
+
+class TestChunkPages:
+    """Tests for chunk_pages."""
+
+    def test_windows_overlap(self):
+        """Consecutive windows share overlap tokens and cover the text."""
+        chunks = chunk_pages([(1, words(0, 10))], window=4, overlap=1)
+
+        assert [chunk["text"] for chunk in chunks] == [
+            words(0, 4), words(3, 7), words(6, 10),
+        ]
+        assert [chunk["chunk"] for chunk in chunks] == [0, 1, 2]
+
+    def test_page_of_first_token(self):
+        """Windows cross page breaks and point to the page they start on."""
+        chunks = chunk_pages([(1, words(0, 3)), (2, words(3, 8))], window=4, overlap=2)
+
+        assert [(chunk["page"], chunk["text"]) for chunk in chunks] == [
+            (1, words(0, 4)), (1, words(2, 6)), (2, words(4, 8)),
+        ]
+
+    def test_short_and_empty_documents(self):
+        """A short text is one chunk; an empty one has none."""
+        assert chunk_pages([(None, "just a few words")], window=10, overlap=2) == [
+            {"chunk": 0, "page": None, "text": "just a few words"}
+        ]
+        assert chunk_pages([(1, "  \n ")]) == []
+
+    def test_overlap_must_be_smaller(self):
+        """An overlap as large as the window would never advance."""
+        with pytest.raises(ValueError, match="Overlap"):
+            chunk_pages([(1, "text")], window=4, overlap=4)
+
+
+def test_iter_documents(temp_dir):
+    """PDFs and text notes are found recursively; generated reviews are not."""
+    for name in ("pdfs/a.pdf", "notes/b.md", "c.txt", "review.md", "papers.json"):
+        path = temp_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x", encoding="utf-8")
+
+    found = [path.relative_to(temp_dir).as_posix() for path in iter_documents(temp_dir)]
+
+    assert found == ["c.txt", "notes/b.md", "pdfs/a.pdf"]
+    assert read_pages(temp_dir / "c.txt") == [(None, "x")]
+
+
+def test_document_owners():
+    """Files belong to papers by ID, BibTeX key or title on the first lines."""
+    papers = [
+        {"id": "abc123", "title": "Attention Is All You Need"},
+        {"id": "def456", "title": "Deep Residual Learning", "bibtex_key": "he2016deep"},
+    ]
+    owners = DocumentOwners(papers)
+
+    assert owners.match(Path("ABC123.pdf"), []) is papers[0]
+    assert owners.match(Path("he2016deep.md"), []) is papers[1]
+    assert owners.match(Path("notes.md"), [(None, "# Deep Residual Learning\n\nWe")]) is papers[1]
+    assert owners.match(Path("notes.md"), [(None, "Unrelated text")]) is None
+
+
+def test_group_by_paper():
+    """Papers rank by their best passage and keep their top passages."""
+    hits = [
+        {"paper_id": p, "title": p.upper(), "path": f"{p}.md", "page": page, "chunk": chunk,
+         "text": f"{p}{chunk}", "relevance_score": score}
+        for p, page, chunk, score in [
+            ("a", 1, 0, 0.9), ("b", 2, 3, 0.8), ("a", 1, 1, 0.7), ("a", 2, 2, 0.6),
+            ("c", None, 0, 0.5), ("b", 4, 5, 0.4),
+        ]
+    ]
+
+    grouped = group_by_paper(hits, k=2, passages_per_paper=2)
+
+    assert [paper["paper_id"] for paper in grouped] == ["a", "b"]
+    assert grouped[0]["relevance_score"] == 0.9
+    assert [p["chunk"] for p in grouped[0]["passages"]] == [0, 1]
+    assert [p["page"] for p in grouped[1]["passages"]] == [2, 4]
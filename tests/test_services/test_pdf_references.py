@@ -0,0 +1,142 @@
+"""Unit tests for PDF reference extraction."""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from polyhedra.services import pdf_references
+from polyhedra.services.pdf_references import (
+    PDFReferenceExtractor,
+    TitleMatcher,
+    guess_title,
+    normalize_title,
+    split_references,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def corpus():
+    """Corpus papers referenced by the sample bibliography."""
+    return [
+        {"paperId": "vaswani", "title": "Attention Is All You Need"},
+        {"paperId": "devlin", "title": "BERT: Pre-training of Deep Bidirectional Transformers"},
+        {
+            "paperId": "dosovitskiy",
+            "bibtex_key": "dosovitskiy2021",
+            "title": "An Image is Worth 16x16 Words: Transformers for Image Recognition at Scale",
+        },
+    ]
+
+
+SAMPLE_TEXT = """An Image is Worth 16x16 Words: Transformers for
+Image Recognition at Scale
+Alexey Dosovitskiy et al.
+
+1 Introduction
+Transformers [1] and BERT [2] changed NLP.
+
+References
+[1] A. Vaswani, N. Shazeer, et al. Attention is all you
+need. In NeurIPS, 2017.
+[2] J. Devlin, M. Chang, K. Lee, and K. Toutanova. "BERT: Pre-training of deep
+bidirectional transformers for language understanding," In NAACL, 2019.
+[3] K. He, X. Zhang, S. Ren, and J. Sun. Deep residual learning for image recog-
+nition. In CVPR, 2016.
+
+A Appendix
+Extra material.
+"""
+
+
+class TestParsing:
+    """Tests for bibliography parsing."""
+
+    def test_split_bracketed(self):
+        """Bracketed entries are split and the appendix is dropped."""
+        entries = split_references(SAMPLE_TEXT)
+
+        assert len(entries) == 3
+        assert entries[2].endswith("image recognition. In CVPR, 2016.")
+
+    def test_split_author_year(self):
+        """Author-year bibliographies split on entry starts."""
+        text = (
+            "Bibliography\n"
+            "He, K., Zhang, X. 2016. Deep residual learning for image recognition.\n"
+            "Vaswani, A., Shazeer, N. 2017. Attention is all you need.\n"
+        )
+        assert len(split_references(text)) == 2
+
+    def test_no_reference_section(self):
+        """Text without a bibliography yields nothing."""
+        assert split_references("Just an abstract.") == []
+
+    def test_guess_title(self):
+        """Quoted titles win, then the sentence after the year."""
+        quoted = 'J. Devlin. "BERT: Pre-training of deep transformers," In NAACL, 2019.'
+        assert guess_title(quoted) == "BERT: Pre-training of deep transformers"
+
+        author_year = "He, K., Zhang, X. 2016. Deep residual learning for image recognition. CVPR."
+        assert guess_title(author_year) == "Deep residual learning for image recognition"
+
+    def test_normalize_title(self):
+        """Punctuation and case do not affect the normalized form."""
+        assert normalize_title("BERT: Pre-Training!") == normalize_title("bert pre training")
+
+
+class TestTitleMatcher:
+    """Tests for corpus title matching."""
+
+    def test_exact_and_fuzzy(self, corpus):
+        """Exact, contained and slightly misspelled titles match."""
+        matcher = TitleMatcher([paper["title"] for paper in corpus])
+
+        assert matcher.match("attention is all you need") == 0
+        assert matcher.match("Attention is all you ned") == 0
+        assert matcher.match(
+            "J. Devlin. BERT: Pre-training of deep bidirectional transformers for "
+            "language understanding. NAACL 2019"
+        ) == 1
+        assert matcher.match("Deep residual learning for image recognition") is None
+
+
+class TestExtractor:
+    """Tests for end-to-end extraction."""
+
+    def test_extract_edges(self, temp_dir, corpus, monkeypatch):
+        """PDFs are assigned by file name and bibliographies become edges."""
+        (temp_dir / "dosovitskiy2021.pdf").write_bytes(b"%PDF-1.4")
+        monkeypatch.setattr(pdf_references, "extract_pdf_text", lambda path: [SAMPLE_TEXT])
+
+        result = PDFReferenceExtractor(temp_dir, max_workers=1).extract(corpus, temp_dir)
+
+        assert sorted(result["edges"]) == [("dosovitskiy", "devlin"), ("dosovitskiy", "vaswani")]
+        assert result["references_found"] == 3
+        assert result["unassigned_pdfs"] == []
+
+    def test_extract_assigns_by_title(self, temp_dir, corpus, monkeypatch):
+        """A PDF without a known file name is assigned by its first page."""
+        (temp_dir / "download.pdf").write_bytes(b"%PDF-1.4")
+        monkeypatch.setattr(pdf_references, "extract_pdf_text", lambda path: [SAMPLE_TEXT])
+
+        result = PDFReferenceExtractor(temp_dir, max_workers=1).extract(corpus, temp_dir)
+
+        assert len(result["edges"]) == 2
+        assert result["edges"][0][0] == "dosovitskiy"
+
+    def test_extract_reports_errors(self, temp_dir, corpus):
+        """Unreadable PDFs are reported instead of aborting the run."""
+        (temp_dir / "broken.pdf").write_bytes(b"not a pdf")
+
+        result = PDFReferenceExtractor(temp_dir, max_workers=1).extract(corpus, temp_dir)
+
+        assert result["edges"] == []
+        assert len(result["errors"]) == 1
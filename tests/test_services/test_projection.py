@@ -0,0 +1,105 @@
+"""Unit tests for PCA projections of the vector index."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.projection import apply_pca, fit_pca
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def vectors():
+    """Unit vectors whose variance lies mostly in 8 of 32 dimensions."""
+    rng = np.random.default_rng(0)
+    scale = np.r_[np.full(8, 1.0), np.full(24, 0.05)]
+    rotation, _ = np.linalg.qr(rng.standard_normal((32, 32)))
+    return normalize((rng.standard_normal((1000, 32)) * scale) @ rotation)
+
+
+@pytest.fixture
+def index(temp_dir, vectors):
+    """Open vector index over the first 900 fixture vectors."""
+    keys = [(f"p{i}", "", "") for i in range(900)]
+    VectorIndex(temp_dir).write(vectors[:900], [{"id": i} for i in range(900)], "m", keys)
+    return VectorIndex(temp_dir).open()
+
+
+def test_fit_pca(vectors):
+    """Components are orthonormal and keep the high-variance directions."""
+    mean, components = fit_pca(vectors, 8)
+
+    assert mean.shape == (32,)
+    assert components.shape == (32, 8)
+    np.testing.assert_allclose(components.T @ components, np.eye(8), atol=1e-5)
+    kept = np.var(apply_pca(vectors, mean, components), axis=0).sum()
+    assert kept > 0.9 * np.var(vectors, axis=0).sum()
+
+
+def test_fit_pca_invalid(vectors):
+    """Dimensions must be below the input's, with enough samples to fit them."""
+    with pytest.raises(ValueError, match="between 1 and 31"):
+        fit_pca(vectors, 32)
+    with pytest.raises(ValueError, match="at least 16 vectors"):
+        fit_pca(vectors[:10], 16)
+
+
+class TestReducedIndex:
+    """Tests for VectorIndex.reduce and project."""
+
+    def test_search_after_reduce(self, temp_dir, index, vectors):
+        """Projected queries find mostly the same neighbors in fewer dimensions."""
+        exact, _ = index.search_many(vectors[900:], 10)
+        index.reduce(8)
+
+        reopened = VectorIndex(temp_dir).open()
+        rows, scores = reopened.search_many(reopened.project(vectors[900:]), 10)
+
+        assert reopened.manifest["dim"] == 8 and reopened.dimensions == 8
+        assert reopened.get_vectors([0]).shape == (1, 8)
+        assert np.mean([len(set(a) & set(e)) / 10 for a, e in zip(rows, exact)]) > 0.8
+        assert scores.max() <= 1 + 1e-5
+
+    def test_append_projects_model_embeddings(self, index, vectors):
+        """Rows appended later go through the stored projection, also after compaction."""
+        index.reduce(8)
+        keys = [(f"p{i}", "", "") for i in range(900, 1000)]
+
+        compacted = index.append(
+            vectors[900:], [{"id": i} for i in range(900, 1000)], keys, list(range(300))
+        )
+
+        assert compacted
+        assert len(index) == 700 and index.dimensions == 8
+        rows, scores = index.search_many(index.project(vectors[950:951]), 1)
+        assert rows[0, 0] == index.entries()["p950"][0]
+        assert scores[0, 0] == pytest.approx(1.0, abs=1e-5)
+
+    def test_quantized_reduced_index(self, index, vectors):
+        """Codes are rebuilt from the projected vectors."""
+        index.quantize("int8")
+        index.reduce(8)
+
+        assert index.segments[0].codes.shape == (900, 8)
+        rows, _ = index.search_many(index.project(vectors[:1]), 1)
+        assert rows[0, 0] == 0
+
+    def test_reduce_once(self, temp_dir, index, vectors):
+        """A reduced index cannot be reduced again; a rewrite drops the projection."""
+        index.reduce(8)
+        with pytest.raises(ValueError, match="already reduced"):
+            index.reduce(4)
+
+        index.write(vectors[:10], [{}] * 10, "m")
+
+        assert VectorIndex(temp_dir).open().dimensions == 0
+        assert not list(temp_dir.glob("projection-*"))
@@ -0,0 +1,127 @@
+"""Unit tests for quantized vector codes and scans."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services import quantization
+from polyhedra.services.quantization import (
+    hamming_distances,
+    int8_scale,
+    int8_scores,
+    quantize_binary,
+    quantize_int8,
+)
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def vectors():
+    """Unit vectors around a few cluster centers."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((10, 32))
+    labels = rng.integers(0, 10, 1500)
+    return normalize(centers[labels] + 0.5 * rng.standard_normal((1500, 32)))
+
+
+@pytest.fixture
+def index(temp_dir, vectors):
+    """Open vector index over the fixture vectors."""
+    keys = [(f"p{i}", "", "") for i in range(len(vectors))]
+    VectorIndex(temp_dir).write(vectors, [{"id": i} for i in range(len(vectors))], "m", keys)
+    return VectorIndex(temp_dir).open()
+
+
+class TestCodes:
+    """Tests for the encoding helpers."""
+
+    def test_int8_round_trip(self, vectors):
+        """Decoded int8 codes stay within half a step of the input."""
+        scale = int8_scale(vectors)
+        codes = quantize_int8(vectors, scale)
+
+        assert codes.dtype == np.int8
+        assert np.abs(codes.astype(np.float32) * scale - vectors).max() <= scale.max() / 2 + 1e-6
+        np.testing.assert_allclose(
+            int8_scores(codes, scale, vectors[:5], block=100), vectors[:5] @ vectors.T, atol=0.05
+        )
+
+    def test_binary_padding(self):
+        """Sign bits are padded to whole 64-bit words."""
+        codes = quantize_binary(np.array([[1.0, -1.0] * 50]))
+
+        assert codes.shape == (1, 16)
+        assert codes[0, 0] == 0b10101010
+        assert not codes[0, 13:].any()
+
+    @pytest.mark.parametrize("native", [True, False])
+    def test_hamming_distances(self, vectors, monkeypatch, native):
+        """Both popcount paths agree with counting differing signs."""
+        if not native:
+            monkeypatch.setattr(quantization, "_bitwise_count", None)
+        elif quantization._bitwise_count is None:
+            pytest.skip("NumPy has no bitwise_count")
+
+        distances = hamming_distances(quantize_binary(vectors), quantize_binary(vectors[:3]))
+        expected = ((vectors[:3, None] > 0) != (vectors[None] > 0)).sum(axis=2)
+        np.testing.assert_array_equal(distances, expected)
+
+
+class TestQuantizedSearch:
+    """Tests for VectorIndex scans over codes."""
+
+    @pytest.mark.parametrize("mode", ["int8", "binary"])
+    def test_matches_exact(self, index, vectors, mode):
+        """Shortlists rescored in float return the exact neighbors and scores."""
+        exact_rows, exact_scores = index.search_many(vectors[:10], 5)
+
+        index.quantize(mode)
+        rows, scores = index.search_many(vectors[:10], 5)
+
+        assert index.quantization == mode
+        assert (rows[:, 0] == np.arange(10)).all()
+        assert np.mean([len(set(a) & set(e)) / 5 for a, e in zip(rows, exact_rows)]) >= 0.8
+        np.testing.assert_allclose(
+            scores, np.einsum("qkd,qd->qk", index.get_vectors(rows.ravel()).reshape(10, 5, -1),
+                              vectors[:10]), rtol=1e-5
+        )
+        assert scores[:, 0] == pytest.approx(exact_scores[:, 0])
+
+    def test_persists_through_updates(self, temp_dir, index, vectors):
+        """Appended and compacted segments are written with codes too."""
+        index.quantize("binary")
+        index.append(vectors[:2], [{"id": "a"}, {"id": "b"}], [("a", "", ""), ("b", "", "")],
+                     deleted=[0, 1])
+
+        reopened = VectorIndex(temp_dir).open()
+        assert reopened.quantization == "binary"
+        assert all(segment.codes is not None for segment in reopened.segments)
+        rows, _ = reopened.search_many(vectors[:1], 1)
+        assert rows[0, 0] == 1500
+
+        reopened.compact()
+        assert len(reopened.segments) == 1
+        assert (temp_dir / reopened.segments[0].name / "codes_binary.npy").exists()
+        assert reopened.metadata(reopened.search_many(vectors[:1], 1)[0][0]) == [{"id": "a"}]
+
+    def test_switch_back(self, temp_dir, index):
+        """Returning to exact scans removes the codes."""
+        index.quantize("int8")
+        index.quantize("none")
+
+        assert index.quantization == "none"
+        assert not list(temp_dir.glob("seg-*/codes_*"))
+
+    def test_unknown_mode(self, index):
+        """Unknown schemes are rejected."""
+        with pytest.raises(ValueError, match="Unknown quantization"):
+            index.quantize("int4")
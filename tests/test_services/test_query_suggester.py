@@ -0,0 +1,148 @@
+"""Unit tests for query suggester."""
+
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from polyhedra.services.query_suggester import PrefixTrie, QuerySuggester
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def semantic_scholar():
+    """Mock Semantic Scholar service with autocomplete."""
+    service = MagicMock()
+    service.autocomplete = AsyncMock(
+        return_value=["Graph Neural Networks: A Review", "Graph Attention Networks"]
+    )
+    return service
+
+
+class TestPrefixTrie:
+    """Tests for the prefix trie."""
+
+    def test_complete_by_weight(self):
+        """Completions are ordered by weight."""
+        trie = PrefixTrie()
+        trie.insert("transformers", 1.0)
+        trie.insert("transfer learning", 2.0)
+        trie.insert("vision transformers", 5.0)
+
+        assert trie.complete("trans") == ["transfer learning", "transformers"]
+        assert trie.complete("Trans", limit=1) == ["transfer learning"]
+        assert trie.complete("xyz") == []
+
+    def test_insert_accumulates_weight(self):
+        """Re-inserting a term raises its rank."""
+        trie = PrefixTrie()
+        trie.insert("graph networks", 1.0)
+        trie.insert("graph neural networks", 1.5)
+        trie.insert("Graph  Networks", 1.0)
+
+        assert trie.complete("graph") == ["graph networks", "graph neural networks"]
+        assert len(trie) == 2
+
+    def test_top_n_bound(self):
+        """Each node only keeps top_n completions."""
+        trie = PrefixTrie(top_n=2)
+        for i in range(5):
+            trie.insert(f"query {i}", float(i))
+
+        assert trie.complete("query", limit=10) == ["query 4", "query 3"]
+
+
+class TestQuerySuggester:
+    """Tests for the suggestion service."""
+
+    @pytest.mark.asyncio
+    async def test_suggest_from_titles(self, temp_dir, semantic_scholar):
+        """Titles in papers.json are suggested without network calls."""
+        (temp_dir / "literature").mkdir()
+        (temp_dir / "literature" / "papers.json").write_text(
+            json.dumps([{"title": "Attention Is All You Need"}]), encoding="utf-8"
+        )
+        suggester = QuerySuggester(temp_dir, semantic_scholar)
+
+        result = await suggester.suggest("atten")
+
+        assert result == {"suggestions": ["Attention Is All You Need"], "source": "cache"}
+        semantic_scholar.autocomplete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_suggest_miss_calls_api_once(self, temp_dir, semantic_scholar):
+        """A trie miss is answered by the API and cached."""
+        suggester = QuerySuggester(temp_dir, semantic_scholar)
+
+        first = await suggester.suggest("graph")
+        second = await suggester.suggest("graph a")
+
+        assert first["source"] == "api"
+        assert set(first["suggestions"]) == {
+            "Graph Neural Networks: A Review",
+            "Graph Attention Networks",
+        }
+        assert second == {"suggestions": ["Graph Attention Networks"], "source": "cache"}
+        semantic_scholar.autocomplete.assert_awaited_once_with("graph")
+
+    @pytest.mark.asyncio
+    async def test_short_prefix_skips_api(self, temp_dir, semantic_scholar):
+        """Very short prefixes never reach the network."""
+        suggester = QuerySuggester(temp_dir, semantic_scholar)
+
+        result = await suggester.suggest("g")
+
+        assert result["suggestions"] == []
+        semantic_scholar.autocomplete.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_recorded_queries_persist(self, temp_dir, semantic_scholar):
+        """Past queries rank first and survive a restart."""
+        (temp_dir / ".poly").mkdir()
+        suggester = QuerySuggester(temp_dir, semantic_scholar)
+        await suggester.suggest("graph")
+        suggester.record_query("graph contrastive learning")
+
+        restarted = QuerySuggester(temp_dir, semantic_scholar)
+        result = await restarted.suggest("graph")
+
+        assert result["suggestions"][0] == "graph contrastive learning"
+        assert len(result["suggestions"]) == 3
+        semantic_scholar.autocomplete.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_corrupt_cache_starts_empty(self, temp_dir, semantic_scholar):
+        """An unreadable cache file is replaced instead of breaking suggestions."""
+        cache_path = temp_dir / ".poly" / "cache" / "suggestions.json"
+        cache_path.parent.mkdir(parents=True)
+        cache_path.write_text('{"queries": {"graph', encoding="utf-8")
+        suggester = QuerySuggester(temp_dir, semantic_scholar)
+
+        result = await suggester.suggest("graph")
+
+        assert result["source"] == "api"
+        assert "graph" in json.loads(cache_path.read_text(encoding="utf-8"))["remote"]
+
+    @pytest.mark.asyncio
+    async def test_outside_project(self, temp_dir, semantic_scholar):
+        """Outside an initialized project nothing is written; odd entries are skipped."""
+        (temp_dir / "literature").mkdir()
+        (temp_dir / "literature" / "papers.json").write_text(
+            json.dumps(["not a paper", {"title": "Graph Transformers"}]), encoding="utf-8"
+        )
+        suggester = QuerySuggester(temp_dir, semantic_scholar)
+
+        suggester.record_query("graph contrastive learning")
+        result = await suggester.suggest("graph")
+
+        assert result["suggestions"][0] == "graph contrastive learning"
+        assert "Graph Transformers" in result["suggestions"]
+        assert not (temp_dir / ".poly").exists()
@@ -1,11 +1,18 @@
 ﻿"""Unit tests for RAG service."""
 
+import asyncio
+import json
+import shutil
 import tempfile
+import threading
 from pathlib import Path
 
 import numpy as np
 import pytest
 
+from polyhedra.services.ann_index import load_ann
+from polyhedra.services.embedding_cache import EmbeddingCache
+from polyhedra.services.onnx_embedding import load_onnx_encoder
 from polyhedra.services.rag_service import RAGService
 
 
@@ -61,7 +68,7 @@ class TestIndexing:
         count = rag_service.index_papers(sample_papers)
         
         assert count == 3
-        assert (temp_dir / ".poly" / "embeddings" / "papers.pkl").exists()
+        assert (rag_service.generations.current_dir() / "manifest.json").exists()
         assert rag_service.is_indexed()
 
     def test_index_creates_directory(self, rag_service, sample_papers, temp_dir):
@@ -133,6 +140,26 @@ class TestQuerying:
         results = rag_service.query("test", k=100)
         assert len(results) == 3
 
+    def test_query_many_matches_query(self, rag_service, sample_papers):
+        """Batched queries return the same results as single queries."""
+        rag_service.index_papers(sample_papers)
+        queries = ["transformers", "image classification"]
+
+        batched = rag_service.query_many(queries, k=2)
+
+        assert len(batched) == 2
+        for query, results in zip(queries, batched):
+            single = rag_service.query(query, k=2)
+            assert [r["id"] for r in results] == [r["id"] for r in single]
+            assert [r["relevance_score"] for r in results] == pytest.approx(
+                [r["relevance_score"] for r in single], abs=1e-5
+            )
+
+    def test_query_many_empty(self, rag_service):
+        """No queries, or no index, gives empty results."""
+        assert rag_service.query_many([]) == []
+        assert rag_service.query_many(["a", "b"]) == [[], []]
+
     def test_query_result_structure(self, rag_service, sample_papers):
         """Test query results have expected structure."""
         rag_service.index_papers(sample_papers)
@@ -175,3 +202,609 @@ class TestPersistence:
         rag_service.index_papers(sample_papers)
         results2 = rag_service.query("test", k=10)
         assert len(results2) == 3
+
+
+class TestIncrementalIndexing:
+    """Tests for upsert indexing."""
+
+    def test_reindex_encodes_only_changes(self, rag_service, sample_papers):
+        """Unchanged papers are not re-encoded."""
+        rag_service.index_papers(sample_papers[:2])
+        model = rag_service._load_model()
+        encoded = []
+        original_encode = model.encode
+
+        def spy(texts, **kwargs):
+            encoded.extend(texts)
+            return original_encode(texts, **kwargs)
+
+        model.encode = spy
+        stats = rag_service.update_index(sample_papers)
+
+        assert stats["added"] == 1
+        assert stats["unchanged"] == 2
+        assert stats["indexed"] == 3
+        assert len(encoded) == 1
+        assert encoded[0].startswith("ImageNet")
+
+    def test_invalid_cache_directory(self, sample_papers, temp_dir):
+        """Indexing encodes everything when the cache directory cannot be created."""
+        (temp_dir / "not-a-dir").write_text("", encoding="utf-8")
+        cache = EmbeddingCache(temp_dir / "not-a-dir" / "embeddings")
+        service = RAGService(temp_dir, embedding_cache=cache)
+
+        assert service.index_papers(sample_papers) == 3
+        assert service.query("attention", k=1)[0]["id"] == "paper1"
+
+    def test_shared_embedding_cache(self, rag_service, sample_papers, temp_dir):
+        """Another project reuses embeddings computed for the same papers."""
+        rag_service.index_papers(sample_papers[:2])
+        other = RAGService(temp_dir / "other", embedding_cache=rag_service.embedding_cache)
+        model = other._load_model()
+        encoded = []
+        original_encode = model.encode
+
+        def spy(texts, **kwargs):
+            encoded.extend(texts)
+            return original_encode(texts, **kwargs)
+
+        model.encode = spy
+        other.index_papers(sample_papers)
+
+        assert len(encoded) == 1
+        assert encoded[0].startswith("ImageNet")
+        assert [r["id"] for r in other.query("attention", k=1)] == ["paper1"]
+
+    def test_chunked_encoding(self, rag_service, sample_papers, temp_dir):
+        """Large batches go through the chunked encoder and leave no checkpoint."""
+        rag_service.CHUNKED_ENCODE_MIN = 2
+        rag_service.index_papers(sample_papers)
+
+        assert [r["id"] for r in rag_service.query("ImageNet", k=1)] == ["paper3"]
+        assert not (temp_dir / ".poly" / "embeddings" / "encode-chunks").exists()
+
+    def test_streaming_build(self, rag_service, sample_papers, temp_dir):
+        """A JSONL corpus is indexed in batches; repeated IDs keep the last copy."""
+        path = temp_dir / "papers.jsonl"
+        changed = dict(sample_papers[0], title="Attention Revisited")
+        lines = [json.dumps(paper) for paper in [*sample_papers, changed]]
+        path.write_text("\n".join(lines), encoding="utf-8")
+
+        stats = rag_service.build_index_streaming(path, batch_size=2)
+
+        assert stats["indexed"] == 3
+        assert stats["duplicates"] == 1
+        titles = {r["id"]: r["title"] for r in rag_service.query("attention", k=3)}
+        assert titles["paper1"] == "Attention Revisited"
+        assert rag_service.update_index(sample_papers)["updated"] == 1
+
+    def test_streaming_build_keeps_quantization(self, rag_service, sample_papers, temp_dir):
+        """A streaming rebuild of a quantized index stays quantized."""
+        rag_service.index_papers(sample_papers)
+        rag_service.set_quantization("int8")
+        path = temp_dir / "papers.jsonl"
+        path.write_text("\n".join(json.dumps(paper) for paper in sample_papers), encoding="utf-8")
+
+        rag_service.build_index_streaming(path)
+
+        assert rag_service._load_index().quantization == "int8"
+        assert rag_service.query("attention", k=1)[0]["id"] == "paper1"
+
+    def test_streaming_build_empty(self, rag_service, temp_dir):
+        """An empty file is rejected."""
+        path = temp_dir / "papers.json"
+        path.write_text("[]", encoding="utf-8")
+
+        with pytest.raises(ValueError, match="empty"):
+            rag_service.build_index_streaming(path)
+
+    def test_changed_and_removed_papers(self, rag_service, sample_papers):
+        """Changed papers are replaced and dropped papers disappear."""
+        rag_service.index_papers(sample_papers)
+        changed = dict(sample_papers[0], year="2018")
+
+        stats = rag_service.update_index([changed, sample_papers[1]])
+        results = rag_service.query("attention", k=10)
+
+        assert stats["updated"] == 1
+        assert stats["removed"] == 1
+        assert sorted(r["id"] for r in results) == ["paper1", "paper2"]
+        assert next(r for r in results if r["id"] == "paper1")["year"] == "2018"
+
+
+class TestANNIndex:
+    """Tests for approximate search through RAGService."""
+
+    def test_build_before_indexing(self, rag_service):
+        """Building an ANN index needs an index."""
+        with pytest.raises(ValueError, match="not indexed"):
+            rag_service.build_ann_index()
+
+    def test_ann_query_matches_exact(self, rag_service, sample_papers, temp_dir):
+        """Probing every list returns the exact results."""
+        rag_service.index_papers(sample_papers)
+        stats = rag_service.build_ann_index(nlist=2, nprobe=2)
+
+        assert stats["rows"] == 3
+        assert (rag_service.generations.current_dir() / "ann.json").exists()
+        approx = rag_service.query("transformers", k=3)
+        exact = rag_service.query("transformers", k=3, exact=True)
+        assert [r["id"] for r in approx] == [r["id"] for r in exact]
+
+    def test_ann_survives_reindex(self, rag_service, sample_papers):
+        """Papers added after the build are still found."""
+        rag_service.index_papers(sample_papers[:2])
+        rag_service.build_ann_index(nlist=1)
+
+        rag_service.index_papers(sample_papers)
+        results = rag_service.query("ImageNet classification", k=3)
+
+        assert {r["id"] for r in results} == {"paper1", "paper2", "paper3"}
+
+    def test_rebuilds_keep_ann_settings(self, rag_service, sample_papers, temp_dir):
+        """Full and streaming rebuilds retrain with the lists and probes chosen before."""
+        rag_service.index_papers(sample_papers)
+        rag_service.build_ann_index(nlist=2, nprobe=1)
+        path = temp_dir / "papers.jsonl"
+        path.write_text("\n".join(json.dumps(paper) for paper in sample_papers), encoding="utf-8")
+
+        def settings():
+            ann = load_ann(rag_service.generations.current_dir())
+            return len(ann.centroids), ann.nprobe
+
+        rag_service.index_papers(sample_papers, rebuild=True)
+        assert settings() == (2, 1)
+        rag_service.build_index_streaming(path)
+        assert settings() == (2, 1)
+
+    def test_quantized_query_matches_exact(self, rag_service, sample_papers):
+        """Quantized scans rescore to the exact ranking."""
+        with pytest.raises(ValueError, match="not indexed"):
+            rag_service.set_quantization("int8")
+
+        rag_service.index_papers(sample_papers)
+        exact = rag_service.query("transformers", k=3)
+        rag_service.set_quantization("int8")
+
+        assert [r["id"] for r in rag_service.query("transformers", k=3)] == [r["id"] for r in exact]
+
+
+class TestSharding:
+    """Tests for sharded indexes through RAGService."""
+
+    def test_year_shards_match_single_index(self, rag_service, sample_papers, temp_dir):
+        """Sharding changes the layout, not the results."""
+        rag_service.index_papers(sample_papers)
+        single = rag_service.query("transformers", k=3)
+
+        rag_service.index_papers(sample_papers, shard_by="year")
+        index_dir = rag_service.generations.current_dir()
+
+        assert (index_dir / "shards.json").exists()
+        assert not (index_dir / "manifest.json").exists()
+        assert sorted(p.name for p in (index_dir / "shards").iterdir()) == [
+            "year-2012", "year-2017", "year-2019",
+        ]
+        sharded = rag_service.query("transformers", k=3)
+        assert [r["id"] for r in sharded] == [r["id"] for r in single]
+        assert [r["relevance_score"] for r in sharded] == pytest.approx(
+            [r["relevance_score"] for r in single], rel=1e-5
+        )
+        with pytest.raises(ValueError, match="sharded"):
+            rag_service.build_ann_index()
+        path = temp_dir / "papers.jsonl"
+        path.write_text("\n".join(json.dumps(paper) for paper in sample_papers), encoding="utf-8")
+        with pytest.raises(ValueError, match="unsharded"):
+            rag_service.build_index_streaming(path)
+
+    def test_update_keeps_layout(self, rag_service, sample_papers, temp_dir):
+        """Later updates touch only the shards whose papers changed."""
+        rag_service.index_papers(sample_papers[:2], shard_by="year")
+        vectors = Path("shards") / "year-2017" / "seg-000001" / "vectors.npy"
+        untouched = (rag_service.generations.current_dir() / vectors).stat().st_mtime_ns
+
+        stats = rag_service.update_index(sample_papers)
+        index_dir = rag_service.generations.current_dir()
+
+        assert stats["added"] == 1
+        assert stats["unchanged"] == 2
+        assert (index_dir / "shards" / "year-2012").exists()
+        assert (index_dir / vectors).stat().st_mtime_ns == untouched
+        assert RAGService(temp_dir).query("ImageNet", k=1)[0]["id"] == "paper3"
+
+    def test_growing_first_shard_shifts_rows(self, rag_service, sample_papers):
+        """Derived indexes follow later shards whose global rows moved."""
+        rag_service.index_papers(sample_papers, shard_by="year")
+        rag_service.build_knn_graph()
+        base = rag_service._load_index().bases["year-2019"]
+        dropout = {
+            "id": "paper4",
+            "title": "Dropout: A Simple Way to Prevent Neural Networks from Overfitting",
+            "abstract": "Deep neural nets with many parameters overfit.",
+            "year": "2012",
+        }
+
+        rag_service.update_index([*sample_papers, dropout])
+
+        assert rag_service._load_index().bases["year-2019"] == base + 1
+        assert rag_service.query("BERT", k=1, mode="lexical")[0]["id"] == "paper2"
+        recent = rag_service.query("neural networks", k=4, filters={"year_min": 2018})
+        assert [r["id"] for r in recent] == ["paper2"]
+        related = rag_service.find_related("paper2", k=3)
+        scanned = rag_service.find_related("paper2", k=100)
+        assert [r["id"] for r in related] == [r["id"] for r in scanned]
+        assert [r["relevance_score"] for r in related] == pytest.approx(
+            [r["relevance_score"] for r in scanned], abs=1e-3
+        )
+
+    def test_back_to_single_index(self, rag_service, sample_papers, temp_dir):
+        """shard_by="none" replaces the shards with one index."""
+        rag_service.index_papers(sample_papers, shard_by="hash", shards=2)
+        rag_service.index_papers(sample_papers, shard_by="none")
+        index_dir = rag_service.generations.current_dir()
+
+        assert not (index_dir / "shards.json").exists()
+        assert len(rag_service.query("transformers", k=10)) == 3
+
+    def test_unknown_shard_key(self, rag_service, sample_papers):
+        """Only hash and year sharding exist."""
+        with pytest.raises(ValueError, match="Unknown shard key"):
+            rag_service.index_papers(sample_papers, shard_by="venue")
+
+
+class TestDimensions:
+    """Tests for PCA-reduced vector indexes through RAGService."""
+
+    def test_reduced_index(self, rag_service, sample_papers):
+        """Vectors are stored reduced; queries and new papers are projected."""
+        rag_service.index_papers(sample_papers[:2] + [dict(sample_papers[0], id="copy")],
+                                 dimensions=2)
+        assert rag_service._load_index().manifest["dim"] == 2
+        assert len(rag_service.query("transformers", k=5)) == 3
+
+        stats = rag_service.update_index([*sample_papers, dict(sample_papers[0], id="copy")])
+
+        index = rag_service._load_index()
+        assert (stats["added"], stats["removed"]) == (1, 0)
+        assert index.dimensions == 2
+        assert len(rag_service.query("ImageNet", k=5)) == 4
+
+        rag_service.update_index(sample_papers, dimensions=0)
+        assert rag_service._load_index().dimensions == 0
+        assert rag_service._load_index().manifest["dim"] > 2
+
+    def test_sharded_index_not_reduced(self, rag_service, sample_papers):
+        """Sharded layouts keep the model's dimensions."""
+        rag_service.index_papers(sample_papers, dimensions=2)
+
+        with pytest.raises(ValueError, match="not supported for sharded"):
+            rag_service.index_papers(sample_papers, shard_by="year")
+        with pytest.raises(ValueError, match="at least 1"):
+            rag_service.index_papers(sample_papers, dimensions=-1)
+        rag_service.index_papers(sample_papers, shard_by="year", dimensions=0)
+
+
+class TestGenerations:
+    """Tests for publishing the index as numbered generations."""
+
+    def test_reader_switches_after_publish(self, rag_service, sample_papers, temp_dir):
+        """Another reader keeps its generation until a new one is published."""
+        rag_service.index_papers(sample_papers[:2])
+        reader = RAGService(temp_dir, embedding_cache=rag_service.embedding_cache)
+        assert len(reader.query("ImageNet", k=10)) == 2
+        opened = reader._index
+
+        rag_service.update_index(sample_papers)
+
+        assert [meta["id"] for meta in opened.metadata([0, 1])] == ["paper1", "paper2"]
+        assert len(reader.query("ImageNet", k=10)) == 3
+        assert reader._generation == rag_service.generations.current() == "gen-000002"
+
+    def test_failed_update_keeps_generation(self, rag_service, sample_papers, monkeypatch):
+        """A build that fails is discarded; queries still see the last index."""
+        rag_service.index_papers(sample_papers[:2])
+
+        def fail(texts, workers=1):
+            raise RuntimeError("encoder crashed")
+
+        monkeypatch.setattr(rag_service, "_encode_cached", fail)
+        with pytest.raises(RuntimeError):
+            rag_service.update_index(sample_papers)
+
+        assert rag_service.generations.current() == "gen-000001"
+        assert rag_service.generations.numbers() == [1]
+        assert len(rag_service.query("ImageNet", k=10)) == 2
+
+
+class TestDuplicates:
+    """Tests for near-duplicate detection over stored embeddings."""
+
+    def test_find_duplicates(self, rag_service, sample_papers):
+        """Variants are matched by embedding when indexed, else by title."""
+        title = "Transformers: " + sample_papers[0]["title"]
+        variant = dict(sample_papers[0], id="paper1-arxiv", title=title)
+        unindexed = dict(sample_papers[1], id="paper2-copy", title=sample_papers[1]["title"] + ".")
+        rag_service.index_papers([*sample_papers, variant])
+
+        clusters = rag_service.find_duplicates([*sample_papers, variant, unindexed], threshold=0.8)
+
+        assert clusters == [[0, 3], [1, 4]]
+
+
+class TestRelated:
+    """Tests for related-paper lookups from the k-NN graph."""
+
+    def test_find_related(self, rag_service, sample_papers):
+        """Neighbors come from the graph, built on first use, best first."""
+        with pytest.raises(ValueError, match="not indexed"):
+            rag_service.find_related("paper1")
+        rag_service.index_papers(sample_papers)
+
+        related = rag_service.find_related("paper1", k=2)
+
+        assert (rag_service.generations.current_dir() / "knn" / "knn.json").exists()
+        assert {r["id"] for r in related} == {"paper2", "paper3"}
+        scores = [r["relevance_score"] for r in related]
+        assert scores == sorted(scores, reverse=True)
+        with pytest.raises(ValueError, match="not indexed: missing"):
+            rag_service.find_related("missing")
+
+    def test_scan_beyond_degree(self, rag_service, sample_papers):
+        """k above the graph degree scans the index with the stored vector."""
+        rag_service.index_papers(sample_papers)
+        rag_service.build_knn_graph(degree=1)
+
+        assert len(rag_service.find_related("paper1", k=1)) == 1
+        assert {r["id"] for r in rag_service.find_related("paper1", k=5)} == {"paper2", "paper3"}
+
+    def test_graph_follows_updates(self, rag_service, sample_papers):
+        """update_index adds new papers to an existing graph."""
+        rag_service.index_papers(sample_papers[:2])
+        rag_service.build_knn_graph()
+
+        rag_service.update_index(sample_papers)
+
+        manifest = rag_service.generations.current_dir() / "knn" / "knn.json"
+        assert json.loads(manifest.read_text(encoding="utf-8"))["total_rows"] == 3
+        assert {r["id"] for r in rag_service.find_related("paper3", k=5)} == {"paper1", "paper2"}
+
+
+class TestHybridSearch:
+    """Tests for lexical and hybrid query modes."""
+
+    def test_lexical_finds_exact_terms(self, rag_service, sample_papers, temp_dir):
+        """BM25 ranks the paper naming the term first."""
+        rag_service.index_papers(sample_papers)
+
+        results = rag_service.query("BERT", k=3, mode="lexical")
+
+        assert (rag_service.generations.current_dir() / "bm25" / "bm25.json").exists()
+        assert [r["id"] for r in results] == ["paper2"]
+
+    def test_hybrid_fuses_rankings(self, rag_service, sample_papers):
+        """Every dense result is kept; the exact match is ranked first."""
+        rag_service.index_papers(sample_papers)
+
+        results = rag_service.query("ImageNet", k=3, mode="hybrid")
+
+        assert results[0]["id"] == "paper3"
+        assert {r["id"] for r in results} == {"paper1", "paper2", "paper3"}
+
+    def test_prefilter(self, rag_service, sample_papers):
+        """Only papers sharing a query term are scored."""
+        rag_service.index_papers(sample_papers)
+
+        results = rag_service.query("convolutional networks", k=3, prefilter=True)
+
+        assert {r["id"] for r in results} == {"paper1", "paper3"}
+        assert rag_service.query("zebra", k=3, prefilter=True) == []
+
+    def test_lexical_index_follows_updates(self, rag_service, sample_papers):
+        """Added papers are searchable by term after an update."""
+        rag_service.index_papers(sample_papers[:2])
+        assert rag_service.query("ImageNet", k=3, mode="lexical") == []
+
+        rag_service.update_index(sample_papers)
+
+        assert rag_service.query("ImageNet", k=3, mode="lexical")[0]["id"] == "paper3"
+
+    def test_generation_without_lexical_index(self, rag_service, sample_papers):
+        """A published generation lacking BM25 is searched without being modified."""
+        rag_service.index_papers(sample_papers)
+        published = rag_service.generations.current_dir()
+        shutil.rmtree(published / "bm25")
+        files = sorted(published.rglob("*"))
+
+        assert rag_service.query("BERT", k=3, mode="lexical")[0]["id"] == "paper2"
+        assert sorted(published.rglob("*")) == files
+
+    def test_generation_without_metadata_columns(self, rag_service, sample_papers):
+        """A published generation lacking columns is filtered without being modified."""
+        rag_service.index_papers(sample_papers)
+        published = rag_service.generations.current_dir()
+        shutil.rmtree(published / "columns")
+        files = sorted(published.rglob("*"))
+
+        results = rag_service.query("neural networks", k=3, filters={"year_min": 2015})
+
+        assert {r["id"] for r in results} == {"paper1", "paper2"}
+        assert sorted(published.rglob("*")) == files
+
+    def test_metadata_filters(self, rag_service, sample_papers, temp_dir):
+        """Filters are applied before ranking, in every mode."""
+        papers = [
+            dict(paper, venue="NeurIPS" if i < 2 else "NIPS") for i, paper in enumerate(sample_papers)
+        ]
+        rag_service.index_papers(papers)
+
+        recent = rag_service.query("neural networks", k=3, filters={"year_min": 2015})
+        neurips = rag_service.query("ImageNet", k=3, mode="hybrid", filters={"venues": ["neurips"]})
+
+        assert (rag_service.generations.current_dir() / "columns" / "columns.json").exists()
+        assert {r["id"] for r in recent} == {"paper1", "paper2"}
+        assert [r["id"] for r in rag_service.query("BERT", filters={"year_max": 2013})] == ["paper3"]
+        assert {r["id"] for r in neurips} == {"paper1", "paper2"}
+        assert rag_service.query("BERT", mode="lexical", filters={"authors": ["Vaswani"]}) == []
+        with pytest.raises(ValueError, match="Unknown filters"):
+            rag_service.query("BERT", filters={"venue": "NeurIPS"})
+
+    def test_unknown_mode(self, rag_service):
+        """Only dense, lexical and hybrid modes exist."""
+        with pytest.raises(ValueError, match="Unknown query mode"):
+            rag_service.query("attention", mode="sparse")
+
+
+class TestPassages:
+    """Tests for the full-text passage index."""
+
+    @pytest.fixture
+    def literature(self, temp_dir):
+        """Markdown full texts, one per sample paper plus a loose note."""
+        directory = temp_dir / "literature"
+        directory.mkdir()
+        texts = {
+            "vaswani2017attention.md": "Self-attention replaces recurrence. " * 40,
+            "paper2.md": "BERT masks tokens for bidirectional pretraining. " * 40,
+            "notes.md": "ImageNet classification with deep convolutional networks. " * 5,
+        }
+        for name, text in texts.items():
+            (directory / name).write_text(text, encoding="utf-8")
+        return directory
+
+    def test_grouped_results(self, rag_service, sample_papers, literature):
+        """Passages point back to their paper; results group per paper."""
+        stats = rag_service.index_passages(literature, sample_papers, window=50, overlap=10)
+
+        assert stats["files"] == 3
+        assert stats["added"] == 3
+        assert stats["passages"] == rag_service._load_passages().total_rows
+
+        results = rag_service.query_passages("masked bidirectional pretraining", k=2)
+        assert results[0]["paper_id"] == "paper2"
+        assert results[0]["path"] == "literature/paper2.md"
+        assert len({result["paper_id"] for result in results}) == len(results)
+        assert 1 <= len(results[0]["passages"]) <= 3
+        assert results[0]["passages"][0]["page"] is None
+
+    def test_incremental_update(self, rag_service, sample_papers, literature):
+        """Only new and changed files are embedded; deleted files drop out."""
+        rag_service.index_passages(literature, sample_papers)
+        model = rag_service._load_model()
+        encoded = []
+        original_encode = model.encode
+
+        def spy(texts, **kwargs):
+            encoded.extend(texts)
+            return original_encode(texts, **kwargs)
+
+        model.encode = spy
+        (literature / "notes.md").unlink()
+        (literature / "krizhevsky2012imagenet.md").write_text(
+            "Dropout reduces overfitting in the fully connected layers.", encoding="utf-8"
+        )
+        stats = rag_service.index_passages(literature, sample_papers)
+
+        assert (stats["added"], stats["removed"], stats["unchanged"]) == (1, 1, 2)
+        assert encoded == ["Dropout reduces overfitting in the fully connected layers."]
+        results = rag_service.query_passages("dropout overfitting", k=5)
+        assert results[0]["paper_id"] == "paper3"
+        assert "notes.md" not in {result["paper_id"] for result in results}
+
+    def test_query_before_indexing(self, rag_service):
+        """No passage index means no results."""
+        assert rag_service.query_passages("attention") == []
+
+
+class TestEmbeddingBackend:
+    """Tests for choosing the embedding runtime."""
+
+    def test_default_backend(self, temp_dir, monkeypatch):
+        """PyTorch unless the environment picks another backend."""
+        monkeypatch.delenv("POLYHEDRA_EMBEDDING_BACKEND", raising=False)
+        assert RAGService(temp_dir).backend == "torch"
+
+        monkeypatch.setenv("POLYHEDRA_EMBEDDING_BACKEND", "onnx-int8")
+        service = RAGService(temp_dir)
+        loader = service._loader()
+
+        assert service.backend == "onnx-int8"
+        assert loader.func is load_onnx_encoder
+        assert loader.keywords == {"quantized": True}
+        assert RAGService(temp_dir, backend="onnx")._loader().keywords == {"quantized": False}
+
+    def test_switching_backend_rebuilds(self, rag_service, sample_papers, temp_dir):
+        """Embeddings of another backend are neither reused from the cache nor the index."""
+        rag_service.index_papers(sample_papers)
+        onnx = RAGService(
+            temp_dir, backend="onnx-int8", embedding_cache=rag_service.embedding_cache
+        )
+        onnx._model = rag_service._load_model()
+        encoded = []
+        original_encode = onnx._model.encode
+
+        def spy(texts, **kwargs):
+            encoded.extend(texts)
+            return original_encode(texts, **kwargs)
+
+        onnx._model.encode = spy
+        stats = onnx.update_index(sample_papers)
+
+        assert onnx.model_id == f"{onnx.model_name}@onnx-int8"
+        assert rag_service.model_id == rag_service.model_name
+        assert stats["added"] == 3
+        assert len(encoded) == 3
+
+    def test_unknown_backend(self, temp_dir):
+        """Only torch and ONNX backends exist."""
+        with pytest.raises(ValueError, match="Unknown embedding backend"):
+            RAGService(temp_dir, backend="tensorflow")
+
+
+class TestQueryCache:
+    """Tests for query embedding caching."""
+
+    def test_repeat_queries_skip_model(self, temp_dir, sample_papers):
+        """Repeated queries are answered without encoding."""
+        service = RAGService(temp_dir, persist_queries=True)
+        service.index_papers(sample_papers)
+        first = service.query("transformers", k=2)
+        model = service._load_model()
+        model.encode = None
+
+        assert service.query("  transformers ", k=2) == first
+        assert service.query_cache.stats()["hits"] == 1
+
+        restarted = RAGService(temp_dir, persist_queries=True)
+        restarted._model = model
+        assert restarted.query("transformers", k=2) == first
+
+
+class TestBackgroundWork:
+    """Tests for running model work off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_run_uses_worker_thread(self, rag_service):
+        """Blocking calls run on the embedding thread while the loop stays free."""
+        release = threading.Event()
+
+        def blocking():
+            release.wait(5)
+            return threading.current_thread().name
+
+        task = asyncio.ensure_future(rag_service.run(blocking))
+        await asyncio.sleep(0)
+        assert not task.done()
+
+        release.set()
+        assert (await task).startswith("polyhedra-embedding")
+
+    def test_warm_up_loads_model(self, rag_service, sample_papers):
+        """Warm-up loads the model and index in the background."""
+        rag_service.index_papers(sample_papers)
+        rag_service._model = None
+        rag_service._close_index()
+
+        rag_service.warm_up().result(timeout=60)
+
+        assert rag_service._model is not None
+        assert rag_service._index is not None
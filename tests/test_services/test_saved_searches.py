@@ -0,0 +1,129 @@
+"""Unit tests for saved search service."""
+
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from polyhedra.services.saved_searches import SavedSearchService
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def semantic_scholar():
+    """Mock Semantic Scholar service."""
+    service = MagicMock()
+    service.search = AsyncMock(
+        return_value=[
+            {"paperId": "old", "title": "Already Known", "publicationDate": "2024-01-10"},
+            {"paperId": "new", "title": "Fresh Result", "publicationDate": "2024-03-05"},
+            {"paperId": "undated", "title": "Year Only", "year": 2024},
+        ]
+    )
+    return service
+
+
+@pytest.fixture
+def papers_file(temp_dir):
+    """Corpus file that already holds one of the results."""
+    path = temp_dir / "literature" / "papers.json"
+    path.parent.mkdir()
+    path.write_text(json.dumps([{"paperId": "old", "title": "Already Known"}]), encoding="utf-8")
+    return path
+
+
+class TestRegistry:
+    """Tests for saving and listing searches."""
+
+    def test_save_search(self, temp_dir):
+        """Saved searches are stored under .poly/searches."""
+        service = SavedSearchService(temp_dir)
+        search = service.save_search("Graph NNs", "graph neural networks", since="2024-01-01")
+
+        assert (temp_dir / ".poly" / "searches" / "graph-nns.json").exists()
+        assert search["watermark"] == "2024-01-01"
+        assert service.list_searches() == [search]
+
+    def test_update_keeps_watermark(self, temp_dir):
+        """Re-saving a search keeps its watermark."""
+        service = SavedSearchService(temp_dir)
+        service.save_search("gnn", "graph neural networks", since="2024-01-01")
+        updated = service.save_search("gnn", "graph neural nets")
+
+        assert updated["query"] == "graph neural nets"
+        assert updated["watermark"] == "2024-01-01"
+
+    def test_save_empty_query(self, temp_dir):
+        """Empty queries are rejected."""
+        with pytest.raises(ValueError, match="Query cannot be empty"):
+            SavedSearchService(temp_dir).save_search("gnn", " ")
+
+
+class TestPolling:
+    """Tests for delta polling."""
+
+    @pytest.mark.asyncio
+    async def test_poll_appends_new_papers(self, temp_dir, semantic_scholar, papers_file):
+        """Only unseen papers are appended and the watermark advances."""
+        service = SavedSearchService(temp_dir, semantic_scholar)
+        service.save_search("gnn", "graph neural networks", since="2024-01-01")
+
+        result = await service.poll(papers_file)
+
+        assert result["added"] == 2
+        assert result["searches"][0]["watermark"] == "2024-03-05"
+        assert not result["searches"][0]["truncated"]
+        assert semantic_scholar.search.call_args.kwargs["published_since"] == "2024-01-01"
+
+        corpus = json.loads(papers_file.read_text(encoding="utf-8"))
+        assert [paper["paperId"] for paper in corpus] == ["old", "new", "undated"]
+        assert service.list_searches()[0]["total_added"] == 2
+
+    @pytest.mark.asyncio
+    async def test_second_poll_uses_watermark(self, temp_dir, semantic_scholar, papers_file):
+        """The next poll only asks for papers after the new watermark."""
+        service = SavedSearchService(temp_dir, semantic_scholar)
+        service.save_search("gnn", "graph neural networks")
+
+        await service.poll(papers_file)
+        second = await service.poll(papers_file)
+
+        assert semantic_scholar.search.call_args.kwargs["published_since"] == "2024-03-05"
+        assert second["added"] == 0
+
+    @pytest.mark.asyncio
+    async def test_truncated_poll_keeps_watermark(self, temp_dir, papers_file):
+        """Results cut off at the page limit do not move the watermark."""
+        semantic_scholar = MagicMock()
+        semantic_scholar.search = AsyncMock(
+            side_effect=lambda offset, **kwargs: [
+                {"paperId": f"p{offset + i}", "title": "Hit", "publicationDate": "2024-06-01"}
+                for i in range(SavedSearchService.PAGE_SIZE)
+            ]
+        )
+        service = SavedSearchService(temp_dir, semantic_scholar)
+        service.save_search("gnn", "graph neural networks", since="2024-01-01")
+
+        result = await service.poll(papers_file)
+
+        assert semantic_scholar.search.await_count == SavedSearchService.MAX_PAGES
+        assert result["searches"][0]["truncated"]
+        assert result["searches"][0]["watermark"] == "2024-01-01"
+        assert service.list_searches()[0]["watermark"] == "2024-01-01"
+        assert result["added"] == SavedSearchService.PAGE_SIZE * SavedSearchService.MAX_PAGES
+        assert not list(papers_file.parent.glob(".*.tmp"))
+
+    @pytest.mark.asyncio
+    async def test_poll_unknown_name(self, temp_dir, semantic_scholar, papers_file):
+        """Polling a missing search fails clearly."""
+        service = SavedSearchService(temp_dir, semantic_scholar)
+        with pytest.raises(ValueError, match="Unknown saved searches"):
+            await service.poll(papers_file, names=["missing"])
@@ -167,6 +167,23 @@ class TestSearch:
         call_args = mock_client.get.call_args
         assert call_args.kwargs["params"]["year"] == "2020"
 
+    @pytest.mark.asyncio
+    async def test_search_published_since(self, service, mock_search_response):
+        """Test search with publication date watermark and paging."""
+        mock_client = AsyncMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = mock_search_response
+        mock_client.get.return_value = mock_response
+
+        service._client = mock_client
+
+        await service.search("test", published_since="2024-03-01", offset=100)
+
+        params = mock_client.get.call_args.kwargs["params"]
+        assert params["publicationDateOrYear"] == "2024-03-01:"
+        assert params["offset"] == 100
+
     @pytest.mark.asyncio
     async def test_search_empty_query(self, service):
         """Test search with empty query raises error."""
@@ -291,3 +308,64 @@ class TestClientManagement:
 
         await service.close()
         assert service._client is None
+
+
+class TestGetReferencesBatch:
+    """Tests for batched reference retrieval."""
+
+    @pytest.mark.asyncio
+    async def test_get_references_batch(self, service):
+        """Test references are mapped back to the requested IDs."""
+        mock_client = AsyncMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = [
+            {
+                "paperId": "a",
+                "references": [
+                    {"paperId": "r1", "title": "Ref One"},
+                    {"paperId": None, "title": "Unresolved"},
+                ],
+            },
+            None,
+        ]
+        mock_client.request.return_value = mock_response
+
+        service._client = mock_client
+
+        references = await service.get_references_batch(["a", "missing"])
+
+        assert references == {"a": [{"paperId": "r1", "title": "Ref One"}]}
+        call_args = mock_client.request.call_args
+        assert call_args.args[0] == "POST"
+        assert call_args.kwargs["json"] == {"ids": ["a", "missing"]}
+
+
+class TestAutocomplete:
+    """Tests for query autocomplete."""
+
+    @pytest.mark.asyncio
+    async def test_autocomplete(self, service):
+        """Test autocomplete returns matching titles."""
+        mock_client = AsyncMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "matches": [
+                {"id": "1", "title": "Attention Is All You Need", "authorsYear": "Vaswani, 2017"}
+            ]
+        }
+        mock_client.request.return_value = mock_response
+
+        service._client = mock_client
+
+        titles = await service.autocomplete("attention is")
+
+        assert titles == ["Attention Is All You Need"]
+        assert mock_client.request.call_args.kwargs["params"] == {"query": "attention is"}
+
+    @pytest.mark.asyncio
+    async def test_autocomplete_empty_query(self, service):
+        """Test autocomplete with empty query raises error."""
+        with pytest.raises(ValueError, match="Query cannot be empty"):
+            await service.autocomplete("  ")
@@ -0,0 +1,137 @@
+"""Unit tests for the sharded vector index."""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.sharded_index import ShardedIndex, shard_name
+from polyhedra.services.vector_index import VectorIndex, normalize
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def vectors():
+    """Sixty random vectors."""
+    return np.random.default_rng(0).standard_normal((60, 16)).astype(np.float32)
+
+
+def write_sharded(directory: Path, vectors: np.ndarray, count: int) -> ShardedIndex:
+    """Split rows across hash shards, the way RAGService does."""
+    groups: dict[str, list[int]] = {}
+    for row in range(len(vectors)):
+        groups.setdefault(shard_name(f"p{row}", None, "hash", count), []).append(row)
+
+    index = ShardedIndex(directory)
+    for name, rows in sorted(groups.items()):
+        index.write_shard(
+            name,
+            vectors[rows],
+            [{"id": f"p{row}"} for row in rows],
+            "test-model",
+            [(f"p{row}", "", "") for row in rows],
+        )
+    index.save({"by": "hash", "count": count, "model": "test-model", "shards": sorted(groups)})
+    return index.open()
+
+
+def test_shard_name():
+    """Hash shards are stable and in range; year shards use the year."""
+    names = {shard_name(f"p{i}", None, "hash", 4) for i in range(100)}
+    assert names == {"hash-000", "hash-001", "hash-002", "hash-003"}
+    assert shard_name("p1", None, "hash", 4) == shard_name("p1", 2020, "hash", 4)
+
+    assert shard_name("p1", 2019, "year", 0) == "year-2019"
+    assert shard_name("p1", "2019-05-01", "year", 0) == "year-2019"
+    assert shard_name("p1", None, "year", 0) == "year-unknown"
+
+
+class TestShardedIndex:
+    """Tests for ShardedIndex."""
+
+    def test_search_matches_single_index(self, temp_dir, vectors):
+        """Merged shard results equal a scan of one index."""
+        sharded = write_sharded(temp_dir / "sharded", vectors, 4)
+        VectorIndex(temp_dir / "single").write(vectors, [{}] * len(vectors), "test-model")
+        single = VectorIndex(temp_dir / "single").open()
+
+        queries = normalize(vectors[:5] + 0.1)
+        rows, scores = sharded.search_many(queries, 10)
+        _, expected = single.search_many(queries, 10)
+
+        assert len(sharded) == 60
+        np.testing.assert_allclose(scores, expected, rtol=1e-5)
+        ids = [[record["id"] for record in sharded.metadata(list(r))] for r in rows]
+        assert [i[0] for i in ids] == ["p0", "p1", "p2", "p3", "p4"]
+        sharded.close()
+
+    def test_search_allowed_rows(self, temp_dir, vectors):
+        """Masked scans and subset scoring agree across shards."""
+        index = write_sharded(temp_dir, vectors, 3)
+        allowed = np.arange(60) % 3 == 0
+
+        rows, _ = index.search_many(vectors[:2], 5, allowed=allowed)
+        subset_rows, _ = index.search_rows(vectors[:2], np.flatnonzero(allowed), 5)
+
+        assert allowed[rows].all()
+        assert rows.tolist() == subset_rows.tolist()
+        index.close()
+
+    def test_metadata_keeps_order(self, temp_dir, vectors):
+        """Rows from different shards come back in the requested order."""
+        index = write_sharded(temp_dir, vectors, 3)
+        rows = list(range(len(index)))[::-1]
+
+        records = index.metadata(rows)
+
+        assert sorted(r["id"] for r in records) == sorted(f"p{i}" for i in range(60))
+        assert records[0] == index.metadata([rows[0]])[0]
+        index.close()
+
+    def test_quantize(self, temp_dir, vectors):
+        """Every shard scans the codes; new shards get them too."""
+        index = write_sharded(temp_dir, vectors, 2)
+        index.quantize("int8")
+
+        assert ShardedIndex(temp_dir).open().quantization == "int8"
+        assert all(shard.quantization == "int8" for shard in index.shards.values())
+        shard = index.write_shard("hash-extra", vectors[:2], [{}, {}], "test-model", [("x", "", "")] * 2)
+        assert shard.quantization == "int8"
+        with pytest.raises(ValueError, match="Unknown quantization"):
+            index.quantize("int4")
+        index.close()
+
+    def test_new_shard_leaves_others_untouched(self, temp_dir, vectors):
+        """Adding a shard rewrites only the manifest."""
+        index = write_sharded(temp_dir, vectors, 2)
+        before = {
+            path: (path.stat().st_ino, path.stat().st_mtime_ns)
+            for path in (temp_dir / "shards").rglob("*") if path.is_file()
+        }
+
+        index.write_shard("hash-extra", vectors[:3], [{"id": "x"}] * 3, "test-model",
+                          [(f"x{i}", "", "") for i in range(3)])
+        index.save({**index.manifest, "shards": [*index.manifest["shards"], "hash-extra"]})
+        index.open()
+
+        assert {
+            path: (path.stat().st_ino, path.stat().st_mtime_ns) for path in before
+        } == before
+        assert len(index) == 63
+        assert index.metadata([62]) == [{"id": "x"}]
+        index.close()
+
+    def test_remove(self, temp_dir, vectors):
+        """Removing deletes the manifest and every shard."""
+        index = write_sharded(temp_dir, vectors, 2)
+        index.remove()
+
+        assert not ShardedIndex(temp_dir).exists()
+        assert not (temp_dir / "shards").exists()
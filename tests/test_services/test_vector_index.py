@@ -0,0 +1,260 @@
+"""Unit tests for the on-disk vector index."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from polyhedra.services.vector_index import VectorIndex, normalize, top_k
+
+
+@pytest.fixture
+def temp_dir():
+    """Create temporary directory for testing."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+@pytest.fixture
+def sample_index(temp_dir):
+    """Index with three rows."""
+    vectors = np.arange(12, dtype=np.float64).reshape(3, 4)
+    metadata = [{"id": f"p{i}", "title": f"Paper {i} – ü"} for i in range(3)]
+    VectorIndex(temp_dir).write(vectors, metadata, "test-model")
+    return VectorIndex(temp_dir).open()
+
+
+class TestVectorIndex:
+    """Tests for VectorIndex."""
+
+    def test_round_trip(self, sample_index):
+        """Vectors come back unit-length and metadata as written."""
+        assert len(sample_index) == 3
+        assert sample_index.manifest["model"] == "test-model"
+        assert sample_index.manifest["dim"] == 4
+        np.testing.assert_allclose(
+            sample_index.get_vectors([1]), [np.array([4, 5, 6, 7]) / np.sqrt(126)], rtol=1e-6
+        )
+        assert sample_index.metadata([2, 0]) == [
+            {"id": "p2", "title": "Paper 2 – ü"},
+            {"id": "p0", "title": "Paper 0 – ü"},
+        ]
+
+    def test_vectors_are_memory_mapped(self, sample_index):
+        """Opening maps the matrix instead of reading it."""
+        vectors = sample_index.segments[0].vectors
+        assert isinstance(vectors, np.memmap)
+        assert vectors.dtype == np.float32
+        assert not vectors.flags.writeable
+
+    def test_exists(self, temp_dir, sample_index):
+        """Only a manifest of the current format counts as an index."""
+        assert VectorIndex(temp_dir).exists()
+        assert not VectorIndex(temp_dir / "missing").exists()
+
+        manifest = json.loads((temp_dir / "manifest.json").read_text(encoding="utf-8"))
+        manifest["version"] = 0
+        (temp_dir / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+        assert not VectorIndex(temp_dir).exists()
+
+    def test_open_missing(self, temp_dir):
+        """Opening a directory without an index raises."""
+        with pytest.raises(FileNotFoundError):
+            VectorIndex(temp_dir).open()
+
+    def test_length_mismatch(self, temp_dir):
+        """Vectors and metadata must line up."""
+        with pytest.raises(ValueError, match="same length"):
+            VectorIndex(temp_dir).write(np.zeros((2, 4)), [{"id": "p0"}], "test-model")
+
+    def test_rewrite_replaces(self, temp_dir, sample_index):
+        """Writing again replaces the previous index."""
+        sample_index.write(np.ones((1, 2)), [{"id": "new"}], "other-model")
+
+        index = VectorIndex(temp_dir).open()
+        assert len(index) == 1
+        assert index.metadata([0]) == [{"id": "new"}]
+        assert not list(temp_dir.glob(".*.tmp"))
+        assert [path.name for path in temp_dir.glob("seg-*")] == ["seg-000002"]
+
+    def test_search_many(self, temp_dir):
+        """Each query gets its own ranking, equal to single searches."""
+        vectors = np.random.default_rng(0).standard_normal((50, 8))
+        index = VectorIndex(temp_dir)
+        index.write(vectors, [{"id": i} for i in range(50)], "test-model")
+        index.open()
+        index.SCAN_BLOCK = 16
+        queries = vectors[[3, 7, 11]]
+
+        rows, scores = index.search_many(queries, k=5)
+
+        assert rows.shape == scores.shape == (3, 5)
+        assert rows[:, 0].tolist() == [3, 7, 11]
+        for query, query_rows in zip(queries, rows):
+            assert query_rows.tolist() == index.search(query, k=5)[0].tolist()
+
+    def test_search_rows(self, temp_dir):
+        """Scoring a subset equals a full search restricted to it."""
+        vectors = np.random.default_rng(0).standard_normal((50, 8))
+        index = VectorIndex(temp_dir)
+        index.write(vectors, [{"id": i} for i in range(50)], "test-model")
+        index.open()
+        index.SCAN_BLOCK = 16
+        subset = np.arange(1, 50, 2)
+
+        rows, scores = index.search_rows(vectors[[3, 4]], subset, k=40)
+
+        assert rows.shape == (2, 25)
+        assert rows[0, 0] == 3
+        assert set(rows[1].tolist()) == set(subset.tolist())
+        full_rows, full_scores = index.search_many(vectors[[4]], k=50)
+        np.testing.assert_allclose(
+            scores[1], full_scores[0][np.isin(full_rows[0], subset)], rtol=1e-5, atol=1e-6
+        )
+
+    def test_search_many_allowed(self, temp_dir):
+        """Rows outside the allowed mask are never returned."""
+        vectors = np.random.default_rng(0).standard_normal((50, 8))
+        index = VectorIndex(temp_dir)
+        index.write(vectors, [{"id": i} for i in range(50)], "test-model")
+        index.open()
+        allowed = np.arange(50) % 2 == 1
+
+        rows, _ = index.search_many(vectors[[3, 4]], k=5, allowed=allowed)
+        subset_rows, _ = index.search_rows(vectors[[3, 4]], np.flatnonzero(allowed), k=5)
+
+        assert rows.tolist() == subset_rows.tolist()
+        index.quantize("int8")
+        assert index.search_many(vectors[[3]], k=1, allowed=allowed)[0].tolist() == [[3]]
+
+    def test_search_cosine(self, sample_index):
+        """Search ranks rows by cosine similarity."""
+        rows, scores = sample_index.search(np.array([0, 1, 2, 3]), k=2)
+
+        assert rows.tolist() == [0, 1]
+        assert scores[0] == pytest.approx(1.0)
+
+
+class TestScoring:
+    """Tests for the scoring helpers."""
+
+    def test_normalize(self):
+        """Rows are scaled to unit length and zero rows are left alone."""
+        vectors = normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+
+        np.testing.assert_allclose(vectors, [[0.6, 0.8], [0.0, 0.0]])
+        assert vectors.dtype == np.float32
+
+    def test_top_k_matches_full_sort(self):
+        """argpartition selection agrees with a full sort."""
+        scores = np.random.default_rng(0).random(1000)
+
+        assert top_k(scores, 10).tolist() == np.argsort(scores)[::-1][:10].tolist()
+        assert top_k(scores, 2000).tolist() == np.argsort(scores)[::-1].tolist()
+        assert top_k(scores, 0).tolist() == []
+
+
+@pytest.fixture
+def keyed_index(temp_dir):
+    """Index whose rows are keyed by paper ID."""
+    vectors = np.eye(4)
+    metadata = [{"id": f"p{i}"} for i in range(4)]
+    keys = [(f"p{i}", f"c{i}", f"m{i}") for i in range(4)]
+    VectorIndex(temp_dir).write(vectors, metadata, "test-model", keys=keys)
+    return VectorIndex(temp_dir).open()
+
+
+class TestIncrementalUpdates:
+    """Tests for appending segments and tombstones."""
+
+    def test_append_and_tombstone(self, temp_dir, keyed_index):
+        """Appended rows are searchable and tombstoned rows are not."""
+        keyed_index.COMPACT_RATIO = 1.0
+        compacted = keyed_index.append(
+            np.array([[1.0, 1.0, 0, 0]]), [{"id": "p0"}], [("p0", "c0b", "m0")], deleted=[0]
+        )
+
+        index = VectorIndex(temp_dir).open()
+        assert not compacted
+        assert len(index) == 4
+        assert index.total_rows == 5
+        assert index.entries()["p0"] == (4, "c0b", "m0")
+
+        rows, _ = index.search(np.array([1.0, 0, 0, 0]), k=10)
+        assert 0 not in rows.tolist()
+        assert rows[0] == 4
+        assert len(rows) == 4
+
+    def test_compaction(self, temp_dir, keyed_index):
+        """Compaction keeps live rows only, in a single segment."""
+        keyed_index.append(np.zeros((0, 4)), [], [], deleted=[1, 2])
+
+        index = VectorIndex(temp_dir).open()
+        assert len(index.segments) == 1
+        assert index.total_rows == len(index) == 2
+        assert len(index.tombstones) == 0
+        assert index.metadata([0, 1]) == [{"id": "p0"}, {"id": "p3"}]
+        np.testing.assert_allclose(index.get_vectors([1]), [[0, 0, 0, 1]])
+        assert set(index.entries()) == {"p0", "p3"}
+        assert not list(temp_dir.glob("tombstones-*"))
+
+    def test_too_many_segments_compacts(self, keyed_index):
+        """Appending past MAX_SEGMENTS merges the segments."""
+        keyed_index.MAX_SEGMENTS = 2
+        results = [
+            keyed_index.append(
+                np.ones((1, 4)), [{"id": f"n{i}"}], [(f"n{i}", "c", "m")], deleted=[]
+            )
+            for i in range(2)
+        ]
+
+        assert results == [False, True]
+        assert len(keyed_index.segments) == 1
+        assert len(keyed_index) == 6
+
+
+class TestStreamingWrite:
+    """Tests for writing an index batch by batch."""
+
+    def test_matches_write(self, temp_dir):
+        """Batches produce the same files as a single write."""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((10, 4))
+        metadata = [{"id": f"p{i}", "title": "ü" * i} for i in range(10)]
+        keys = [(f"p{i}", f"c{i}", f"m{i}") for i in range(10)]
+        batches = [(vectors[i : i + 3], metadata[i : i + 3], keys[i : i + 3])
+                   for i in range(0, 10, 3)]
+
+        stats = VectorIndex(temp_dir / "stream").write_batches(iter(batches), "m")
+        VectorIndex(temp_dir / "whole").write(vectors, metadata, "m", keys)
+        stream = VectorIndex(temp_dir / "stream").open()
+        whole = VectorIndex(temp_dir / "whole").open()
+
+        assert stats == {"rows": 10, "duplicates": 0}
+        assert len(stream) == 10
+        np.testing.assert_array_equal(stream.get_vectors(range(10)), whole.get_vectors(range(10)))
+        np.testing.assert_array_equal(stream.segments[0].offsets, whole.segments[0].offsets)
+        assert stream.metadata(list(range(10))) == metadata
+        assert stream.entries() == whole.entries()
+
+    def test_repeated_keys(self, temp_dir):
+        """The last row of a repeated key wins."""
+        batches = [
+            (np.eye(4)[:2], [{"id": "a"}, {"id": "b"}], [("a", "", ""), ("b", "", "")]),
+            (np.eye(4)[2:3], [{"id": "a2"}], [("a", "", "")]),
+        ]
+
+        stats = VectorIndex(temp_dir).write_batches(batches, "m")
+        index = VectorIndex(temp_dir).open()
+
+        assert stats == {"rows": 3, "duplicates": 1}
+        assert len(index) == 2
+        assert index.entries()["a"][0] == 2
+
+    def test_empty(self, temp_dir):
+        """Writing no rows fails without leaving a segment behind."""
+        with pytest.raises(ValueError, match="without rows"):
+            VectorIndex(temp_dir).write_batches([], "m")
+        assert not list(temp_dir.glob("seg-*"))